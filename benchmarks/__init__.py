@@ -0,0 +1,3 @@
+"""Benchmarks for wskr."""
+
+__all__ = []
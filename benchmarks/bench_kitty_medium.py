@@ -0,0 +1,69 @@
+"""Sender-side cost of kitty transmission mediums for large payloads.
+
+Run from the repository root::
+
+    python benchmarks/bench_kitty_medium.py [--repeat N] [--sizes 1,10,30]
+
+For each payload size (in MB) this times what ``KittyTransport`` does before
+the terminal reads anything: base64-encoding the payload into APC chunks for
+``t=d``, or staging it in shared memory (``t=s``) / a temp file (``t=t``) and
+encoding only the object name.  Escapes go to ``/dev/null``; the bytes that
+would cross the PTY are reported alongside.  Staged objects are removed again
+since no terminal consumes them here.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from wskr.protocol import medium
+from wskr.protocol.kitty import KittyChunkParser
+
+_CONTROL = "a=T,f=100,i=1,q=2"
+
+
+def _send(fd: int, medium_key: str, payload: bytes) -> int:
+    if medium_key == medium.DIRECT:
+        data = KittyChunkParser.encode_command(f"{_CONTROL},t=d", payload)
+    else:
+        name = medium.stage_payload(medium_key, payload)
+        data = KittyChunkParser.encode_command(f"{_CONTROL},t={medium_key},S={len(payload)}", name.encode())
+        medium.discard_payload(medium_key, name)
+    os.write(fd, data)
+    return len(data)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", default="1,10,30", help="comma-separated payload sizes in MB")
+    args = parser.parse_args(argv)
+
+    fd = os.open(os.devnull, os.O_WRONLY)
+    try:
+        for size_mb in map(int, args.sizes.split(",")):
+            payload = os.urandom(size_mb * 1024 * 1024)
+            for name, key in (
+                ("direct", medium.DIRECT),
+                ("shm", medium.SHARED_MEMORY),
+                ("file", medium.TEMP_FILE),
+            ):
+                try:
+                    pty_bytes = _send(fd, key, payload)  # warm-up
+                except OSError as exc:
+                    print(f"{size_mb:>3} MB {name:>6}: unavailable ({exc})")
+                    continue
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    _send(fd, key, payload)
+                per_frame = (time.perf_counter() - start) / args.repeat
+                print(f"{size_mb:>3} MB {name:>6}: {per_frame * 1e3:9.3f} ms/frame {pty_bytes:>9} PTY bytes")
+    finally:
+        os.close(fd)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
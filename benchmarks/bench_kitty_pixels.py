@@ -0,0 +1,87 @@
+"""Per-frame cost of rendering a figure to kitty as PNG vs raw Agg pixels.
+
+Run from the repository root::
+
+    python benchmarks/bench_kitty_pixels.py [--frames N] [--size WxH]
+
+Each frame re-renders the figure and calls ``render_figure_to_terminal`` with a
+direct-mode ``KittyTransport``, so the numbers include drawing, PNG encoding or
+pixel packing/zlib, and base64 framing.  The escape stream goes to
+``/dev/null``; the in-band bytes and write syscalls per frame are reported as
+well.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import matplotlib as mpl
+
+mpl.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import wskr.protocol.kitty as kitty_mod
+from wskr.protocol.cache import ImageCache
+from wskr.protocol.kitty import KittyTransport
+from wskr.render.matplotlib.core import render_figure_to_terminal
+from wskr.terminal.sink import STDOUT_SINK
+
+_VARIANTS = (
+    ("png", "png", 0),
+    ("rgba", "rgba", 0),
+    ("rgb", "rgb", 0),
+    ("rgb+z1", "rgb", 1),
+    ("rgb+z6", "rgb", 6),
+)
+
+
+def _time_variant(
+    pixel_format: str, zlib_level: int, size: tuple[int, int], frames: int
+) -> tuple[float, int, float]:
+    width, height = size
+    transport = KittyTransport(medium="direct", pixel_format=pixel_format, zlib_level=zlib_level)
+    transport.get_window_size_px = lambda: (width, height)  # type: ignore[method-assign]
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    (line,) = ax.plot(range(100), [i**0.5 for i in range(100)])
+    canvas = FigureCanvasAgg(fig)
+    syscalls = STDOUT_SINK.stats.syscalls
+    with Path(os.devnull).open("w", encoding="utf-8") as sink, redirect_stdout(sink):
+        start = time.perf_counter()
+        for i in range(frames):
+            # a fresh cache and new data each frame: measure uploads, not placements
+            kitty_mod.IMAGE_CACHE = transport._cache = ImageCache()  # noqa: SLF001
+            line.set_ydata([(j + i) ** 0.5 for j in range(100)])
+            render_figure_to_terminal(canvas, transport)
+        elapsed = time.perf_counter() - start
+    plt.close(fig)
+    return elapsed / frames, transport.image_cache.nbytes, (STDOUT_SINK.stats.syscalls - syscalls) / frames
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--size", default="1280x800", help="figure size in pixels, WxH")
+    args = parser.parse_args(argv)
+
+    size = tuple(map(int, args.size.split("x")))
+    print(f"{args.size} figure, {args.frames} frames", file=sys.stderr)
+    for label, pixel_format, level in _VARIANTS:
+        per_frame, nbytes, calls = _time_variant(pixel_format, level, size, args.frames)  # type: ignore[arg-type]
+        pty_bytes = (nbytes + 2) // 3 * 4
+        print(
+            f"{label:>7}: {per_frame * 1e3:8.2f} ms/frame  ~{pty_bytes:>9} base64 bytes"
+            f"  {calls:4.1f} writes/frame",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+"""Per-frame cost of ``KittyTransport.send_image``: direct APC vs ``icat``.
+
+Run from the repository root::
+
+    python benchmarks/bench_kitty_send.py [--frames N] [--size WxH]
+
+The escape stream is written to ``/dev/null`` so only the sender-side cost is
+measured (encoding, syscalls and, for ``icat``, fork/exec plus the kitten's
+own start-up).  The ``icat`` row is skipped when ``kitty`` is not on ``PATH``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import matplotlib as mpl
+
+mpl.use("Agg")
+import matplotlib.pyplot as plt
+
+from wskr.protocol.kitty import KittyTransport
+
+
+def _render_png(width: int, height: int) -> bytes:
+    fig = plt.figure(figsize=(width / 100, height / 100), dpi=100)
+    ax = fig.add_subplot(111)
+    ax.plot(range(100), [i**0.5 for i in range(100)])
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def _time_mode(mode: str, png: bytes, frames: int) -> float:
+    transport = KittyTransport(mode=mode)
+    with (
+        Path(os.devnull).open("w", encoding="utf-8") as sink,
+        redirect_stdout(sink),
+        redirect_stderr(sink),
+    ):
+        transport.send_image(png)  # warm-up
+        start = time.perf_counter()
+        for _ in range(frames):
+            transport.send_image(png)
+        elapsed = time.perf_counter() - start
+    return elapsed / frames
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--size", default="1280x800", help="figure size in pixels, WxH")
+    args = parser.parse_args(argv)
+
+    if shutil.which("kitty") is None:
+        print("kitty not found on PATH; KittyTransport cannot be constructed", file=sys.stderr)
+        return 1
+
+    width, height = map(int, args.size.split("x"))
+    png = _render_png(width, height)
+    print(f"payload: {len(png)} bytes PNG ({width}x{height}), {args.frames} frames")
+    for mode in ("icat", "direct"):
+        per_frame = _time_mode(mode, png, args.frames)
+        print(f"{mode:>7}: {per_frame * 1e3:8.3f} ms/frame  ({1 / per_frame:8.1f} fps ceiling)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
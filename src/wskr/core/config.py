@@ -13,11 +13,12 @@ from typing import Any
 # Bytes per chunk when streaming images over the Kitty protocol.
 IMAGE_CHUNK_SIZE: int = 4096
 
-# Typical number of terminal rows; used to subtract the status bar height when
-# computing drawable area.  Terminals are often 24 rows tall.
+# Row count assumed when the terminal does not report one.  Terminals are often
+# 24 rows tall.
 DEFAULT_TTY_ROWS: int = 24
 
-# Time-to-live for cached window size values in ``KittyTransport``.
+# Time-to-live for cached window size values in ``KittyTransport`` when
+# resizes are not being watched (see ``WATCH_RESIZE``).
 CACHE_TTL_S: float = float(os.getenv("WSKR_CACHE_TTL_S", "1.0"))
 
 # Generic timeout for subprocess or TTY operations.
@@ -32,6 +33,71 @@ FALLBACK: str = os.getenv("WSKR_FALLBACK", "noop")
 # Dark mode policy override: ``force-on``, ``force-off`` or ``auto``.
 DARK_MODE_POLICY: str = os.getenv("WSKR_DARK_MODE_POLICY", "auto")
 
+# How ``KittyTransport.send_image`` reaches the terminal: ``direct`` writes the
+# graphics protocol from Python, ``icat`` forks ``kitty +kitten icat`` per image
+# (compatibility mode).
+KITTY_SEND_MODE: str = os.getenv("WSKR_KITTY_SEND_MODE", "direct")
+
+# Bounds on images kept resident in kitty for reuse by content digest; the
+# least recently used ones are deleted terminal-side once either is exceeded.
+KITTY_CACHE_MAX_IMAGES: int = int(os.getenv("WSKR_KITTY_CACHE_MAX_IMAGES", "64"))
+KITTY_CACHE_MAX_BYTES: int = int(os.getenv("WSKR_KITTY_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# Transmission medium for kitty payloads: ``auto`` (shared memory, then a
+# temporary file, when the terminal is local), ``shm``, ``file`` or ``direct``
+# (always stream through the TTY).  Payloads smaller than
+# ``KITTY_MEDIUM_MIN_BYTES`` are always sent directly.
+KITTY_MEDIUM: str = os.getenv("WSKR_KITTY_MEDIUM", "auto")
+KITTY_MEDIUM_MIN_BYTES: int = int(os.getenv("WSKR_KITTY_MEDIUM_MIN_BYTES", str(64 * 1024)))
+
+# Image data handed to kitty when a figure is rendered: ``png`` (encoded by
+# Matplotlib), or raw ``rgba``/``rgb`` pixels straight from the Agg buffer,
+# which skips the PNG deflate step at the cost of a larger payload.
+KITTY_PIXEL_FORMAT: str = os.getenv("WSKR_KITTY_PIXEL_FORMAT", "png")
+
+# zlib level (1-9) for raw pixel payloads sent with ``o=z``; 0 disables it.
+KITTY_ZLIB_LEVEL: int = int(os.getenv("WSKR_KITTY_ZLIB_LEVEL", "0"))
+
+# Send raw pixel frames that keep their size as ``a=f`` edits of only the
+# changed rectangles of the previous frame, updating it in place.
+KITTY_DIRTY_RECTS: bool = os.getenv("WSKR_KITTY_DIRTY_RECTS", "").lower() == "true"
+
+# Hand rendered frames to a background writer thread instead of writing them
+# from the drawing thread; a figure's unsent frame is replaced by its next one,
+# and waiting frames beyond ``TRANSMIT_MAX_BYTES`` are dropped oldest first.
+TRANSMIT_ASYNC: bool = os.getenv("WSKR_TRANSMIT_ASYNC", "").lower() == "true"
+TRANSMIT_MAX_BYTES: int = int(os.getenv("WSKR_TRANSMIT_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Send every frame through a render -> encode -> transmit pipeline: the figure
+# is drawn on the calling thread while earlier frames are encoded and written
+# on two worker threads.  At most ``PIPELINE_DEPTH`` frames wait before each
+# worker; beyond that the caller blocks instead of frames being dropped.
+PIPELINE: bool = os.getenv("WSKR_PIPELINE", "").lower() == "true"
+PIPELINE_DEPTH: int = int(os.getenv("WSKR_PIPELINE_DEPTH", "2"))
+
+# ``draw_idle`` on the terminal canvas defers the draw by at least
+# ``IDLE_DRAW_INTERVAL_S`` so bursts of artist changes become one frame, and
+# never delivers more than ``MAX_FPS`` frames per second (0 lifts the cap).
+IDLE_DRAW_INTERVAL_S: float = float(os.getenv("WSKR_IDLE_DRAW_INTERVAL_S", "0.01"))
+MAX_FPS: float = float(os.getenv("WSKR_MAX_FPS", "30"))
+
+# Re-rasterize only the stale axes of a figure over a cached background when
+# its layout is unchanged, instead of drawing the whole figure every frame.
+PARTIAL_REDRAW: bool = os.getenv("WSKR_PARTIAL_REDRAW", "true").lower() != "false"
+
+# Rasterize Rich plots at this multiple of the pixels their cell box covers;
+# the terminal scales the image down to the box, so 1 draws nothing wasted.
+OVERSAMPLE: float = float(os.getenv("WSKR_OVERSAMPLE", "1.0"))
+
+# Install a chained ``SIGWINCH`` handler so cached geometry is dropped exactly
+# when the terminal is resized, instead of being re-read on every call.
+WATCH_RESIZE: bool = os.getenv("WSKR_WATCH_RESIZE", "true").lower() != "false"
+
+# Persist terminal probe results (kitty binary, background color, cell size)
+# under ``$XDG_CACHE_HOME/wskr`` so later processes in the same terminal can
+# skip the round trips.
+PROBE_CACHE: bool = os.getenv("WSKR_PROBE_CACHE", "true").lower() != "false"
+
 
 def configure(**overrides: Any) -> dict[str, Any]:
     """Override configuration values with keyword arguments.
@@ -50,6 +116,24 @@ def configure(**overrides: Any) -> dict[str, Any]:
         "OSC_TIMEOUT_S": OSC_TIMEOUT_S,
         "FALLBACK": FALLBACK,
         "DARK_MODE_POLICY": DARK_MODE_POLICY,
+        "KITTY_CACHE_MAX_BYTES": KITTY_CACHE_MAX_BYTES,
+        "KITTY_CACHE_MAX_IMAGES": KITTY_CACHE_MAX_IMAGES,
+        "KITTY_DIRTY_RECTS": KITTY_DIRTY_RECTS,
+        "KITTY_MEDIUM": KITTY_MEDIUM,
+        "KITTY_MEDIUM_MIN_BYTES": KITTY_MEDIUM_MIN_BYTES,
+        "KITTY_PIXEL_FORMAT": KITTY_PIXEL_FORMAT,
+        "KITTY_SEND_MODE": KITTY_SEND_MODE,
+        "KITTY_ZLIB_LEVEL": KITTY_ZLIB_LEVEL,
+        "IDLE_DRAW_INTERVAL_S": IDLE_DRAW_INTERVAL_S,
+        "MAX_FPS": MAX_FPS,
+        "OVERSAMPLE": OVERSAMPLE,
+        "PARTIAL_REDRAW": PARTIAL_REDRAW,
+        "PIPELINE": PIPELINE,
+        "PIPELINE_DEPTH": PIPELINE_DEPTH,
+        "PROBE_CACHE": PROBE_CACHE,
+        "TRANSMIT_ASYNC": TRANSMIT_ASYNC,
+        "TRANSMIT_MAX_BYTES": TRANSMIT_MAX_BYTES,
+        "WATCH_RESIZE": WATCH_RESIZE,
     }
 
 
@@ -58,8 +142,26 @@ __all__ = [
     "DARK_MODE_POLICY",
     "DEFAULT_TTY_ROWS",
     "FALLBACK",
+    "IDLE_DRAW_INTERVAL_S",
     "IMAGE_CHUNK_SIZE",
+    "KITTY_CACHE_MAX_BYTES",
+    "KITTY_CACHE_MAX_IMAGES",
+    "KITTY_DIRTY_RECTS",
+    "KITTY_MEDIUM",
+    "KITTY_MEDIUM_MIN_BYTES",
+    "KITTY_PIXEL_FORMAT",
+    "KITTY_SEND_MODE",
+    "KITTY_ZLIB_LEVEL",
+    "MAX_FPS",
     "OSC_TIMEOUT_S",
+    "OVERSAMPLE",
+    "PARTIAL_REDRAW",
+    "PIPELINE",
+    "PIPELINE_DEPTH",
+    "PROBE_CACHE",
     "TIMEOUT_S",
+    "TRANSMIT_ASYNC",
+    "TRANSMIT_MAX_BYTES",
+    "WATCH_RESIZE",
     "configure",
 ]
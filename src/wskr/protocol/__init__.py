@@ -1,10 +1,11 @@
 """Graphics protocols (kitty, sixel, …)."""
 
 from .base import ImageProtocol
-from .registry import get_image_protocol, load_entry_points, register_image_protocol
+from .registry import detect_image_protocol, get_image_protocol, load_entry_points, register_image_protocol
 
 __all__ = [
     "ImageProtocol",
+    "detect_image_protocol",
     "get_image_protocol",
     "load_entry_points",
     "register_image_protocol",
@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Self
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
     from types import TracebackType
 
 
@@ -12,8 +13,15 @@ class ImageProtocol(ABC):
 
     Mirrors the existing ``ImageTransport`` API to enable a non-breaking
     migration. Implementations may be adapted from current transports.
+
+    Protocols that can display raw pixels set :attr:`supports_pixels` and
+    implement :meth:`send_pixels`; renderers then hand over the Agg buffer
+    instead of encoding a PNG.  Those that can also edit part of the image
+    on screen implement :meth:`patch_pixels`.
     """
 
+    supports_pixels: bool = False
+
     @abstractmethod
     def get_window_size_px(self) -> tuple[int, int]:
         """Return ``(width_px, height_px)`` of the drawable viewport."""
@@ -32,6 +40,39 @@ class ImageProtocol(ABC):
         """
         ...
 
+    def init_images(self, pngs: Sequence[bytes]) -> list[int]:
+        """Upload several PNGs and return their image IDs, in order.
+
+        The default calls :meth:`init_image` for each one; protocols that can
+        pipeline uploads override it to avoid a round trip per image.
+        """
+        return [self.init_image(png) for png in pngs]
+
+    def send_pixels(self, rgba: memoryview, width: int, height: int) -> None:
+        """Display ``width`` x ``height`` RGBA pixels (row-major, 8 bits each).
+
+        Only called when :attr:`supports_pixels` is true.
+        """
+        msg = f"{type(self).__name__} cannot send raw pixels"
+        raise NotImplementedError(msg)
+
+    def patch_pixels(  # noqa: PLR6301
+        self,
+        rgba: memoryview,  # noqa: ARG002
+        width: int,  # noqa: ARG002
+        height: int,  # noqa: ARG002
+        regions: Sequence[tuple[int, int, int, int]] | None = None,  # noqa: ARG002
+    ) -> bool:
+        """Turn the image last shown into ``rgba`` in place.
+
+        The image is the one last sent by :meth:`send_pixels` or
+        :meth:`send_image`.  Only the ``(x, y, width, height)`` rectangles in ``regions`` are sent;
+        with ``None`` the protocol finds the changed ones itself.  Return
+        ``False`` without sending anything when no image of that size can be
+        edited; the caller then sends the full frame.  The default never can.
+        """
+        return False
+
     def close(self) -> None:  # noqa: B027
         """Release any acquired resources (optional)."""
 
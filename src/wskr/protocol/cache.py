@@ -0,0 +1,125 @@
+"""Content-addressed bookkeeping for images resident in the terminal.
+
+Protocols that keep uploaded images terminal-side (kitty) can look a payload
+up by digest before transmitting it again and reuse the existing image ID.
+The cache is bounded by entry count and by total payload bytes; entries pushed
+out are handed back to the caller so it can free them in the terminal too.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import secrets
+from collections import OrderedDict
+from threading import Lock
+
+from wskr.core.config import KITTY_CACHE_MAX_BYTES, KITTY_CACHE_MAX_IMAGES
+
+# Largest image ID a Unicode placeholder can address through a 24-bit
+# foreground color.
+MAX_IMAGE_ID = 0xFFFFFF
+
+
+def payload_digest(payload: bytes | memoryview, *extra: bytes) -> bytes:
+    """Return the cache key for ``payload``.
+
+    ``extra`` parts (for example the pixel format and dimensions of raw image
+    data) are hashed along with the payload without concatenating them.
+    """
+    h = hashlib.blake2b(payload, digest_size=16)
+    for part in extra:
+        h.update(part)
+    return h.digest()
+
+
+class ImageCache:
+    """LRU map from payload digest to a live terminal image ID.
+
+    The cache also allocates image IDs so that every transport sharing it
+    (and therefore the same terminal) draws from one ID space.  Kitty image
+    IDs belong to the terminal window, not the process, so allocation starts
+    at a random ID (unless ``first_id`` is given) and wraps within
+    ``1..MAX_IMAGE_ID``; a second program in the same window does not
+    overwrite the images of the first.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_images: int = KITTY_CACHE_MAX_IMAGES,
+        max_bytes: int = KITTY_CACHE_MAX_BYTES,
+        first_id: int | None = None,
+    ) -> None:
+        self.max_images = max_images
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[bytes, tuple[int, int]] = OrderedDict()
+        self._nbytes = 0
+        self._next_id = secrets.randbelow(MAX_IMAGE_ID) + 1 if first_id is None else first_id
+        self._lock = Lock()
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Total payload bytes of the cached images."""
+        return self._nbytes
+
+    def allocate_id(self) -> int:
+        """Return a fresh image ID."""
+        with self._lock:
+            image_id = self._next_id
+            self._next_id = image_id % MAX_IMAGE_ID + 1
+            return image_id
+
+    def get(self, digest: bytes) -> int | None:
+        """Return the image ID stored for ``digest`` and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            self._entries.move_to_end(digest)
+            return entry[0]
+
+    def put(self, digest: bytes, image_id: int, nbytes: int) -> list[int]:
+        """Record ``image_id`` for ``digest`` and return the image IDs evicted."""
+        with self._lock:
+            old = self._entries.pop(digest, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            self._entries[digest] = (image_id, nbytes)
+            self._nbytes += nbytes
+            evicted: list[int] = []
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_images or self._nbytes > self.max_bytes
+            ):
+                _, (old_id, old_bytes) = self._entries.popitem(last=False)
+                self._nbytes -= old_bytes
+                evicted.append(old_id)
+            if old is not None and old[0] != image_id:
+                evicted.append(old[0])
+            return evicted
+
+    def discard(self, digest: bytes) -> int | None:
+        """Forget ``digest`` (its image now holds other content) and return its ID."""
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if entry is None:
+                return None
+            self._nbytes -= entry[1]
+            return entry[0]
+
+    def clear(self) -> list[int]:
+        """Forget every entry and return the image IDs that were cached."""
+        with self._lock:
+            ids = [image_id for image_id, _ in self._entries.values()]
+            self._entries.clear()
+            self._nbytes = 0
+            return ids
+
+
+# Shared by every kitty transport in the process: there is one terminal.
+IMAGE_CACHE = ImageCache()
+
+
+__all__ = ["IMAGE_CACHE", "MAX_IMAGE_ID", "ImageCache", "payload_digest"]
@@ -0,0 +1,69 @@
+"""Changed-region detection between two frames of raw pixels.
+
+Live plots usually redraw only the data area of an axes, so a new frame can be
+sent as a handful of rectangles patched onto the previous one.  Frames are
+compared as one 32-bit word per RGBA pixel; changed rows are grouped into
+bands and each band is split into column runs, with nearby runs merged so a
+scatter of changed pixels does not turn into hundreds of tiny commands.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+# Runs of changed rows/columns closer than this many pixels are merged.
+MERGE_GAP_PX = 16
+
+# Above this many rectangles a single bounding box is cheaper to send.
+MAX_REGIONS = 16
+
+
+def _runs(mask: np.ndarray, gap: int) -> list[tuple[int, int]]:
+    """Return ``(start, stop)`` runs of ``True`` in ``mask``, merging short gaps."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    if edges.size == 0:
+        return []
+    starts, stops = edges[0::2], edges[1::2]
+    keep = starts[1:] - stops[:-1] > gap
+    return list(
+        zip(
+            np.concatenate((starts[:1], starts[1:][keep])).tolist(),
+            np.concatenate((stops[:-1][keep], stops[-1:])).tolist(),
+            strict=True,
+        )
+    )
+
+
+def changed_regions(
+    previous: np.ndarray,
+    current: np.ndarray,
+    *,
+    gap: int = MERGE_GAP_PX,
+    max_regions: int = MAX_REGIONS,
+) -> list[tuple[int, int, int, int]]:
+    """Return ``(x, y, width, height)`` rectangles covering every changed pixel.
+
+    ``previous`` and ``current`` are ``(height, width, 4)`` ``uint8`` arrays of
+    the same shape.  An empty list means the frames are identical.
+    """
+    if previous.shape != current.shape:
+        msg = f"frame shapes differ: {previous.shape} != {current.shape}"
+        raise ValueError(msg)
+    height, width = current.shape[:2]
+    changed = np.ascontiguousarray(previous).view(np.uint32).reshape(height, width) != (
+        np.ascontiguousarray(current).view(np.uint32).reshape(height, width)
+    )
+    regions: list[tuple[int, int, int, int]] = []
+    for y0, y1 in _runs(changed.any(axis=1), gap):
+        for x0, x1 in _runs(changed[y0:y1].any(axis=0), gap):
+            regions.append((x0, y0, x1 - x0, y1 - y0))
+    if len(regions) > max_regions:
+        x0 = min(r[0] for r in regions)
+        y0 = min(r[1] for r in regions)
+        x1 = max(r[0] + r[2] for r in regions)
+        y1 = max(r[1] + r[3] for r in regions)
+        return [(x0, y0, x1 - x0, y1 - y0)]
+    return regions
+
+
+__all__ = ["MAX_REGIONS", "MERGE_GAP_PX", "changed_regions"]
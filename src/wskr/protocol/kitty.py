@@ -1,25 +1,135 @@
 from __future__ import annotations
 
+import base64
 import logging
+import math
 import re
-import shutil
+import struct
 import sys
+import termios
 import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from wskr.core.config import CACHE_TTL_S, DEFAULT_TTY_ROWS, IMAGE_CHUNK_SIZE, TIMEOUT_S
+import numpy as np
+
+from wskr.core.config import (
+    CACHE_TTL_S,
+    IMAGE_CHUNK_SIZE,
+    KITTY_DIRTY_RECTS,
+    KITTY_MEDIUM,
+    KITTY_MEDIUM_MIN_BYTES,
+    KITTY_PIXEL_FORMAT,
+    KITTY_SEND_MODE,
+    KITTY_ZLIB_LEVEL,
+    TIMEOUT_S,
+)
 from wskr.core.errors import CommandRunnerError, TransportRuntimeError, TransportUnavailableError
+from wskr.protocol import medium as _medium
 from wskr.protocol.base import ImageProtocol
+from wskr.protocol.cache import IMAGE_CACHE, ImageCache, payload_digest
+from wskr.protocol.dirty import changed_regions
 from wskr.protocol.registry import register_image_protocol
+from wskr.terminal import osc
 from wskr.terminal.core.command import CommandRunner
-from wskr.terminal.osc import query_tty
+from wskr.terminal.geometry import get_geometry, resize_generation, window_px
+from wskr.terminal.probes import kitty_binary
+from wskr.terminal.sink import STDOUT_SINK
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
 
 logger = logging.getLogger(__name__)
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_HEADER_LEN = 24  # signature + IHDR length/type + width + height
+_SEND_MODES = frozenset({"direct", "icat"})
+# ``f`` key for each pixel format; ``png`` means PNG is preferred over raw pixels.
+_PIXEL_FORMATS = {"png": 100, "rgba": 32, "rgb": 24}
+_MEDIUMS = {
+    "auto": (_medium.SHARED_MEMORY, _medium.TEMP_FILE),
+    "shm": (_medium.SHARED_MEMORY,),
+    "file": (_medium.TEMP_FILE,),
+    "direct": (),
+}
+# Chunk boundaries: the previous chunk's terminator fused with the next header.
+_CONTINUE = b"\x1b\\\x1b_Gm=1;"
+_FINISH = b"\x1b\\\x1b_Gm=0;"
+# Image ID used for ``a=q`` probes; queries never store the image.
+_PROBE_ID = 31
+_PROBE_RESP_RE = re.compile(rb"\x1b_Gi=%d;([^\x1b]*)\x1b\\" % _PROBE_ID)
+_REPLY_RE = re.compile(rb"\x1b_G([^;\x1b]*);([^\x1b]*)\x1b\\")
+_REPLY_ID_RE = re.compile(rb"(?:^|,)i=(\d+)")
+
+# Per-process verdicts of :func:`_medium_supported`.
+_MEDIUM_SUPPORT: dict[str, bool] = {}
+
+
+def _png_size(png_bytes: bytes) -> tuple[int, int]:
+    """Return ``(width, height)`` from the PNG header, or ``(0, 0)`` if unknown."""
+    if len(png_bytes) < _PNG_HEADER_LEN or not png_bytes.startswith(_PNG_SIGNATURE):
+        return (0, 0)
+    width, height = struct.unpack(">II", png_bytes[16:_PNG_HEADER_LEN])
+    return (width, height)
+
+
+def _write_stdout(segments: Iterable[bytes | memoryview]) -> None:
+    """Queue escape segments on the stdout sink (written at once outside a frame)."""
+    STDOUT_SINK.write(segments)
+
+
+def _probe_request(medium: str, payload: bytes) -> bytes:
+    """Return an ``a=q`` query loading a 1x1 RGB image from ``payload`` via ``medium``."""
+    return KittyChunkParser.encode_command(f"a=q,i={_PROBE_ID},s=1,v=1,f=24,t={medium}", payload)
+
+
+def _medium_supported(medium: str) -> bool:
+    """Return whether the terminal accepts ``medium``, probing it once per process.
+
+    The probe stages a 1x1 RGB image and asks kitty to load it with ``a=q``,
+    which validates the medium without storing anything.
+    """
+    if medium in _MEDIUM_SUPPORT:
+        return _MEDIUM_SUPPORT[medium]
+    ok = False
+    try:
+        name = _medium.stage_payload(medium, b"\x00\x00\x00")
+    except OSError:
+        logger.debug("staging a %r probe failed", medium, exc_info=True)
+    else:
+        request = _probe_request(medium, name.encode("utf-8"))
+        try:
+            (m,) = osc.query_many([(request, _PROBE_RESP_RE)], timeout=TIMEOUT_S)
+        except (OSError, termios.error):
+            logger.debug("probing medium %r failed", medium, exc_info=True)
+            m = None
+        ok = bool(m and m.group(1) == b"OK")
+        if not ok:
+            _medium.discard_payload(medium, name)
+    logger.debug("kitty transmission medium %r supported=%s", medium, ok)
+    _MEDIUM_SUPPORT[medium] = ok
+    return ok
+
+
+@dataclass(slots=True)
+class _Frame:
+    """Last full image sent, kept so later frames can be sent as edits of it.
+
+    ``pixels`` holds a raw-pixel frame to diff the next one against; it is
+    ``None`` for a PNG, which can still be edited in regions the caller names.
+    """
+
+    image_id: int
+    digest: bytes
+    shape: tuple[int, int]  # (height, width)
+    pixels: np.ndarray | None
+
 
 class KittyChunkParser:
     """Low-level utilities for kitty chunk framing and responses."""
 
-    _RESP_RE = re.compile(r"\x1b_Gi=(\d+),i=(\d+);OK\x1b\\")
+    _RESP_RE = re.compile(r"\x1b_Gi=(\d+)(?:,i=(\d+))?;OK\x1b\\")
 
     @staticmethod
     def send_chunk(img_num: int, chunk: bytes, *, final: bool = False) -> None:
@@ -32,94 +142,398 @@ class KittyChunkParser:
             final,
         )
         header = f"\x1b_Ga=t,q=0,f=32,i={img_num},m={m_flag};"
-        sys.stdout.buffer.write(header.encode("ascii") + chunk + b"\x1b\\")
-        sys.stdout.flush()
+        _write_stdout((header.encode("ascii"), chunk, b"\x1b\\"))
+
+    @staticmethod
+    def frame_command(
+        control: str,
+        payload: bytes | memoryview = b"",
+        *,
+        more: bool = False,
+    ) -> list[bytes | memoryview]:
+        """Return one graphics command carrying ``payload`` as write segments.
+
+        The payload is base64-encoded once and walked with memoryview slices of
+        ``IMAGE_CHUNK_SIZE`` (rounded down to a multiple of 4, as the protocol
+        requires), so no chunk is copied.  Only the first chunk carries
+        ``control``; continuation chunks carry just the ``m`` key.  With
+        ``more`` every chunk is marked ``m=1`` and the caller sends the final
+        ``m=0`` chunk itself.
+        """
+        data = memoryview(base64.standard_b64encode(payload))
+        size = max(IMAGE_CHUNK_SIZE - IMAGE_CHUNK_SIZE % 4, 4)
+        head = b"\x1b_G" + control.encode("ascii")
+        if len(data) <= size and not more:
+            return [head + b";", data, b"\x1b\\"]
+        segments: list[bytes | memoryview] = [head + b",m=1;", data[:size]]
+        for i in range(size, len(data), size):
+            last = i + size >= len(data)
+            segments += (_FINISH if last and not more else _CONTINUE, data[i : i + size])
+        segments.append(b"\x1b\\")
+        return segments
+
+    @staticmethod
+    def encode_command(control: str, payload: bytes | memoryview = b"") -> bytes:
+        """Return :meth:`frame_command` joined into a single bytes object."""
+        return b"".join(KittyChunkParser.frame_command(control, payload))
+
+    @staticmethod
+    def parse_error_replies(resp: bytes) -> dict[int, str]:
+        """Return ``{image_id: message}`` for every non-``OK`` reply in ``resp``."""
+        errors: dict[int, str] = {}
+        for keys, message in _REPLY_RE.findall(resp):
+            m = _REPLY_ID_RE.search(keys)
+            if m and message != b"OK":
+                errors[int(m.group(1))] = message.decode("ascii", "replace")
+        return errors
 
     @classmethod
     def parse_init_response(cls, img_num: int, resp: bytes) -> int:
-        """Validate and extract the kitty image ID from ``resp``."""
+        """Validate and extract the kitty image ID from ``resp``.
+
+        Accepts kitty's ``i=<id>;OK`` reply as well as the two-key
+        ``i=<id>,i=<num>;OK`` form.
+        """
         if not resp:
             msg = "No response from kitty on image init"
             raise TransportRuntimeError(msg)
         text = resp.decode("ascii")
         m = cls._RESP_RE.match(text)
-        if not m or int(m.group(2)) != img_num:
+        if not m or int(m.group(2) or m.group(1)) != img_num:
             msg = f"Unexpected kitty response: {text!r}"
             raise TransportRuntimeError(msg)
         return int(m.group(1))
 
 
 class KittyTransport(ImageProtocol):
-    __slots__ = ("_cache_time", "_cached_size", "_kitty", "_next_img", "_runner")
+    """Kitty graphics protocol transport.
 
-    def __init__(self) -> None:
-        self._kitty = shutil.which("kitty")
-        if not self._kitty:
+    ``mode="direct"`` (the default, see ``WSKR_KITTY_SEND_MODE``) writes the
+    protocol escapes from Python; ``mode="icat"`` keeps the historical
+    ``kitty +kitten icat`` subprocess path as a compatibility mode.
+
+    Large payloads travel through shared memory or a temporary file when the
+    terminal is local and accepts it (``medium``, see ``WSKR_KITTY_MEDIUM``);
+    otherwise they are streamed through the TTY.
+
+    Uploaded images are remembered in an :class:`ImageCache` keyed by payload
+    digest (the process-wide :data:`IMAGE_CACHE` unless ``cache`` is given), so
+    showing identical bytes again only emits a placement of the existing image.
+
+    With ``pixel_format`` ``"rgba"`` or ``"rgb"`` (see ``WSKR_KITTY_PIXEL_FORMAT``)
+    renderers hand over raw Agg pixels instead of a PNG; they are sent as
+    ``f=32``/``f=24`` data, zlib-compressed (``o=z``) when ``zlib_level`` is
+    between 1 and 9.  With ``dirty_rects`` (see ``WSKR_KITTY_DIRTY_RECTS``) a
+    raw frame the same size as the previous one is not placed again: only its
+    changed rectangles are sent, as ``a=f`` edits of the image on screen.
+    :meth:`patch_pixels` sends such edits for rectangles the caller names
+    (e.g. a blitted bbox) in every direct-mode configuration, including the
+    default ``"png"`` one: the edited rectangles travel as raw pixels on
+    their own, whatever format the image on screen was sent in.
+    """
+
+    __slots__ = (
+        "_cache",
+        "_cache_time",
+        "_cached_size",
+        "_dirty_rects",
+        "_kitty",
+        "_last_frame",
+        "_medium",
+        "_mode",
+        "_pixel_format",
+        "_runner",
+        "_size_generation",
+        "_zlib_level",
+    )
+
+    def __init__(
+        self,
+        *,
+        mode: str | None = None,
+        medium: str | None = None,
+        cache: ImageCache | None = None,
+        pixel_format: str | None = None,
+        zlib_level: int | None = None,
+        dirty_rects: bool | None = None,
+    ) -> None:
+        self._mode = mode or KITTY_SEND_MODE
+        if self._mode not in _SEND_MODES:
+            msg = f"Unknown kitty send mode {self._mode!r}; expected one of {sorted(_SEND_MODES)}"
+            raise ValueError(msg)
+        self._medium = medium or KITTY_MEDIUM
+        if self._medium not in _MEDIUMS:
+            msg = f"Unknown kitty medium {self._medium!r}; expected one of {sorted(_MEDIUMS)}"
+            raise ValueError(msg)
+        self._pixel_format = pixel_format or KITTY_PIXEL_FORMAT
+        if self._pixel_format not in _PIXEL_FORMATS:
+            msg = (
+                f"Unknown kitty pixel format {self._pixel_format!r}; expected one of {sorted(_PIXEL_FORMATS)}"
+            )
+            raise ValueError(msg)
+        self._zlib_level = KITTY_ZLIB_LEVEL if zlib_level is None else zlib_level
+        if not 0 <= self._zlib_level <= 9:  # noqa: PLR2004
+            msg = f"zlib level must be between 0 and 9, got {self._zlib_level}"
+            raise ValueError(msg)
+        # Only icat needs the local binary; direct mode talks to the terminal,
+        # which may well be on the other end of an SSH connection.
+        self._kitty = kitty_binary() if self._mode == "icat" else None
+        if self._mode == "icat" and not self._kitty:
             msg = "[wskr] Kitty protocol not available: 'kitty' binary not found."
             raise TransportUnavailableError(msg)
-        logger.debug("KittyTransport.__init__: kitty=%s timeout=%s", self._kitty, TIMEOUT_S)
-        self._next_img = 1
+        logger.debug(
+            "KittyTransport.__init__: kitty=%s mode=%s timeout=%s", self._kitty, self._mode, TIMEOUT_S
+        )
+        self._cache = cache if cache is not None else IMAGE_CACHE
+        self._dirty_rects = KITTY_DIRTY_RECTS if dirty_rects is None else dirty_rects
+        self._last_frame: _Frame | None = None
         self._cached_size: tuple[int, int] | None = None
         self._cache_time = 0.0
+        self._size_generation: int | None = None
         self._runner = CommandRunner(timeout=TIMEOUT_S)
 
     def invalidate_cache(self) -> None:
         """Drop any cached window-size information."""
         self._cached_size = None
         self._cache_time = 0.0
+        self._size_generation = None
 
     def get_window_size_px(self) -> tuple[int, int]:
-        logger.debug(
-            "KittyTransport.get_window_size_px: cached_size=%r age=%.2f",
-            self._cached_size,
-            time.time() - self._cache_time,
-        )
-        if self._cached_size is not None and (time.time() - self._cache_time) < CACHE_TTL_S:
-            return self._cached_size
-        try:
-            proc = self._runner.run(
-                [self._kitty, "+kitten", "icat", "--print-window-size"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            w_px, h_px = map(int, proc.stdout.strip().split("x"))
-        except (CommandRunnerError, ValueError):
-            logger.warning("KittyTransport.get_window_size_px failed", exc_info=True)
-            size = (800, 600)
-            logger.debug("KittyTransport.get_window_size_px: using fallback size=%r", size)
-        else:
-            rows = DEFAULT_TTY_ROWS
-            size = (w_px, h_px - (3 * h_px) // rows)
+        """Return the drawable window size, cached until the next resize.
+
+        Without a resize watcher (see ``WSKR_WATCH_RESIZE``) the size is
+        cached for ``CACHE_TTL_S`` seconds instead.
+        """
+        generation = resize_generation()
+        cached = self._cached_size
+        if cached is not None:
+            if generation is not None:
+                if generation == self._size_generation:
+                    return cached
+            elif (time.time() - self._cache_time) < CACHE_TTL_S:
+                return cached
+        size = window_px()
         self._cached_size = size
-        self._cache_time = time.time()
+        self._size_generation = generation
+        if generation is None:
+            self._cache_time = time.time()
         logger.debug("KittyTransport.get_window_size_px: computed_size=%r", size)
         return size
 
+    @property
+    def mode(self) -> str:
+        """Active send mode, ``"direct"`` or ``"icat"``."""
+        return self._mode
+
+    @property
+    def supports_pixels(self) -> bool:  # type: ignore[override]
+        """``True`` when renderers should call :meth:`send_pixels` instead of PNG."""
+        return self._mode == "direct" and self._pixel_format != "png"
+
+    @property
+    def image_cache(self) -> ImageCache:
+        """Digest-to-image-ID cache shared with other transports."""
+        return self._cache
+
+    def _select_medium(self, nbytes: int) -> str:
+        if nbytes < KITTY_MEDIUM_MIN_BYTES or _medium.is_remote_session():
+            return _medium.DIRECT
+        for candidate in _MEDIUMS[self._medium]:
+            if _medium_supported(candidate):
+                return candidate
+        return _medium.DIRECT
+
+    def _frame_transmit(
+        self,
+        control: str,
+        payload: bytes | memoryview,
+        *,
+        more: bool = False,
+    ) -> list[bytes | memoryview]:
+        """Frame a transmitting command, choosing the medium for ``payload``."""
+        medium = self._select_medium(len(payload))
+        if medium != _medium.DIRECT:
+            try:
+                name = _medium.stage_payload(medium, payload)
+            except OSError:
+                logger.warning(
+                    "staging payload via medium %r failed; sending directly", medium, exc_info=True
+                )
+            else:
+                return KittyChunkParser.frame_command(
+                    f"{control},t={medium},S={len(payload)}", name.encode("utf-8"), more=more
+                )
+        return KittyChunkParser.frame_command(f"{control},t=d", payload, more=more)
+
+    def _remember(self, digest: bytes, image_id: int, nbytes: int) -> None:
+        """Cache ``image_id`` and free whatever the cache evicts terminal-side."""
+        evicted = self._cache.put(digest, image_id, nbytes)
+        if evicted:
+            logger.debug("KittyTransport: evicting images %s", evicted)
+            _write_stdout([
+                seg for i in evicted for seg in KittyChunkParser.frame_command(f"a=d,d=I,i={i},q=2")
+            ])
+
+    @staticmethod
+    def _center_offset(width_px: int) -> int:
+        """Return the number of columns to indent an image ``width_px`` wide."""
+        geom = get_geometry()
+        if geom is None or width_px <= 0:
+            return 0
+        cell_w, _ = geom.cell_px
+        if cell_w <= 0:
+            return 0
+        img_cols = math.ceil(width_px / cell_w)
+        return max(0, (geom.cols - img_cols) // 2)
+
+    def _display(
+        self,
+        digest: bytes,
+        width_px: int,
+        format_keys: str,
+        payload: Callable[[], bytes | memoryview],
+    ) -> int:
+        """Place the image for ``digest``, transmitting ``payload()`` on a cache miss.
+
+        A cached image the terminal no longer holds (evicted by its storage
+        quota, deleted or reset) is uploaded again.  Return the ID of the image
+        placed.
+        """
+        offset = self._center_offset(width_px)
+        prefix = (f"\r\x1b[{offset}C" if offset else "\r").encode("ascii")
+        image_id = self._cache.get(digest)
+        if image_id is not None:
+            logger.debug("KittyTransport: cache hit img=%d offset=%d", image_id, offset)
+            _write_stdout([prefix, *KittyChunkParser.frame_command(f"a=p,i={image_id},q=1")])
+            if self._placed(image_id):
+                _write_stdout([b"\n"])
+                return image_id
+            logger.debug("KittyTransport: img=%d is no longer resident; uploading it again", image_id)
+            self._cache.discard(digest)
+        image_id = self._cache.allocate_id()
+        data = payload()
+        logger.debug("KittyTransport: img=%d %s bytes=%d offset=%d", image_id, format_keys, len(data), offset)
+        _write_stdout([prefix, *self._frame_transmit(f"a=T,{format_keys},i={image_id},q=2", data), b"\n"])
+        self._remember(digest, image_id, len(data))
+        return image_id
+
     @staticmethod
-    def _tput_lines() -> int:
-        tput = shutil.which("tput")
-        if not tput:
-            logger.debug("KittyTransport._tput_lines: tput not found, defaulting to 24")
-            return 24
+    def _placed(image_id: int) -> bool:
+        """Return whether the terminal accepted the ``q=1`` placement of ``image_id`` just queued.
+
+        Only a failure is answered; a DA1 query marks the end of the reply.  The
+        image is assumed resident when the terminal cannot be asked.
+        """
+        STDOUT_SINK.flush()
         try:
-            proc = CommandRunner().run(
-                [tput, "lines"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            out = proc.stdout.strip()
-            try:
-                return int(out or "24")
-            except ValueError:
-                logger.warning("KittyTransport._tput_lines parse failed: %r", out, exc_info=True)
-                return 24
-        except CommandRunnerError:
-            logger.warning("KittyTransport._tput_lines failed", exc_info=True)
-            return 24
+            resp = osc.query_tty(osc.DA1_REQUEST, more=osc.DA1_REPLY_END, timeout=TIMEOUT_S)
+        except (OSError, termios.error):
+            logger.debug("checking placement of img=%d failed", image_id, exc_info=True)
+            return True
+        return image_id not in KittyChunkParser.parse_error_replies(resp)
 
     def send_image(self, png_bytes: bytes) -> None:
+        if self._mode == "icat":
+            self._send_image_icat(png_bytes)
+            return
+        width_px, height_px = _png_size(png_bytes)
+        digest = payload_digest(png_bytes)
+        with STDOUT_SINK.frame():
+            image_id = self._display(digest, width_px, "f=100", lambda: png_bytes)
+        self._last_frame = _Frame(image_id, digest, (height_px, width_px), None) if width_px else None
+
+    def _pixel_keys(self) -> tuple[int, str]:
+        """Return the ``f`` key value and any ``o`` key for raw pixel payloads."""
+        fmt = _PIXEL_FORMATS[self._pixel_format]
+        if fmt == _PIXEL_FORMATS["png"]:
+            fmt = _PIXEL_FORMATS["rgba"]
+        return fmt, ",o=z" if self._zlib_level else ""
+
+    def _pack_pixels(self, rgba: np.ndarray) -> bytes | memoryview:
+        """Return the payload for an ``(h, w, 4)`` block of pixels."""
+        fmt, _ = self._pixel_keys()
+        data = np.ascontiguousarray(rgba[..., :3] if fmt == _PIXEL_FORMATS["rgb"] else rgba)
+        if self._zlib_level:
+            return zlib.compress(data, self._zlib_level)
+        return memoryview(data).cast("B")
+
+    def send_pixels(self, rgba: memoryview, width: int, height: int) -> None:
+        """Display raw RGBA pixels as ``f=32`` (or ``f=24``) data without PNG encoding."""
+        frame = np.frombuffer(memoryview(rgba).cast("B"), dtype=np.uint8).reshape(height, width, 4)
+        fmt, compression = self._pixel_keys()
+        format_keys = f"f={fmt},s={width},v={height}{compression}"
+        digest = payload_digest(frame, format_keys.encode("ascii"))
+        with STDOUT_SINK.frame():
+            if self._dirty_rects and self._patch_frame(frame, digest):
+                return
+            image_id = self._display(digest, width, format_keys, lambda: self._pack_pixels(frame))
+        self._last_frame = _Frame(image_id, digest, (height, width), frame.copy())
+
+    def patch_pixels(
+        self,
+        rgba: memoryview,
+        width: int,
+        height: int,
+        regions: Sequence[tuple[int, int, int, int]] | None = None,
+    ) -> bool:
+        """Send ``regions`` of ``rgba`` as ``a=f`` edits of the image last shown.
+
+        Works after :meth:`send_pixels` and, for named ``regions``, after
+        :meth:`send_image`; finding the changed regions needs raw pixels.
+        """
+        if self._mode != "direct":
+            return False
+        frame = np.frombuffer(memoryview(rgba).cast("B"), dtype=np.uint8).reshape(height, width, 4)
+        fmt, compression = self._pixel_keys()
+        digest = payload_digest(frame, f"f={fmt},s={width},v={height}{compression}".encode("ascii"))
+        with STDOUT_SINK.frame():
+            return self._patch_frame(frame, digest, regions)
+
+    def _patch_frame(
+        self,
+        frame: np.ndarray,
+        digest: bytes,
+        regions: Sequence[tuple[int, int, int, int]] | None = None,
+    ) -> bool:
+        """Edit the previous frame into ``frame`` in place, sending changed rectangles only.
+
+        ``regions`` names the rectangles to send; by default they are found
+        by comparing with the previous frame.  Return ``False`` when there is
+        no resident previous frame of the same size to edit and the frame has
+        to be uploaded as a new image.
+        """
+        last = self._last_frame
+        if last is None or last.shape != frame.shape[:2] or self._cache.get(last.digest) != last.image_id:
+            return False
+        if digest == last.digest:
+            return True
+        if regions is None:
+            if last.pixels is None:
+                return False
+            regions = changed_regions(last.pixels, frame)
+        fmt, compression = self._pixel_keys()
+        parts: list[bytes | memoryview] = []
+        for x, y, w, h in regions:
+            block = frame[y : y + h, x : x + w]
+            control = f"a=f,r=1,i={last.image_id},f={fmt},x={x},y={y},s={w},v={h}{compression},q=2"
+            parts += self._frame_transmit(control, self._pack_pixels(block))
+            if last.pixels is not None:
+                last.pixels[y : y + h, x : x + w] = block
+        changed = sum(w * h for _, _, w, h in regions)
+        logger.debug(
+            "KittyTransport: img=%d patched %d regions, %d of %d pixels",
+            last.image_id,
+            len(regions),
+            changed,
+            frame.shape[0] * frame.shape[1],
+        )
+        _write_stdout(parts)
+        self._cache.discard(last.digest)
+        last.digest = digest
+        self._remember(digest, last.image_id, frame.nbytes)
+        return True
+
+    def _send_image_icat(self, png_bytes: bytes) -> None:
         logger.debug(
             "KittyTransport.send_image: kitty=%s timeout=%s bytes=%d",
             self._kitty,
@@ -137,25 +551,76 @@ class KittyTransport(ImageProtocol):
             logger.exception("Error sending image via kitty icat")
 
     def init_image(self, png_bytes: bytes) -> int:
-        img_num = self._next_img
-        self._next_img += 1
-
+        digest = payload_digest(png_bytes)
+        cached = self._cache.get(digest)
+        if cached is not None:
+            logger.debug("KittyTransport.init_image: cache hit img=%d", cached)
+            return cached
+        img_num = self._cache.allocate_id()
         logger.debug("KittyTransport.init_image: img=%d bytes=%d", img_num, len(png_bytes))
 
-        for i in range(0, len(png_bytes), IMAGE_CHUNK_SIZE):
-            KittyChunkParser.send_chunk(img_num, png_bytes[i : i + IMAGE_CHUNK_SIZE])
-        KittyChunkParser.send_chunk(img_num, b"", final=True)
+        # Every chunk is sent with m=1; the closing m=0 chunk goes out with
+        # the query so the terminal's OK is read on the same descriptor.  The
+        # query bypasses the sink, so the chunks (and anything an enclosing
+        # frame queued before them) are flushed first, under the sink's lock.
+        with STDOUT_SINK.frame():
+            _write_stdout(self._frame_transmit(f"a=t,f=100,i={img_num},q=0", png_bytes, more=True))
+            STDOUT_SINK.flush()
+            (reply,) = osc.query_many([(b"\x1b_Gm=0;\x1b\\", _REPLY_RE)], timeout=TIMEOUT_S)
+        image_id = KittyChunkParser.parse_init_response(img_num, reply.group() if reply else b"")
+        self._remember(digest, image_id, len(png_bytes))
+        return image_id
 
-        resp = query_tty(
-            f"\x1b_Ga=t,q=0,f=32,i={img_num},m=0;\x1b\\".encode(),
-            more=lambda b: not b.endswith(b"\x1b\\"),
-            timeout=TIMEOUT_S,
-        )
-        return KittyChunkParser.parse_init_response(img_num, resp)
+    def init_images(self, pngs: Sequence[bytes], *, verify: bool = True) -> list[int]:
+        """Upload several PNGs back to back and return their image IDs.
+
+        IDs are allocated locally, so nothing waits on the terminal between
+        images.  With ``verify`` the uploads use ``q=1`` (errors only) and a
+        trailing DA1 query; the errors are collected in a single read once
+        its answer arrives, and failed images get ``-1``.  Without it the
+        uploads use ``q=2`` and the terminal is never read.
+        """
+        quiet = 1 if verify else 2
+        ids: list[int] = []
+        pending: dict[bytes, tuple[int, int]] = {}
+        stream: list[bytes | memoryview] = []
+        for png in pngs:
+            digest = payload_digest(png)
+            image_id = self._cache.get(digest)
+            if image_id is None and digest in pending:
+                image_id = pending[digest][0]
+            if image_id is None:
+                image_id = self._cache.allocate_id()
+                pending[digest] = (image_id, len(png))
+                stream += self._frame_transmit(f"a=t,f=100,i={image_id},q={quiet}", png)
+            ids.append(image_id)
+        logger.debug("KittyTransport.init_images: %d images, %d uploaded", len(ids), len(pending))
+        if not pending:
+            return ids
+
+        failed: dict[int, str] = {}
+        with STDOUT_SINK.frame():
+            _write_stdout(stream)
+            if verify:
+                # the DA1 query must reach the terminal after the uploads
+                STDOUT_SINK.flush()
+                resp = osc.query_tty(osc.DA1_REQUEST, more=osc.DA1_REPLY_END, timeout=TIMEOUT_S)
+                if osc.DA1_REPLY_RE.search(resp) is None:
+                    msg = "No response from terminal after pipelined image upload"
+                    raise TransportRuntimeError(msg)
+                failed = KittyChunkParser.parse_error_replies(resp)
+
+        for digest, (image_id, nbytes) in pending.items():
+            if image_id in failed:
+                logger.warning("kitty rejected image %d: %s", image_id, failed[image_id])
+            else:
+                self._remember(digest, image_id, nbytes)
+        return [-1 if image_id in failed else image_id for image_id in ids]
 
     def close(self) -> None:
         """Clear any cached data."""
         self.invalidate_cache()
+        self._last_frame = None
 
 
 class KittyPyTransport(ImageProtocol):
@@ -175,9 +640,7 @@ class KittyPyTransport(ImageProtocol):
     def init_image(self, png_bytes: bytes) -> int:
         img_num = self._next_img
         self._next_img += 1
-        for i in range(0, len(png_bytes), IMAGE_CHUNK_SIZE):
-            KittyChunkParser.send_chunk(img_num, png_bytes[i : i + IMAGE_CHUNK_SIZE])
-        KittyChunkParser.send_chunk(img_num, b"", final=True)
+        _write_stdout(KittyChunkParser.frame_command(f"a=t,f=100,i={img_num},q=2", png_bytes))
         return img_num
 
 
@@ -0,0 +1,93 @@
+"""Out-of-band transmission mediums for the kitty graphics protocol.
+
+A terminal on the same machine can read an image payload from a POSIX
+shared-memory object (``t=s``) or a temporary file (``t=t``), so only the
+object's name travels through the TTY.  The terminal unlinks either one after
+reading it; :func:`discard_payload` exists for the cases where it never does.
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+import tempfile
+from contextlib import suppress
+from multiprocessing import resource_tracker, shared_memory
+
+# Transmission medium keys as used by the protocol's ``t`` control key.
+DIRECT = "d"
+SHARED_MEMORY = "s"
+TEMP_FILE = "t"
+
+# Kitty only deletes temporary files whose path contains this marker.
+_TEMP_MARKER = "tty-graphics-protocol"
+
+_SSH_ENV_VARS = ("SSH_CONNECTION", "SSH_CLIENT", "SSH_TTY")
+
+
+def is_remote_session() -> bool:
+    """Return ``True`` when the terminal is probably on another machine."""
+    return any(os.getenv(var) for var in _SSH_ENV_VARS)
+
+
+def _write_shared_memory(payload: bytes | memoryview) -> str:
+    # macOS limits shared-memory names to 31 characters.
+    name = f"wskr-{secrets.token_hex(6)}"
+    size = max(len(payload), 1)
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size, track=False)  # type: ignore[call-arg]
+    except TypeError:  # Python < 3.13 has no ``track``
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        # The terminal owns (and unlinks) the object from here on.
+        resource_tracker.unregister(f"/{name}", "shared_memory")
+    try:
+        shm.buf[: len(payload)] = payload
+    finally:
+        shm.close()
+    return f"/{name}"
+
+
+def _write_temp_file(payload: bytes | memoryview) -> str:
+    fd, path = tempfile.mkstemp(prefix=f"wskr-{_TEMP_MARKER}-")
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+    return path
+
+
+def stage_payload(medium: str, payload: bytes | memoryview) -> str:
+    """Place ``payload`` where the terminal can read it and return its name.
+
+    Raises :class:`OSError` if the object cannot be created and
+    :class:`ValueError` for an unknown ``medium``.
+    """
+    if medium == SHARED_MEMORY:
+        return _write_shared_memory(payload)
+    if medium == TEMP_FILE:
+        return _write_temp_file(payload)
+    msg = f"Cannot stage a payload for medium {medium!r}"
+    raise ValueError(msg)
+
+
+def discard_payload(medium: str, name: str) -> None:
+    """Remove a staged payload the terminal did not consume."""
+    with suppress(OSError):
+        if medium == SHARED_MEMORY:
+            shm = shared_memory.SharedMemory(name=name.lstrip("/"))
+            shm.close()
+            shm.unlink()
+        elif medium == TEMP_FILE:
+            os.unlink(name)  # noqa: PTH108
+
+
+__all__ = [
+    "DIRECT",
+    "SHARED_MEMORY",
+    "TEMP_FILE",
+    "discard_payload",
+    "is_remote_session",
+    "stage_payload",
+]
@@ -4,8 +4,10 @@ import importlib.metadata
 import logging
 import os
 from dataclasses import dataclass
+from threading import Lock
 
 from wskr.core.errors import TransportInitError, TransportUnavailableError
+from wskr.terminal import detect
 
 from .base import ImageProtocol
 
@@ -21,6 +23,11 @@ class _ProtocolEntry:
 _IMAGE_PROTOCOLS: dict[str, _ProtocolEntry] = {}
 _ENTRYPOINTS_LOADED = False
 
+# Protocols ``"auto"`` may pick, best first, with the support each requires.
+_AUTO_PREFERENCE: tuple[tuple[str, str], ...] = (("kitty", "kitty_graphics"), ("sixel", "sixel"))
+_AUTO_LOCK = Lock()
+_AUTO_CHOICE: str | None = None
+
 
 def register_image_protocol(name: str, cls: type[ImageProtocol], *, enabled: bool = True) -> None:
     """Register an :class:`ImageProtocol` implementation under ``name``.
@@ -44,14 +51,14 @@ def _load_entry_points() -> None:
     _ENTRYPOINTS_LOADED = True
     try:
         eps = importlib.metadata.entry_points(group="wskr.image_protocols")
-    except Exception:  # noqa: BLE001 - defensive guard
+    except Exception:
         logger.debug("protocol entry point discovery failed", exc_info=True)
         return
     for ep in eps:
         try:
             cls = ep.load()
             register_image_protocol(ep.name, cls)
-        except Exception:  # noqa: BLE001 - defensive guard
+        except Exception:
             logger.warning("failed to load protocol %s", ep.name, exc_info=True)
 
 
@@ -67,20 +74,55 @@ def _ensure_builtin_protocols() -> None:
             from .noop import NoOpProtocol  # noqa: PLC0415
 
             register_image_protocol("noop", NoOpProtocol)
-        except Exception:  # noqa: BLE001 - defensive guard
+        except Exception:
             logger.debug("failed to auto-register NoOpProtocol", exc_info=True)
+    # kitty registers itself on import; ``"auto"`` can only pick what is registered
+    if "kitty" not in _IMAGE_PROTOCOLS:
+        try:
+            from . import kitty  # noqa: F401, PLC0415 - imported for its registration
+        except Exception:
+            logger.debug("failed to auto-register KittyTransport", exc_info=True)
+
+
+def _choose_protocol(support: detect.TerminalSupport) -> str:
+    for name, feature in _AUTO_PREFERENCE:
+        entry = _IMAGE_PROTOCOLS.get(name)
+        if entry is not None and entry.enabled and getattr(support, feature):
+            return name
+    return "noop"
+
+
+def detect_image_protocol() -> str:
+    """Return the protocol ``"auto"`` resolves to, probing the terminal once.
+
+    The terminal is asked for kitty graphics, XTVERSION and DA1 (sixel) in a
+    single round trip; the answer is memoized for the rest of the process.
+    """
+    global _AUTO_CHOICE  # noqa: PLW0603
+    with _AUTO_LOCK:
+        if _AUTO_CHOICE is None:
+            _ensure_builtin_protocols()
+            _load_entry_points()
+            support = detect.probe_terminal()
+            _AUTO_CHOICE = _choose_protocol(support)
+            logger.debug("detect_image_protocol: %r from %r", _AUTO_CHOICE, support)
+        return _AUTO_CHOICE
 
 
 def get_image_protocol(name: str | None = None) -> ImageProtocol:
     """Return an initialised protocol instance.
 
-    Resolution order: explicit ``name`` → ``$WSKR_PROTOCOL`` → ``"noop"``.
+    Resolution order: explicit ``name`` → ``$WSKR_PROTOCOL`` → ``"auto"``,
+    which picks the best protocol the terminal supports (see
+    :func:`detect_image_protocol`) and falls back to ``"noop"``.
     Raises :class:`TransportUnavailableError` for unknown/disabled protocols and
     :class:`TransportInitError` if initialisation fails.
     """
     _ensure_builtin_protocols()
     _load_entry_points()
-    key = name or os.getenv("WSKR_PROTOCOL", "noop")
+    key = name or os.getenv("WSKR_PROTOCOL", "auto")
+    if key == "auto":
+        key = detect_image_protocol()
     logger.debug("get_image_protocol: requested=%r", key)
 
     try:
@@ -103,6 +145,7 @@ def get_image_protocol(name: str | None = None) -> ImageProtocol:
 
 
 __all__ = [
+    "detect_image_protocol",
     "get_image_protocol",
     "load_entry_points",
     "register_image_protocol",
@@ -1,33 +1,127 @@
+import logging
 import os
+import struct
 import sys
 from collections.abc import Callable, Iterator
 from contextlib import contextmanager
-from io import BytesIO
+from dataclasses import dataclass
+from threading import RLock
 from typing import Any
+from weakref import WeakSet
 
 import matplotlib as mpl
+import numpy as np
 from matplotlib import _api, interactive, is_interactive  # noqa: PLC2701
 from matplotlib._pylab_helpers import Gcf  # noqa: PLC2701
 from matplotlib.backend_bases import FigureManagerBase, _Backend  # noqa: PLC2701
 from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.transforms import BboxBase
 
+from wskr.core.config import PARTIAL_REDRAW, PIPELINE, TRANSMIT_ASYNC
 from wskr.protocol import ImageProtocol, get_image_protocol
+from wskr.protocol.cache import payload_digest
+from wskr.render.matplotlib.idle import IdleDrawScheduler
+from wskr.render.matplotlib.partial import PartialRedraw, Region, bbox_to_region
 from wskr.render.matplotlib.size import autosize_figure
+from wskr.render.matplotlib.timer import EventLoop, TerminalTimer, run_pending
+from wskr.render.pipeline import FRAME_PIPELINE, FramePipeline, encode_png
+from wskr.render.transmit import TRANSMIT_QUEUE, TransmitQueue
 from wskr.terminal import TerminalCapabilities
+from wskr.terminal.io import tty_session
+
+logger = logging.getLogger(__name__)
 
 if sys.flags.interactive:
     interactive(b=True)
 
 
+@dataclass(slots=True)
+class FrameHistory:
+    """Digest of the last frame a figure manager sent, and frame counters."""
+
+    digest: bytes | None = None
+    sent: int = 0
+    skipped: int = 0
+    redrawn: float = 1.0  # fraction of the canvas rasterized for the last frame
+
+
 def render_figure_to_terminal(
     canvas: FigureCanvasAgg,
     transport: ImageProtocol,
     caps: TerminalCapabilities | None = None,
-) -> None:
+    queue: TransmitQueue | None = None,
+    history: FrameHistory | None = None,
+    *,
+    skip_unchanged: bool = False,
+    partial: PartialRedraw | None = None,
+    pipeline: FramePipeline | None = None,
+) -> bool:
     """Resize and render a Matplotlib figure to the terminal using a given transport.
 
     If ``caps`` is provided, use it to determine the drawable viewport; otherwise
-    ask the transport for the window size.
+    ask the transport for the window size.  Transports that accept raw pixels
+    receive the Agg buffer directly and no PNG is encoded.  With a ``queue``
+    the finished frame is sent from its writer thread and this returns as
+    soon as the figure is rasterized.
+
+    With a ``history`` the rasterized RGBA buffer is hashed and recorded
+    once the frame has been sent; when ``skip_unchanged`` is set and it
+    matches the last frame sent, nothing is encoded or written.  Returns
+    whether a frame was sent (or queued for sending).
+
+    With a ``partial`` only the stale axes are re-rasterized when the layout
+    allows it (see :class:`~wskr.render.matplotlib.partial.PartialRedraw`);
+    ``history.redrawn`` records the fraction of the canvas redrawn.
+
+    With a ``pipeline`` the figure is rasterized here and encoded and sent
+    on the pipeline's threads, overlapping with the next frame; ``queue`` is
+    then not used.
+
+    The terminal is opened once per frame (see
+    :class:`~wskr.terminal.io.TtySession`) for the size queries and the
+    writes made here; queued and pipelined frames open their own session
+    on the thread that sends them.
+    """
+    if pipeline is not None:
+
+        def render() -> tuple[_Frame, Callable[[], None]] | None:
+            with tty_session():
+                frame = _rasterize(canvas, transport, caps, history, partial, skip_unchanged=skip_unchanged)
+            if frame is None:
+                return None
+            rgba, width, height, sent = frame
+            # the canvas reuses its buffer for the next draw
+            return (bytes(rgba), width, height), sent
+
+        return _submit_to_pipeline(pipeline, render, _pipeline_stages(transport, canvas.figure.dpi))
+
+    with tty_session():
+        frame = _rasterize(canvas, transport, caps, history, partial, skip_unchanged=skip_unchanged)
+        if frame is None:
+            return False
+        rgba, _, _, sent = frame
+        _send_frame(canvas, transport, rgba, queue, sent)
+    return True
+
+
+# A rasterized frame handed between pipeline stages: RGBA bytes, width, height.
+_Frame = tuple[bytes, int, int]
+
+
+def _rasterize(
+    canvas: FigureCanvasAgg,
+    transport: ImageProtocol,
+    caps: TerminalCapabilities | None,
+    history: FrameHistory | None,
+    partial: PartialRedraw | None,
+    *,
+    skip_unchanged: bool,
+) -> tuple[memoryview, int, int, Callable[[], None]] | None:
+    """Size and draw the figure; return its RGBA buffer, or ``None`` to skip the frame.
+
+    The buffer comes with the callback recording it in ``history`` once sent
+    (see :func:`_record_frame`).
     """
     if caps is not None:
         width_px, height_px = caps.window_px()
@@ -42,13 +136,268 @@ def render_figure_to_terminal(
 
     autosize_figure(canvas.figure, width_px, height_px)
 
-    buf = BytesIO()
-    canvas.print_png(buf)
-    buf.seek(0)
-    transport.send_image(buf.read())
+    if partial is None:
+        # Like ``print_png``: bypass subclass ``draw`` overrides that re-enter show().
+        FigureCanvasAgg.draw(canvas)
+        redrawn = 1.0
+    else:
+        redrawn = partial.draw(canvas)
+    if history is not None:
+        history.redrawn = redrawn
+    width, height = canvas.get_width_height(physical=True)
+    rgba = memoryview(canvas.buffer_rgba())
+    sent = _record_frame(history, rgba, width, height, skip_unchanged=skip_unchanged)
+    if sent is None:
+        return None
+    return rgba, width, height, sent
+
+
+def _record_frame(
+    history: FrameHistory | None, rgba: memoryview, width: int, height: int, *, skip_unchanged: bool
+) -> Callable[[], None] | None:
+    """Hash ``rgba`` against ``history``; return ``None`` if the frame should be skipped.
+
+    Otherwise return a callback recording the frame in ``history``, to be
+    called once it has been sent.  A frame a queue drops or a failing write
+    loses is therefore never taken for the one on screen.
+    """
+    if history is None:
+        return lambda: None
+    digest = payload_digest(rgba, struct.pack("<II", width, height))
+    if skip_unchanged and digest == history.digest:
+        history.skipped += 1
+        logger.debug("frame unchanged, skipped")
+        return None
+
+    def sent() -> None:
+        history.digest = digest
+        history.sent += 1
+
+    return sent
+
+
+def _submit(
+    canvas: FigureCanvasAgg,
+    queue: TransmitQueue | None,
+    send: Callable[[], None],
+    nbytes: int,
+    sent: Callable[[], None],
+) -> None:
+    """Run ``send`` now, or on ``queue``'s writer thread, and then ``sent``."""
+
+    def send_frame() -> None:
+        with tty_session():
+            send()
+        sent()
+
+    if queue is None:
+        send_frame()
+    else:
+        queue.submit(canvas.figure, send_frame, nbytes)
+
+
+def _send_frame(
+    canvas: FigureCanvasAgg,
+    transport: ImageProtocol,
+    rgba: memoryview,
+    queue: TransmitQueue | None,
+    sent: Callable[[], None],
+) -> None:
+    """Send the whole buffer as raw pixels or as a PNG."""
+    width, height = canvas.get_width_height(physical=True)
+    if transport.supports_pixels:
+        data = rgba if queue is None else bytes(rgba)  # the canvas reuses its buffer for the next draw
+        _submit(
+            canvas, queue, lambda: transport.send_pixels(memoryview(data), width, height), len(data), sent
+        )
+        return
+    # Encode the buffer as drawn; ``print_png`` would rasterize again.
+    png = encode_png(canvas.buffer_rgba(), canvas.figure.dpi)
+    _submit(canvas, queue, lambda: transport.send_image(png), len(png), sent)
+
+
+def _submit_to_pipeline(
+    pipeline: FramePipeline,
+    render: Callable[[], tuple[_Frame, Callable[[], None]] | None],
+    stages: tuple[Callable[[_Frame], Any], Callable[[Any], None]],
+) -> bool:
+    """Submit a frame to ``pipeline``; its ``sent`` callback runs once it is transmitted."""
+    encode, transmit = stages
+    callbacks: list[Callable[[], None]] = []
+
+    def render_frame() -> _Frame | None:
+        result = render()
+        if result is None:
+            return None
+        frame, sent = result
+        callbacks.append(sent)
+        return frame
+
+    def transmit_frame(payload: object) -> None:
+        with tty_session():
+            transmit(payload)
+        (sent,) = callbacks  # ``render_frame`` ran inside ``submit``
+        sent()
+
+    return pipeline.submit(render_frame, encode, transmit_frame) is not None
+
+
+def _pipeline_stages(
+    transport: ImageProtocol, dpi: float, region: Region | None = None
+) -> tuple[Callable[[_Frame], Any], Callable[[Any], None]]:
+    """Return the encode and transmit stages for a :data:`_Frame`.
+
+    Raw-pixel transports compress inside ``send_pixels``, so their encode
+    stage passes the frame through.  With a ``region`` the transport is
+    first asked to patch just that rectangle; the frame then stays raw until
+    the transmit stage, which encodes a PNG only if the patch is refused.
+    """
+    if transport.supports_pixels or region is not None:
+
+        def transmit(frame: _Frame) -> None:
+            data, width, height = frame
+            if region is not None and transport.patch_pixels(memoryview(data), width, height, [region]):
+                return
+            if transport.supports_pixels:
+                transport.send_pixels(memoryview(data), width, height)
+            else:
+                transport.send_image(
+                    encode_png(np.frombuffer(data, dtype=np.uint8).reshape(height, width, 4), dpi)
+                )
+
+        return (lambda frame: frame), transmit
+
+    def encode(frame: _Frame) -> bytes:
+        data, width, height = frame
+        return encode_png(np.frombuffer(data, dtype=np.uint8).reshape(height, width, 4), dpi)
+
+    return encode, transport.send_image
+
+
+def blit_figure_to_terminal(
+    canvas: FigureCanvasAgg,
+    transport: ImageProtocol,
+    bbox: BboxBase | None = None,
+    queue: TransmitQueue | None = None,
+    history: FrameHistory | None = None,
+    pipeline: FramePipeline | None = None,
+) -> bool:
+    """Send the ``bbox`` region of the canvas's Agg buffer as a partial update.
+
+    Nothing is rasterized: blitting code has already restored the background
+    and drawn the moving artists into the buffer.  Transports that can edit
+    the image on screen (:meth:`~wskr.protocol.ImageProtocol.patch_pixels`),
+    whether it was sent as raw pixels or as a PNG, receive just that
+    rectangle; others get the whole buffer, which already holds the region
+    composited over the last full frame.  Frames going
+    through a ``queue`` may be dropped, taking their region with them, so
+    there the transport compares with what it last sent instead.  A
+    ``pipeline`` keeps every frame in order, so the region is sent as is.
+    Returns whether anything was sent.
+    """
+    width, height = canvas.get_width_height(physical=True)
+    region = bbox_to_region(bbox, width, height)
+    if region is None:
+        return False
+    rgba = memoryview(canvas.buffer_rgba())
+    if pipeline is not None:
+
+        def render() -> tuple[_Frame, Callable[[], None]] | None:
+            sent = _record_frame(history, rgba, width, height, skip_unchanged=True)
+            if sent is None:
+                return None
+            return (bytes(rgba), width, height), sent
+
+        return _submit_to_pipeline(pipeline, render, _pipeline_stages(transport, canvas.figure.dpi, region))
+    sent = _record_frame(history, rgba, width, height, skip_unchanged=True)
+    if sent is None:
+        return False
+    _send_region(canvas, transport, rgba, region, queue, sent)
+    return True
+
+
+def _send_region(
+    canvas: FigureCanvasAgg,
+    transport: ImageProtocol,
+    rgba: memoryview,
+    region: Region,
+    queue: TransmitQueue | None,
+    sent: Callable[[], None],
+) -> None:
+    """Patch ``region`` of the image on screen, or send the whole buffer."""
+    width, height = canvas.get_width_height(physical=True)
+    if queue is None:
+        with tty_session():
+            if transport.patch_pixels(rgba, width, height, [region]):
+                sent()
+            else:
+                _send_frame(canvas, transport, rgba, None, sent)
+        return
+    if not transport.supports_pixels:
+        _send_frame(canvas, transport, rgba, queue, sent)
+        return
+
+    def send(frame: memoryview) -> None:
+        if not transport.patch_pixels(frame, width, height):
+            transport.send_pixels(frame, width, height)
+
+    data = bytes(rgba)
+    _submit(canvas, queue, lambda: send(memoryview(data)), len(data), sent)
+
+
+class _TerminalFigureManager(FigureManagerBase):
+    """Shared state and frame sending of the terminal figure managers."""
 
+    def __init__(
+        self,
+        canvas: FigureCanvasAgg,
+        num: int,
+        transport: ImageProtocol,
+        caps: TerminalCapabilities | None = None,
+    ) -> None:
+        super().__init__(canvas, num)
+        self.transport = transport
+        self.caps = caps
+        self.transmit_queue = TRANSMIT_QUEUE if TRANSMIT_ASYNC else None
+        self.frames = FrameHistory()
+        self.partial = PartialRedraw() if PARTIAL_REDRAW else None
+        self.pipeline = FRAME_PIPELINE if PIPELINE else None
+
+    def show(self, *_args: Any, **_kwargs: Any) -> None:
+        idle = getattr(self.canvas, "idle_draws", None)
+        if idle is not None:
+            idle.cancel()  # this frame supersedes a pending idle draw
+        render_figure_to_terminal(
+            self.canvas,
+            self.transport,
+            self.caps,
+            self.transmit_queue,
+            self.frames,
+            partial=self.partial,
+            pipeline=self.pipeline,
+        )
+
+    def refresh(self) -> None:
+        """Send the figure again unless its pixels match the last frame sent."""
+        render_figure_to_terminal(
+            self.canvas,
+            self.transport,
+            self.caps,
+            self.transmit_queue,
+            self.frames,
+            skip_unchanged=True,
+            partial=self.partial,
+            pipeline=self.pipeline,
+        )
 
-class WskrFigureManager(FigureManagerBase):
+    def blit(self, bbox: BboxBase | None = None) -> None:
+        """Send the ``bbox`` region of the canvas as drawn, without rasterizing."""
+        blit_figure_to_terminal(
+            self.canvas, self.transport, bbox, self.transmit_queue, self.frames, pipeline=self.pipeline
+        )
+
+
+class WskrFigureManager(_TerminalFigureManager):
     def __init__(
         self,
         canvas: FigureCanvasAgg,
@@ -56,17 +405,56 @@ class WskrFigureManager(FigureManagerBase):
         transport_factory: Callable[[], ImageProtocol] | None = None,
         caps_factory: Callable[[], TerminalCapabilities] | None = None,
     ) -> None:
-        super().__init__(canvas, num)
         factory = transport_factory or get_image_protocol
-        self.transport = factory()
-        self.caps = caps_factory() if caps_factory is not None else None
-
-    def show(self, *_args: Any, **_kwargs: Any) -> None:
-        render_figure_to_terminal(self.canvas, self.transport, self.caps)
+        caps = caps_factory() if caps_factory is not None else None
+        super().__init__(canvas, num, factory(), caps)
 
 
 class WskrFigureCanvas(FigureCanvasAgg):
     manager_class: Any = _api.classproperty(lambda _: WskrFigureManager)
+    _timer_cls = TerminalTimer
+
+    def __init__(self, figure: Figure | None = None) -> None:
+        super().__init__(figure)
+        # blits and draws may come from other threads; one at a time
+        self._draw_lock = RLock()
+        self.idle_draws = IdleDrawScheduler(self.draw)
+        self._timers: WeakSet[TerminalTimer] = WeakSet()
+        self._event_loop: EventLoop | None = None
+
+    def new_timer(self, *args: Any, **kwargs: Any) -> TerminalTimer:
+        """Create a :class:`~wskr.render.matplotlib.timer.TerminalTimer` bound to this canvas."""
+        timer = super().new_timer(*args, **kwargs)
+        self._timers.add(timer)
+        return timer
+
+    @property
+    def has_running_timers(self) -> bool:
+        """``True`` while a timer made by :meth:`new_timer` (e.g. an animation) is started."""
+        return any(timer.running for timer in list(self._timers))
+
+    def start_event_loop(self, timeout: float = 0, *, until: Callable[[], bool] | None = None) -> None:
+        """Run timer callbacks and deferred draws on this thread.
+
+        Returns after ``timeout`` seconds (forever if ``0``), on
+        :meth:`stop_event_loop`, or once ``until()`` is true.  This is what
+        ``plt.pause`` and a blocking ``plt.show`` spin on.
+        """
+        loop = self._event_loop = EventLoop()
+        try:
+            loop.run(timeout if timeout > 0 else None, until=until)
+        finally:
+            self._event_loop = None
+
+    def stop_event_loop(self) -> None:
+        """Make a running :meth:`start_event_loop` return."""
+        if self._event_loop is not None:
+            self._event_loop.stop()
+
+    def flush_events(self) -> None:
+        """Run due timer callbacks and a pending deferred draw on this thread now."""
+        run_pending()
+        self.idle_draws.flush()
 
     @contextmanager
     def _guard_draw(self) -> Iterator[bool]:
@@ -86,23 +474,57 @@ class WskrFigureCanvas(FigureCanvasAgg):
         finally:
             self._in_draw = False
 
+    def _is_live(self) -> bool:
+        """Whether draws reach the terminal: interactive mode or a running event loop."""
+        return is_interactive() or self._event_loop is not None
+
     def draw(self) -> None:
         """Render the figure and display it if interactive.
 
+        Draws are also displayed while :meth:`start_event_loop` runs, so
+        animations play inside ``plt.pause`` and a blocking ``plt.show``.
         ``_guard_draw`` ensures we do not recurse if ``draw`` is invoked
         again while already active.
         """
-        with self._guard_draw() as do_draw:
+        with self._draw_lock, self._guard_draw() as do_draw:
             if not do_draw:
                 return
+            refresh = getattr(self.manager, "refresh", None)
+            if refresh is not None and self._is_live() and self.figure.get_axes():
+                # the manager rasterizes (only the stale axes when it can) and
+                # skips frames whose pixels did not change
+                refresh()
+                return
             super().draw()
-            if is_interactive() and self.figure.get_axes():
+            if self._is_live() and self.figure.get_axes():
+                # managers without ``refresh`` are simply shown again
                 self.manager.show()
 
-    draw_idle = draw
+    def blit(self, bbox: BboxBase | None = None) -> None:
+        """Send the ``bbox`` region of the buffer to the terminal as a partial update.
 
+        Blitting code restores a saved background and draws only the moving
+        artists (``draw_artist``) before calling this, so the cost of a frame
+        follows those artists rather than the whole figure.  See
+        :func:`blit_figure_to_terminal`; like :meth:`draw`, nothing is sent
+        unless the canvas is live.
+        """
+        blit = getattr(self.manager, "blit", None)
+        if blit is None or not self._is_live():
+            return
+        with self._draw_lock:
+            blit(bbox)
 
-class BaseFigureManager(FigureManagerBase):
+    def draw_idle(self, *_args: Any, **_kwargs: Any) -> None:
+        """Schedule a deferred :meth:`draw`; a burst of calls yields one frame.
+
+        See :class:`~wskr.render.matplotlib.idle.IdleDrawScheduler`;
+        ``idle_draws.stats`` counts requested versus delivered draws.
+        """
+        self.idle_draws.request()
+
+
+class BaseFigureManager(_TerminalFigureManager):
     """Minimal backend manager parameterized by transport class."""
 
     def __init__(
@@ -112,12 +534,7 @@ class BaseFigureManager(FigureManagerBase):
         transport_cls: type[ImageProtocol],
         caps: TerminalCapabilities | None = None,
     ) -> None:
-        super().__init__(canvas, num)
-        self.transport = transport_cls()
-        self.caps = caps
-
-    def show(self, *_args: Any, **_kwargs: Any) -> None:
-        render_figure_to_terminal(self.canvas, self.transport, self.caps)
+        super().__init__(canvas, num, transport_cls(), caps)
 
 
 class TerminalBackend(_Backend):
@@ -132,13 +549,35 @@ class TerminalBackend(_Backend):
             cls.show()
 
     @classmethod
-    def show(cls, *args: Any, **kwargs: Any) -> None:
+    def show(cls, *args: Any, block: bool | None = None, **kwargs: Any) -> None:
+        """Send the active figure to the terminal.
+
+        A blocking show (the default outside interactive mode) keeps running
+        the canvas's timers, so an animation plays until it stops or the
+        user presses Ctrl-C, then waits for the frame to reach the screen
+        and closes all figures.  ``block=False`` only sends the frame.
+        """
         if cls.not_impl_msg is not None:
             raise NotImplementedError(cls.not_impl_msg)
         manager = Gcf.get_active()
-        if manager:
-            manager.show(*args, **kwargs)
-            Gcf.destroy_all()
+        if not manager:
+            return
+        manager.show(*args, **kwargs)
+        if block is None:
+            block = not mpl.is_interactive()
+        if not block:
+            return
+        canvas = getattr(manager, "canvas", None)
+        if getattr(canvas, "has_running_timers", False):
+            try:
+                canvas.start_event_loop(until=lambda: not canvas.has_running_timers)
+            except KeyboardInterrupt:
+                logger.debug("show: interrupted")
+        # a blocking show() returns once the figure is actually on screen
+        for sender in (getattr(manager, "transmit_queue", None), getattr(manager, "pipeline", None)):
+            if sender is not None:
+                sender.flush()
+        Gcf.destroy_all()
 
 
 FigureCanvas = WskrFigureCanvas
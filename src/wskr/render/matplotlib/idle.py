@@ -0,0 +1,142 @@
+"""Deferred, coalesced ``draw_idle`` for the terminal canvas.
+
+Matplotlib calls ``draw_idle`` after every artist change in interactive mode
+(``set_data``, ``set_xlim``, …), so one user action can ask for many frames.
+An :class:`IdleDrawScheduler` turns the first request into a deferred draw
+on the backend's timer scheduler and folds every request made before it
+runs into that same draw.  The delay is at least ``min_interval`` and long
+enough that no more than ``max_fps`` frames are delivered per second.
+
+Figures are not thread-safe, so the deferred draw only ever runs on the
+figure's own thread, from its event loop (``plt.pause``, a blocking
+``plt.show``) or ``flush_events``.  Without a running loop (``plt.ion()`` at
+a prompt, ``show(block=False)``) nothing would run it, so the draw happens
+right away instead.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from threading import Lock, get_ident
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from wskr.core.config import IDLE_DRAW_INTERVAL_S, MAX_FPS
+from wskr.render.matplotlib.timer import SCHEDULER, TimerHandle, event_loop_running
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class IdleDrawStats:
+    """Draws asked for through ``draw_idle`` versus draws actually run."""
+
+    requested: int = 0
+    delivered: int = 0
+
+
+class IdleDrawScheduler:
+    """Run ``draw`` once for any burst of :meth:`request` calls.
+
+    A deferred ``draw`` runs on the ``owner`` thread (the one creating the
+    scheduler by default) while it runs an event loop; when it runs none,
+    :meth:`request` draws at once on the caller's thread.  A request made
+    from another thread while a draw is running schedules the next one, so
+    the last change is never lost; requests raised by the draw itself (stale
+    callbacks fired while rendering) are dropped, otherwise an idle figure
+    would redraw forever.  :meth:`flush` runs a pending draw right away on the caller's
+    thread and :meth:`cancel` drops it (e.g. because a full ``show()`` is
+    about to send the figure anyway).
+    """
+
+    def __init__(
+        self,
+        draw: Callable[[], None],
+        *,
+        min_interval: float = IDLE_DRAW_INTERVAL_S,
+        max_fps: float = MAX_FPS,
+        owner: int | None = None,
+    ) -> None:
+        self._draw = draw
+        self._owner = get_ident() if owner is None else owner
+        self.min_interval = min_interval
+        self.max_fps = max_fps
+        self.stats = IdleDrawStats()
+        self._lock = Lock()
+        self._timer: TimerHandle | None = None
+        self._last_draw = -float("inf")
+        self._drawing: int | None = None  # thread running ``draw``
+
+    @property
+    def pending(self) -> bool:
+        """``True`` while a deferred draw is scheduled."""
+        return self._timer is not None
+
+    def _delay(self, now: float) -> float:
+        delay = self.min_interval
+        if self.max_fps > 0:
+            delay = max(delay, self._last_draw + 1.0 / self.max_fps - now)
+        return max(delay, 0.0)
+
+    def request(self) -> None:
+        """Ask for a draw; calls before the scheduled draw runs are folded into it."""
+        with self._lock:
+            self.stats.requested += 1
+            if self._drawing == get_ident():
+                return
+            if event_loop_running(self._owner):
+                if self._timer is None:
+                    self._timer = SCHEDULER.call_later(
+                        self._delay(monotonic()), self._fire, owner=self._owner
+                    )
+                return
+        # no loop will run a deferred draw; one left over from a loop goes too
+        self.cancel()
+        self._last_draw = monotonic()
+        self._run()
+
+    def _take(self) -> bool:
+        with self._lock:
+            if self._timer is None:
+                return False
+            self._timer.cancel()
+            self._timer = None
+            self._last_draw = monotonic()
+            return True
+
+    def _run(self) -> None:
+        with self._lock:
+            self._drawing = get_ident()
+        try:
+            self._draw()
+        except Exception:
+            logger.exception("IdleDrawScheduler: deferred draw failed")
+        finally:
+            with self._lock:
+                self._drawing = None
+                self.stats.delivered += 1
+
+    def _fire(self) -> None:
+        if self._take():
+            self._run()
+
+    def flush(self) -> bool:
+        """Run a pending draw now; return whether one was pending."""
+        if not self._take():
+            return False
+        self._run()
+        return True
+
+    def cancel(self) -> None:
+        """Drop a pending draw without running it."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+__all__ = ["IdleDrawScheduler", "IdleDrawStats"]
@@ -0,0 +1,239 @@
+"""Redraw only the stale axes of a figure.
+
+Dashboards built from many axes usually change one of them per frame, yet
+``FigureCanvasAgg.draw`` rasterizes every artist.  A :class:`PartialRedraw`
+remembers, from the last full draw, the pixel extent of each axes and the
+figure background (its face patch).  While the layout stays the same and
+only some axes are stale, the background is restored under their old and
+new extents and just those axes are drawn again into the Agg buffer, which
+still holds every clean axes from the previous frame.
+
+Whenever the composite could differ from a full draw, a full draw is made
+instead: a new size or DPI; added, removed or moved axes; a layout engine or
+subfigures; stale figure-level artists; or figure-level artists (suptitle,
+figure legends, ``fig.text``) inside a region to redraw.  Clean axes that a
+region overlaps are redrawn with it.  Partial draws emit no ``draw_event``;
+any full draw made elsewhere (which does) resets the cached state.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+    from matplotlib.artist import Artist
+    from matplotlib.backends.backend_agg import RendererAgg
+    from matplotlib.figure import Figure
+    from matplotlib.transforms import BboxBase
+
+logger = logging.getLogger(__name__)
+
+# ``(x, y, width, height)`` in buffer pixels, rows counted from the top.
+Region = tuple[int, int, int, int]
+
+# Pixels added around each axes' extent to cover antialiased edges.
+PAD_PX = 2
+
+
+def bbox_to_region(bbox: BboxBase | None, width: int, height: int) -> Region | None:
+    """Return the ``(x, y, width, height)`` buffer rectangle covering display ``bbox``.
+
+    Display coordinates start at the bottom left, buffer rows at the top.
+    ``None`` stands for the whole canvas; a bbox outside it gives ``None``.
+    """
+    if bbox is None:
+        return (0, 0, width, height)
+    x0 = max(math.floor(bbox.x0), 0)
+    x1 = min(math.ceil(bbox.x1), width)
+    top = max(height - math.ceil(bbox.y1), 0)
+    bottom = min(height - math.floor(bbox.y0), height)
+    if x1 <= x0 or bottom <= top:
+        return None
+    return (x0, top, x1 - x0, bottom - top)
+
+
+def _overlaps(a: Region, b: Region) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _union(a: Region | None, b: Region | None) -> Region | None:
+    if a is None or b is None:
+        return a or b
+    x0, y0 = min(a[0], b[0]), min(a[1], b[1])
+    x1, y1 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def _figure_artists(figure: Figure) -> list[Artist]:
+    """Children of ``figure`` drawn outside any axes, face patch excluded."""
+    return [a for a in figure.get_children() if a is not figure.patch and not isinstance(a, Axes)]
+
+
+@contextmanager
+def _measuring(figure: Figure) -> Generator[None]:
+    """Undo the stale flags set by measuring text, without triggering a redraw."""
+    callback, figure.stale_callback = figure.stale_callback, None
+    flags = [(ax, ax.stale) for ax in figure.axes]
+    figure_stale = figure.stale
+    try:
+        yield
+    finally:
+        for ax, flag in flags:
+            ax.stale = flag
+        figure.stale = figure_stale
+        figure.stale_callback = callback
+
+
+class PartialRedraw:
+    """Rasterize one canvas, redrawing only its stale axes when that is exact.
+
+    :meth:`draw` returns the fraction of the canvas area rasterized: ``1.0``
+    for a full draw, ``0.0`` when nothing was stale.
+    """
+
+    def __init__(self) -> None:
+        self._layout: tuple[Any, ...] | None = None
+        self._background: np.ndarray | None = None
+        self._extents: dict[Axes, Region | None] = {}
+        self._watched: FigureCanvasAgg | None = None
+
+    def invalidate(self, *_args: Any) -> None:
+        """Forget the last full draw, so the next :meth:`draw` is a full one."""
+        self._layout = None
+
+    def _watch(self, canvas: FigureCanvasAgg) -> None:
+        if self._watched is not canvas:
+            canvas.mpl_connect("draw_event", self.invalidate)
+            self._watched = canvas
+            self._layout = None
+
+    @staticmethod
+    def _layout_key(canvas: FigureCanvasAgg) -> tuple[Any, ...]:
+        figure = canvas.figure
+        return (
+            canvas.get_width_height(physical=True),
+            figure.dpi,
+            tuple((ax, tuple(ax.get_position(original=True).bounds)) for ax in figure.axes),
+            tuple((a, a.get_visible()) for a in _figure_artists(figure)),
+        )
+
+    @staticmethod
+    def _extent(ax: Axes, renderer: RendererAgg, width: int, height: int) -> Region | None:
+        """Return the padded buffer region ``ax`` draws into.
+
+        ``get_tightbbox`` leaves out artists excluded from layout
+        (``set_in_layout(False)``), which are drawn all the same, so they are
+        passed back in as extra artists.
+        """
+        if not ax.get_visible():
+            return None
+        extra = [a for a in ax.get_children() if a.get_visible() and not a.get_in_layout()]
+        bbox = ax.get_tightbbox(renderer, bbox_extra_artists=ax.get_default_bbox_extra_artists() + extra)
+        if bbox is None:
+            return None
+        return bbox_to_region(bbox.padded(PAD_PX), width, height)
+
+    def _full(self, canvas: FigureCanvasAgg) -> float:
+        figure = canvas.figure
+        renderer = canvas.get_renderer()
+        renderer.clear()
+        figure.patch.draw(renderer)
+        self._background = np.array(renderer.buffer_rgba())
+        # Like ``print_png``: bypass subclass ``draw`` overrides that re-enter show().
+        FigureCanvasAgg.draw(canvas)
+        width, height = canvas.get_width_height(physical=True)
+        with _measuring(figure):
+            self._extents = {ax: self._extent(ax, renderer, width, height) for ax in figure.axes}
+        self._layout = self._layout_key(canvas)
+        return 1.0
+
+    def _can_patch(self, canvas: FigureCanvasAgg) -> bool:
+        figure = canvas.figure
+        return (
+            self._layout is not None
+            and figure.get_layout_engine() is None
+            and not figure.subfigs
+            and not figure.patch.stale
+            # hidden artists are never drawn, so they stay stale
+            and not any(a.stale and a.get_visible() for a in _figure_artists(figure))
+            and self._layout == self._layout_key(canvas)
+        )
+
+    def _plan(
+        self, figure: Figure, stale: list[Axes], renderer: RendererAgg, width: int, height: int
+    ) -> dict[Axes, Region | None] | None:
+        """Return the axes to redraw with their new extents, or ``None`` for a full draw."""
+        redraw: dict[Axes, Region | None] = {}
+        regions: list[Region] = []
+        pending = list(stale)
+        while pending:
+            ax = pending.pop()
+            redraw[ax] = self._extent(ax, renderer, width, height)
+            region = _union(self._extents.get(ax), redraw[ax])
+            if region is None:
+                continue
+            regions.append(region)
+            for other in figure.axes:
+                extent = self._extents.get(other)
+                if other not in redraw and other not in pending and extent and _overlaps(extent, region):
+                    pending.append(other)
+        if len(redraw) == len(figure.axes):
+            return None
+        for artist in _figure_artists(figure):
+            if not artist.get_visible():
+                continue
+            extent = bbox_to_region(artist.get_window_extent(renderer), width, height)
+            if extent is not None and any(_overlaps(extent, region) for region in regions):
+                return None
+        return redraw
+
+    def draw(self, canvas: FigureCanvasAgg) -> float:
+        """Bring the canvas's Agg buffer up to date; return the fraction redrawn."""
+        self._watch(canvas)
+        if not self._can_patch(canvas):
+            return self._full(canvas)
+        figure = canvas.figure
+        stale = [ax for ax in figure.axes if ax.stale]
+        if not stale:
+            return 0.0
+        renderer = canvas.get_renderer()
+        width, height = canvas.get_width_height(physical=True)
+        with _measuring(figure):
+            redraw = self._plan(figure, stale, renderer, width, height)
+        if redraw is None or self._background is None:
+            return self._full(canvas)
+
+        buf = np.asarray(renderer.buffer_rgba())
+        mask = np.zeros((height, width), dtype=bool)
+        for ax, extent in redraw.items():
+            region = _union(self._extents.get(ax), extent)
+            if region is not None:
+                x, y, w, h = region
+                buf[y : y + h, x : x + w] = self._background[y : y + h, x : x + w]
+                mask[y : y + h, x : x + w] = True
+        # same order as ``Figure.draw``: by zorder, ties in insertion order
+        for ax in sorted(figure.axes, key=lambda a: a.get_zorder()):
+            if ax in redraw:
+                ax.draw(renderer)
+        self._extents.update(redraw)
+        figure.stale = False
+        fraction = float(mask.mean())
+        logger.debug(
+            "PartialRedraw: redrew %d of %d axes, %.1f%% of the canvas",
+            len(redraw),
+            len(figure.axes),
+            100 * fraction,
+        )
+        return fraction
+
+
+__all__ = ["PAD_PX", "PartialRedraw", "Region", "bbox_to_region"]
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import logging
+import math
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
@@ -24,8 +25,33 @@ class TerminalMetrics:
     zoom: float = 1.0
 
 
+def _inches(px: int, dpi: float) -> float:
+    # Agg truncates ``inches * dpi`` to whole pixels; nudge up when the float
+    # product lands just below ``px``.
+    inches = px / dpi
+    return inches if int(inches * dpi) >= px else math.nextafter(inches, math.inf)
+
+
+def set_size_px(figure: Figure, width_px: int, height_px: int, dpi: float | None = None) -> None:
+    """Size ``figure`` so rasterizing it at ``dpi`` yields exactly ``width_px`` x ``height_px``.
+
+    ``dpi`` defaults to ``figure.dpi``, the resolution the Agg canvas draws at.
+    ``set_size_inches`` marks the figure stale, which in interactive mode
+    asks for another draw, so an unchanged size is left alone.
+    """
+    dpi = figure.dpi if dpi is None else dpi
+    size = (_inches(width_px, dpi), _inches(height_px, dpi))
+    if tuple(figure.get_size_inches()) == size:
+        return
+    figure.set_size_inches(*size)
+
+
 def autosize_figure(figure: Figure, width_px: int, height_px: int) -> None:
-    """Resize ``figure`` to fit within the terminal window."""
+    """Resize ``figure`` to the largest whole-pixel size that fits the window.
+
+    The aspect ratio is kept, and the figure rasterizes at ``figure.dpi`` to
+    exactly the pixels it occupies, so nothing is drawn only to be scaled away.
+    """
     if width_px <= 0 or height_px <= 0:
         logger.warning(
             "autosize_figure: received non-positive dimensions (%d, %d), skipping resize",
@@ -34,18 +60,17 @@ def autosize_figure(figure: Figure, width_px: int, height_px: int) -> None:
         )
         return
 
-    dpi = figure.dpi
     orig_w, orig_h = figure.get_size_inches()
     aspect = orig_h / orig_w if orig_w else 1.0
 
-    if aspect > 1:
-        new_h = height_px / dpi
-        new_w = new_h / aspect
-    else:
-        new_w = width_px / dpi
-        new_h = new_w * aspect
+    new_w = min(float(width_px), height_px / aspect)
+    new_h = new_w * aspect
+    set_size_px(figure, max(round(new_w), 1), max(min(round(new_h), height_px), 1))
+
 
-    figure.set_size_inches(new_w, new_h)
+def cell_box_px(cols: int, rows: int, metrics: TerminalMetrics) -> tuple[int, int]:
+    """Return the pixel size of a ``cols`` x ``rows`` cell box on the measured terminal."""
+    return (round(cols * metrics.w_px / metrics.n_col), round(rows * metrics.h_px / metrics.n_row))
 
 
 def compute_terminal_figure_size(
@@ -0,0 +1,256 @@
+"""Timers and a blocking event loop for the terminal backend.
+
+A terminal has no GUI main loop, so timed work is driven by one scheduler
+thread holding monotonic deadlines.  Figures are not thread-safe, so a
+callback scheduled for an ``owner`` thread is never run by the scheduler:
+when its deadline passes it is queued for that thread and runs once the
+thread spins an :class:`EventLoop` (``canvas.start_event_loop``, e.g. inside
+``plt.pause`` or a blocking ``plt.show``) or calls :func:`run_pending`
+(``canvas.flush_events``).  Callbacks without an owner run on the scheduler
+thread itself.
+
+:class:`TerminalTimer` is the ``TimerBase`` implementation behind
+``canvas.new_timer`` (and therefore ``FuncAnimation``).  Ticks are laid out
+on a fixed grid from the first deadline; when a tick runs late the missed
+grid points are skipped rather than fired back to back, so an animation
+keeps its frame rate without building up lag.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import queue
+from threading import Condition, Lock, Thread, get_ident
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from matplotlib.backend_bases import TimerBase
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A callback scheduled on the :class:`Scheduler`; :meth:`cancel` to drop it.
+
+    ``owner`` is the ident of the thread the callback must run on, or ``None``.
+    """
+
+    __slots__ = ("cancelled", "deadline", "fn", "owner")
+
+    def __init__(self, deadline: float, fn: Callable[[], None], owner: int | None = None) -> None:
+        self.deadline = deadline
+        self.fn = fn
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Prevent the callback from running, even if it is already dispatched."""
+        self.cancelled = True
+
+    def run(self) -> None:
+        """Run the callback unless cancelled; exceptions are logged."""
+        if self.cancelled:
+            return
+        try:
+            self.fn()
+        except Exception:
+            logger.exception("timer callback failed")
+
+
+class EventLoop:
+    """Run the callbacks dispatched to the thread that called :meth:`run`."""
+
+    def __init__(self) -> None:
+        self._thread: int | None = None
+        self._stopped = False
+
+    def stop(self) -> None:
+        """Make :meth:`run` return after the current callback."""
+        self._stopped = True
+        if self._thread is not None:
+            _tasks(self._thread).put(TimerHandle(0.0, lambda: None))  # wake the loop
+
+    def run(self, timeout: float | None = None, *, until: Callable[[], bool] | None = None) -> None:
+        """Run callbacks until :meth:`stop`, ``timeout`` seconds or ``until()`` is true.
+
+        ``until`` is checked after each callback and at least every 50 ms.
+        Callbacks still queued when the loop returns wait for the thread's
+        next loop or :func:`run_pending`.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        thread = self._thread = get_ident()
+        tasks = _tasks(thread)
+        with _LOOPS_LOCK:
+            _RUNNING[thread] = _RUNNING.get(thread, 0) + 1
+        try:
+            while not self._stopped and not (until is not None and until()):
+                wait = 0.05 if until is not None else None
+                if deadline is not None:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    handle = tasks.get(timeout=wait)
+                except queue.Empty:
+                    continue
+                handle.run()
+        finally:
+            with _LOOPS_LOCK:
+                _RUNNING[thread] -= 1
+                if not _RUNNING[thread]:
+                    del _RUNNING[thread]
+
+
+# Callbacks waiting for their owner thread, and the event loops each thread runs.
+_TASKS: dict[int, queue.SimpleQueue[TimerHandle]] = {}
+_RUNNING: dict[int, int] = {}
+_LOOPS_LOCK = Lock()
+
+
+def _tasks(thread: int) -> queue.SimpleQueue[TimerHandle]:
+    with _LOOPS_LOCK:
+        return _TASKS.setdefault(thread, queue.SimpleQueue())
+
+
+def event_loop_running(thread: int | None = None) -> bool:
+    """Return whether ``thread`` (the caller by default) is running an :class:`EventLoop`."""
+    with _LOOPS_LOCK:
+        return _RUNNING.get(get_ident() if thread is None else thread, 0) > 0
+
+
+def run_pending() -> int:
+    """Run the callbacks already queued for the calling thread; return how many ran."""
+    tasks = _tasks(get_ident())
+    ran = 0
+    for _ in range(tasks.qsize()):
+        try:
+            handle = tasks.get_nowait()
+        except queue.Empty:
+            break
+        handle.run()
+        ran += 1
+    return ran
+
+
+def dispatch(handle: TimerHandle) -> None:
+    """Queue ``handle`` for its owner thread, or run it right here if it has none."""
+    if handle.owner is None:
+        handle.run()
+    else:
+        _tasks(handle.owner).put(handle)
+
+
+class Scheduler:
+    """One daemon thread firing :class:`TimerHandle` callbacks at monotonic deadlines."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._seq = itertools.count()
+        self._cond = Condition(Lock())
+        self._thread: Thread | None = None
+
+    def call_at(self, deadline: float, fn: Callable[[], None], *, owner: int | None = None) -> TimerHandle:
+        """Run ``fn`` once :func:`time.monotonic` reaches ``deadline``, on ``owner`` if given."""
+        handle = TimerHandle(deadline, fn, owner)
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, next(self._seq), handle))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="wskr-timers", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return handle
+
+    def call_later(self, delay: float, fn: Callable[[], None], *, owner: int | None = None) -> TimerHandle:
+        """Run ``fn`` after ``delay`` seconds, on ``owner`` if given."""
+        return self.call_at(monotonic() + max(delay, 0.0), fn, owner=owner)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if self._heap:
+                        wait = self._heap[0][0] - monotonic()
+                        if wait <= 0:
+                            _, _, handle = heapq.heappop(self._heap)
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            dispatch(handle)
+
+
+# Shared by every timer and deferred draw of the terminal backend.
+SCHEDULER = Scheduler()
+
+
+class TerminalTimer(TimerBase):
+    """``TimerBase`` driven by :data:`SCHEDULER` with drift-free, frame-skipping ticks.
+
+    Ticks run on the thread that created the timer, while it runs an
+    :class:`EventLoop` or calls :func:`run_pending`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._owner = get_ident()
+        self._handle: TimerHandle | None = None
+        self._deadline = 0.0
+        self.skipped = 0  # ticks dropped because the previous one ran late
+        super().__init__(*args, **kwargs)
+
+    @property
+    def running(self) -> bool:
+        """``True`` between :meth:`start` and :meth:`stop`."""
+        return self._handle is not None
+
+    def _timer_start(self) -> None:
+        self._timer_stop()
+        self._deadline = monotonic() + self._interval / 1000
+        self._handle = SCHEDULER.call_at(self._deadline, self._tick, owner=self._owner)
+
+    def _timer_stop(self) -> None:
+        handle, self._handle = getattr(self, "_handle", None), None
+        if handle is not None:
+            handle.cancel()
+
+    def _timer_set_interval(self) -> None:
+        if getattr(self, "_handle", None) is not None:
+            self._timer_start()
+
+    def _tick(self) -> None:
+        handle = self._handle
+        if handle is None:
+            return
+        if self._single:
+            self._handle = None
+        self._on_timer()
+        if self._single or self._handle is not handle:
+            return  # single shot, stopped or restarted by a callback
+        interval = self._interval / 1000
+        nxt = self._deadline + interval
+        late = monotonic() - nxt
+        if late >= 0:
+            missed = int(late // interval) + 1
+            self.skipped += missed
+            nxt += missed * interval
+        self._deadline = nxt
+        self._handle = SCHEDULER.call_at(nxt, self._tick, owner=self._owner)
+
+
+__all__ = [
+    "SCHEDULER",
+    "EventLoop",
+    "Scheduler",
+    "TerminalTimer",
+    "TimerHandle",
+    "dispatch",
+    "event_loop_running",
+    "run_pending",
+]
@@ -13,7 +13,8 @@ import re
 from typing import TYPE_CHECKING, Protocol
 
 from wskr.core.config import OSC_TIMEOUT_S
-from wskr.terminal.osc import query_tty
+from wskr.terminal.osc import query_many
+from wskr.terminal.probes import PROBES
 
 try:
     import darkdetect  # type: ignore[import-not-found]
@@ -33,6 +34,7 @@ _LUMINANCE_THRESHOLD = 0.5
 # OSC sequence to query the terminal's background color.
 _OSC_BG_QUERY = b"\033]11;?\007"
 _OSC_BG_RESP_RE = re.compile(rb"\]11;rgb:([0-9A-Fa-f]{4})/([0-9A-Fa-f]{4})/([0-9A-Fa-f]{4})")
+_OSC_BG_REPLY_RE = re.compile(rb"\x1b\]11;[^\x07\x1b]*(?:\x07|\x1b\\)?")
 
 
 class DarkModeStrategy(Protocol):
@@ -61,14 +63,14 @@ class OscQueryStrategy:
         self._timeout = timeout if timeout is not None else OSC_TIMEOUT_S
 
     def detect(self) -> bool:
-        resp = query_tty(
-            _OSC_BG_QUERY,
-            more=lambda data: not data.endswith(b"\007"),
-            timeout=self._timeout,
-        )
-        if not resp:
+        return PROBES.cached("dark_mode", self._query, valid=lambda value: isinstance(value, bool))
+
+    def _query(self) -> bool:
+        (reply,) = query_many([(_OSC_BG_QUERY, _OSC_BG_REPLY_RE)], timeout=self._timeout)
+        if reply is None:
             msg = "No ANSI background-color response"
             raise RuntimeError(msg)
+        resp = reply.group()
         m = _OSC_BG_RESP_RE.search(resp)
         if not m:
             msg = f"Unexpected response: {resp!r}"
@@ -0,0 +1,232 @@
+"""Render, encode and transmit frames on overlapping threads.
+
+Rasterizing with Agg, compressing a PNG and writing it to the TTY each spend
+much of their time outside the GIL, so a stream of frames can overlap them:
+while frame N is written, frame N+1 is encoded and frame N+2 drawn.  A
+:class:`FramePipeline` runs the render stage on the calling thread (the one
+that owns the figure) and the encode and transmit stages on one worker
+thread each, connected by bounded queues.
+
+Unlike :class:`~wskr.render.transmit.TransmitQueue` no frame is dropped or
+reordered.  When a stage falls behind, :meth:`FramePipeline.submit` blocks
+until a slot frees up, so memory stays bounded and the producer slows to the
+pace of the terminal.  Time spent in each stage, and waiting for a slot, is
+kept in :attr:`FramePipeline.stats`.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from io import BytesIO
+from threading import Condition, Thread
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from matplotlib.image import imsave
+
+from wskr.core.config import PIPELINE_DEPTH
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_F = TypeVar("_F")
+_P = TypeVar("_P")
+_R = TypeVar("_R")
+
+# Queue item telling a worker to exit.
+_STOP = object()
+
+
+def encode_png(rgba: np.ndarray | memoryview, dpi: float | None = None) -> bytes:
+    """Encode an ``(height, width, 4)`` RGBA buffer as PNG."""
+    buf = BytesIO()
+    kwargs = {} if dpi is None else {"dpi": dpi}
+    imsave(buf, rgba, format="png", origin="upper", **kwargs)
+    return buf.getvalue()
+
+
+@dataclass(slots=True)
+class StageStats:
+    """Frames through one pipeline stage and the time spent on them."""
+
+    frames: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+    @property
+    def mean_s(self) -> float:
+        """Average seconds per frame."""
+        return self.total_s / self.frames if self.frames else 0.0
+
+    def add(self, elapsed: float) -> None:
+        """Record one frame that took ``elapsed`` seconds."""
+        self.frames += 1
+        self.total_s += elapsed
+        self.max_s = max(self.max_s, elapsed)
+
+
+@dataclass(slots=True)
+class PipelineStats:
+    """Per-stage timings of a :class:`FramePipeline`."""
+
+    render: StageStats = field(default_factory=StageStats)
+    encode: StageStats = field(default_factory=StageStats)
+    transmit: StageStats = field(default_factory=StageStats)
+    blocked_s: float = 0.0  # time submit() waited for a free slot (backpressure)
+    skipped: int = 0  # frames whose render stage returned ``None``
+    failed: int = 0
+
+
+class FramePipeline:
+    """Three-stage render -> encode -> transmit pipeline with backpressure.
+
+    :meth:`submit` takes one callable per stage.  ``render()`` runs at once
+    on the caller's thread; its result goes to ``encode`` on the encoder
+    thread and that result to ``transmit`` on the transmitter thread, in
+    submission order.  At most ``depth`` frames wait before each worker.
+    Call :meth:`flush` where every frame must be on screen.  Exceptions
+    from ``encode`` and ``transmit`` are logged, counted and set on the
+    frame's future; they never reach the producer.
+    """
+
+    def __init__(self, *, depth: int = PIPELINE_DEPTH) -> None:
+        if depth < 1:
+            msg = f"pipeline depth must be at least 1, got {depth}"
+            raise ValueError(msg)
+        self.depth = depth
+        self.stats = PipelineStats()
+        self._encode_q: queue.Queue[Any] = queue.Queue(maxsize=depth)
+        self._transmit_q: queue.Queue[Any] = queue.Queue(maxsize=depth)
+        self._cond = Condition()
+        self._inflight = 0
+        self._closed = False
+        self._threads: list[Thread] = []
+
+    @property
+    def inflight(self) -> int:
+        """Frames submitted but not yet transmitted."""
+        return self._inflight
+
+    def submit(
+        self,
+        render: Callable[[], _F | None],
+        encode: Callable[[_F], _P],
+        transmit: Callable[[_P], _R],
+    ) -> Future[_R] | None:
+        """Render a frame here and queue it for encoding and transmission.
+
+        Return a future for ``transmit``'s result, or ``None`` when
+        ``render`` returned ``None`` (nothing to send).  Exceptions from
+        ``render`` propagate.  Blocks while ``depth`` frames wait to be
+        encoded.
+        """
+        with self._cond:
+            if self._closed:
+                msg = "FramePipeline is closed"
+                raise RuntimeError(msg)
+        start = perf_counter()
+        frame = render()
+        elapsed = perf_counter() - start
+        with self._cond:
+            self.stats.render.add(elapsed)
+            if frame is None:
+                self.stats.skipped += 1
+                return None
+            self._inflight += 1
+            self._ensure_threads()
+        future: Future[_R] = Future()
+        start = perf_counter()
+        self._encode_q.put((frame, encode, transmit, future))
+        blocked = perf_counter() - start
+        with self._cond:
+            self.stats.blocked_s += blocked
+        return future
+
+    def _ensure_threads(self) -> None:
+        if self._threads:
+            return
+        self._threads = [
+            Thread(target=self._encode_loop, name="wskr-pipeline-encode", daemon=True),
+            Thread(target=self._transmit_loop, name="wskr-pipeline-transmit", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.close)
+
+    def _finish(self, future: Future[Any], stage: StageStats, start: float, result: object = None) -> None:
+        with self._cond:
+            stage.add(perf_counter() - start)
+            self._inflight -= 1
+            self._cond.notify_all()
+        future.set_result(result)
+
+    def _fail(self, future: Future[Any], exc: Exception, stage: str) -> None:
+        logger.error("FramePipeline: %s a frame failed", stage, exc_info=exc)
+        with self._cond:
+            self.stats.failed += 1
+            self._inflight -= 1
+            self._cond.notify_all()
+        future.set_exception(exc)
+
+    def _encode_loop(self) -> None:
+        while True:
+            item = self._encode_q.get()
+            if item is _STOP:
+                self._transmit_q.put(_STOP)
+                return
+            frame, encode, transmit, future = item
+            start = perf_counter()
+            try:
+                payload = encode(frame)
+            except Exception as exc:  # noqa: BLE001 - reported through the future
+                self._fail(future, exc, "encoding")
+                continue
+            with self._cond:
+                self.stats.encode.add(perf_counter() - start)
+            self._transmit_q.put((payload, transmit, future))
+
+    def _transmit_loop(self) -> None:
+        while True:
+            item = self._transmit_q.get()
+            if item is _STOP:
+                return
+            payload, transmit, future = item
+            start = perf_counter()
+            try:
+                result = transmit(payload)
+            except Exception as exc:  # noqa: BLE001 - reported through the future
+                self._fail(future, exc, "transmitting")
+                continue
+            self._finish(future, self.stats.transmit, start, result)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every submitted frame is transmitted; return ``False`` on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._inflight == 0, timeout)
+
+    def close(self) -> None:
+        """Finish the queued frames, then stop the worker threads."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            threads = self._threads
+        if threads:
+            self._encode_q.put(_STOP)
+            for thread in threads:
+                thread.join()
+
+
+# Shared by the Matplotlib backends when ``WSKR_PIPELINE`` is enabled.
+FRAME_PIPELINE = FramePipeline()
+
+
+__all__ = ["FRAME_PIPELINE", "FramePipeline", "PipelineStats", "StageStats", "encode_png"]
@@ -1,6 +1,8 @@
 # ruff: noqa: PLW3201
+from collections.abc import Sequence
 from io import BytesIO
 from pathlib import Path
+from typing import Self
 
 from rich.console import Console, ConsoleOptions, RenderResult
 from rich.measure import Measurement
@@ -16,6 +18,22 @@ _rcd_path = Path(__file__).with_name("rcd.txt")
 RCD: str = _rcd_path.read_text(encoding="utf-8")
 
 
+def _id_color(image_id: int) -> str:
+    """SGR sequence selecting ``image_id`` as a 24-bit foreground color.
+
+    Unicode placeholders name their image through the foreground color; the
+    256-color form would only reach IDs up to 255.
+    """
+    return f"\x1b[38;2;{(image_id >> 16) & 0xFF};{(image_id >> 8) & 0xFF};{image_id & 0xFF}m"
+
+
+def _read_png(image_path: str | BytesIO) -> bytes:
+    if isinstance(image_path, BytesIO):
+        image_path.seek(0)
+        return image_path.read()
+    return Path(image_path).read_bytes()
+
+
 class RichImage:
     """Rich renderable: upload PNG once (init_image) then paint it cell-by-cell."""
 
@@ -29,23 +47,46 @@ class RichImage:
         desired_width: int,
         desired_height: int,
         transport: ImageProtocol | None = None,
+        *,
+        image_id: int | None = None,
     ):
         self.desired_width = desired_width
         self.desired_height = desired_height
         self.transport = transport or get_image_protocol()
+        self._png = _read_png(image_path)
 
-        if isinstance(image_path, BytesIO):
-            image_path.seek(0)
-            png = image_path.read()
+        if image_id is not None:
+            self.image_id = image_id
         else:
-            png = Path(image_path).read_bytes()
-        self._png = png
+            try:
+                self.image_id = self.transport.init_image(self._png)
+            except RuntimeError:
+                self.image_id = -1
+        self._fallback_sent = False
 
+    @classmethod
+    def batch(
+        cls,
+        image_paths: Sequence[str | BytesIO],
+        desired_width: int,
+        desired_height: int,
+        transport: ImageProtocol | None = None,
+    ) -> list[Self]:
+        """Create one renderable per image, uploading them all in a single batch.
+
+        Uses :meth:`ImageProtocol.init_images`, which lets the kitty transport
+        pipeline the uploads instead of waiting for a reply after each one.
+        """
+        transport = transport or get_image_protocol()
+        pngs = [_read_png(path) for path in image_paths]
         try:
-            self.image_id = self.transport.init_image(png)
+            ids = transport.init_images(pngs)
         except RuntimeError:
-            self.image_id = -1
-        self._fallback_sent = False
+            ids = [-1] * len(pngs)
+        return [
+            cls(BytesIO(png), desired_width, desired_height, transport, image_id=image_id)
+            for png, image_id in zip(pngs, ids, strict=True)
+        ]
 
     def __rich_measure__(self, console: Console, options: ConsoleOptions) -> Measurement:  # noqa: D105
         return Measurement(self.desired_width, self.desired_width)
@@ -57,8 +98,8 @@ class RichImage:
             return
 
         # paint each row with the kitty color trick
+        esc = _id_color(self.image_id)
         for row in range(self.desired_height):
-            esc = f"\x1b[38;5;{self.image_id}m"
             line = (
                 esc
                 + "".join(f"\U0010eeee{RCD[row]}{RCD[col]}" for col in range(self.desired_width))
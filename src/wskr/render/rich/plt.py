@@ -1,40 +1,38 @@
 from __future__ import annotations
 
-import array
-import fcntl
-import sys
-import termios
-from functools import lru_cache
+import logging
 from io import BytesIO
 from typing import TYPE_CHECKING
 
 import numpy as np
 from rich.measure import Measurement
 
-from wskr.render.matplotlib.size import TerminalMetrics, compute_terminal_figure_size
+from wskr.core.config import OVERSAMPLE
+from wskr.render.matplotlib.size import TerminalMetrics, cell_box_px, set_size_px
+from wskr.render.pipeline import encode_png
 from wskr.render.rich.img import RichImage
+from wskr.terminal.geometry import FALLBACK_GEOMETRY, get_geometry
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+
     import matplotlib.pyplot as plt
     from rich.console import Console, ConsoleOptions, RenderResult
 
-rng = np.random.default_rng()
-
+    from wskr.render.pipeline import FramePipeline
 
-dpi_macbook_pro_13in_m2_2022 = 227
-dpi_external_monitors_195 = 137
+logger = logging.getLogger(__name__)
 
 
-@lru_cache(maxsize=1)
 def get_terminal_size() -> tuple[float, float, int, int]:
-    """Determine the pixel dimensions of each character cell in the terminal."""
-    buf = array.array("H", [0, 0, 0, 0])
-    try:
-        fcntl.ioctl(sys.stdout.fileno(), termios.TIOCGWINSZ, buf)
-    except OSError:
-        return (8, 16, 80, 24)
-    n_row, n_col, w_px, h_px = buf
-    return w_px, h_px, n_col, n_row
+    """Return ``(width_px, height_px, n_col, n_row)`` of the terminal window.
+
+    The shared geometry provider caches the answer until the next resize.
+    """
+    geom = get_geometry()
+    if geom is None or not geom.has_pixels:
+        geom = FALLBACK_GEOMETRY
+    return geom.width_px, geom.height_px, geom.cols, geom.rows
 
 
 class RichPlot:
@@ -46,20 +44,44 @@ class RichPlot:
         desired_width: int | None = None,
         desired_height: int | None = None,
         zoom: float = 1.0,
-        dpi: int = 100,
+        dpi: float | None = None,
+        oversample: float | None = None,
+        pipeline: FramePipeline | None = None,
     ):
         """
         Initialize Renderable.
 
+        The figure is rasterized at exactly the pixel size of its cell box on
+        the measured terminal, times ``oversample``.  ``dpi`` (default
+        ``figure.dpi``) and ``zoom`` only set how large text and lines are
+        relative to that box.
+
+        With a ``pipeline``, :meth:`submit` renders the figure and leaves
+        encoding and uploading to the pipeline's threads.
+
         :param figure: Matplotlib Figure object.
         :param desired_width: Desired width in characters (cells).
         :param desired_height: Desired height in characters (cells).
+        :param zoom: Scale of the figure's contents within the box.
+        :param dpi: Nominal resolution the figure is laid out at.
+        :param oversample: Pixels rendered per displayed pixel (default ``WSKR_OVERSAMPLE``).
+        :param pipeline: Frame pipeline used by :meth:`submit`.
         """
         self.figure = figure
         self.desired_width = desired_width
         self.desired_height = desired_height
         self.zoom = zoom
-        self.dpi = dpi
+        self.dpi = figure.dpi if dpi is None else dpi
+        self.oversample = OVERSAMPLE if oversample is None else oversample
+        self.pipeline = pipeline
+        # ``(cols, rows, width_px, height_px)`` the plot was last printed at
+        self._box: tuple[int, int, int, int] | None = None
+        self._frame: tuple[tuple[int, int, int, int], Future[RichImage]] | None = None
+
+    @property
+    def render_dpi(self) -> float:
+        """Resolution the figure is rasterized at."""
+        return self.dpi * self.zoom * self.oversample
 
     def _adapt_size(self, console: Console, options: ConsoleOptions) -> tuple[int, int]:
         if self.desired_width is None:
@@ -83,12 +105,57 @@ class RichPlot:
         self.figure.savefig(
             buf,
             format="PNG",
-            dpi=self.dpi * self.zoom,
+            dpi=self.render_dpi,
             transparent=True,
         )
         buf.seek(0)
         return buf
 
+    def _render_rgba(self, width_px: int, height_px: int) -> tuple[bytes, int, int]:
+        """Rasterize the figure at ``width_px`` x ``height_px`` to raw RGBA."""
+        set_size_px(self.figure, width_px, height_px, self.render_dpi)
+        buf = BytesIO()
+        self.figure.savefig(buf, format="rgba", dpi=self.render_dpi, transparent=True)
+        return buf.getvalue(), width_px, height_px
+
+    def _encode(self, frame: tuple[bytes, int, int]) -> bytes:
+        data, width_px, height_px = frame
+        return encode_png(
+            np.frombuffer(data, dtype=np.uint8).reshape(height_px, width_px, 4), self.render_dpi
+        )
+
+    def submit(self) -> bool:
+        """Render the figure now; encode and upload it on the pipeline's threads.
+
+        The next time the plot is printed at the same size it shows this
+        frame instead of rendering again, so in a ``Live`` loop the encoding
+        and upload of one frame overlap with computing the next.  Returns
+        ``False`` and does nothing without a pipeline, or before the plot has
+        been printed once (its cell box is not known until then).
+        """
+        if self.pipeline is None or self._box is None:
+            return False
+        box = self._box
+        cols, rows, width_px, height_px = box
+        future = self.pipeline.submit(
+            lambda: self._render_rgba(width_px, height_px),
+            self._encode,
+            lambda png: RichImage(BytesIO(png), desired_width=cols, desired_height=rows),
+        )
+        if future is not None:
+            self._frame = (box, future)
+        return True
+
+    def _submitted_image(self, box: tuple[int, int, int, int]) -> RichImage | None:
+        frame, self._frame = self._frame, None
+        if frame is None or frame[0] != box:
+            return None
+        try:
+            return frame[1].result()
+        except Exception:  # the pipeline logged it; render synchronously instead
+            logger.debug("RichPlot: submitted frame failed", exc_info=True)
+            return None
+
     def __rich_measure__(self, console: Console, options: ConsoleOptions) -> Measurement:  # noqa: PLW3201
         """Measure the width needed for the figure."""
         desired_width, _desired_height = self._adapt_size(console, options)
@@ -103,10 +170,17 @@ class RichPlot:
         desired_width, desired_height = self._adapt_size(console, options)
 
         metrics = TerminalMetrics(w_px, h_px, n_col, n_row, self.dpi, self.zoom)
-        w_in, h_in = compute_terminal_figure_size(desired_width, desired_height, metrics)
-        self.figure.set_size_inches(w_in, h_in)
-
-        img = RichImage(
-            image_path=self._render_to_buffer(), desired_width=desired_width, desired_height=desired_height
-        )
+        box_w, box_h = cell_box_px(desired_width, desired_height, metrics)
+        width_px = max(round(box_w * self.oversample), 1)
+        height_px = max(round(box_h * self.oversample), 1)
+        self._box = box = (desired_width, desired_height, width_px, height_px)
+
+        img = self._submitted_image(box)
+        if img is None:
+            set_size_px(self.figure, width_px, height_px, self.render_dpi)
+            img = RichImage(
+                image_path=self._render_to_buffer(),
+                desired_width=desired_width,
+                desired_height=desired_height,
+            )
         yield from img.__rich_console__(console, options)
@@ -0,0 +1,134 @@
+"""Background transmission of rendered frames, newest frame first.
+
+Writing an image to a slow PTY or SSH link can take far longer than drawing
+it.  A :class:`TransmitQueue` lets the drawing thread hand a finished frame
+over and return at once; a single writer thread (there is one terminal)
+sends frames in submission order.  Each key (normally a figure) has at most
+one frame waiting: a newer frame replaces one that has not started sending,
+and when the waiting frames exceed ``max_bytes`` the oldest are dropped, so
+the producer never blocks on the terminal.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Condition, Thread
+from typing import TYPE_CHECKING
+
+from wskr.core.config import TRANSMIT_MAX_BYTES
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class TransmitStats:
+    """Frames handled by a :class:`TransmitQueue`."""
+
+    submitted: int = 0
+    sent: int = 0
+    dropped: int = 0
+    failed: int = 0
+
+
+class TransmitQueue:
+    """Send frames from a writer thread, dropping superseded ones.
+
+    ``submit(key, send, nbytes)`` queues ``send`` (a callable doing the
+    actual transport call) under ``key``.  Call :meth:`flush` where every
+    queued frame must be on screen, e.g. before a blocking ``show()``
+    returns.  Exceptions raised by ``send`` are logged and counted; they
+    never reach the producer.
+    """
+
+    def __init__(self, *, max_bytes: int = TRANSMIT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.stats = TransmitStats()
+        self._pending: OrderedDict[Hashable, tuple[Callable[[], None], int]] = OrderedDict()
+        self._pending_bytes = 0
+        self._busy = False
+        self._closed = False
+        self._cond = Condition()
+        self._thread: Thread | None = None
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes of the frames waiting to be sent."""
+        return self._pending_bytes
+
+    def submit(self, key: Hashable, send: Callable[[], None], nbytes: int = 0) -> None:
+        """Queue ``send`` as the newest frame for ``key``, replacing any waiting one."""
+        with self._cond:
+            if self._closed:
+                msg = "TransmitQueue is closed"
+                raise RuntimeError(msg)
+            self.stats.submitted += 1
+            old = self._pending.pop(key, None)
+            if old is not None:
+                self._pending_bytes -= old[1]
+                self.stats.dropped += 1
+            while self._pending and self._pending_bytes + nbytes > self.max_bytes:
+                _, (_, old_bytes) = self._pending.popitem(last=False)
+                self._pending_bytes -= old_bytes
+                self.stats.dropped += 1
+            self._pending[key] = (send, nbytes)
+            self._pending_bytes += nbytes
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="wskr-transmit", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                _, (send, nbytes) = self._pending.popitem(last=False)
+                self._pending_bytes -= nbytes
+                self._busy = True
+            try:
+                send()
+            except Exception:
+                logger.exception("TransmitQueue: sending a frame failed")
+                failed = True
+            else:
+                failed = False
+            with self._cond:
+                self._busy = False
+                if failed:
+                    self.stats.failed += 1
+                else:
+                    self.stats.sent += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued frame has been sent; return ``False`` on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self) -> None:
+        """Send what is queued, then stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+
+# Shared by the Matplotlib backends when ``WSKR_TRANSMIT_ASYNC`` is enabled.
+TRANSMIT_QUEUE = TransmitQueue()
+
+
+__all__ = ["TRANSMIT_QUEUE", "TransmitQueue", "TransmitStats"]
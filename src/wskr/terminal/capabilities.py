@@ -4,9 +4,11 @@ import os
 import re
 from typing import Protocol
 
-from wskr.terminal.osc import query_tty
+from wskr.terminal.osc import query_many
+from wskr.terminal.probes import PROBES
 
 _OSC_BG_QUERY = b"\033]11;?\007"
+_OSC_BG_REPLY_RE = re.compile(rb"\x1b\]11;[^\x07\x1b]*(?:\x07|\x1b\\)?")
 _OSC_BG_RESP_RE = re.compile(rb"\]11;rgb:([0-9A-Fa-f]{4})/([0-9A-Fa-f]{4})/([0-9A-Fa-f]{4})")
 _ENV_BG_THRESHOLD = 8
 
@@ -26,10 +28,17 @@ def _env_is_dark() -> bool:
 
 
 def _osc_is_dark(timeout: float | None = None) -> bool:
-    resp = query_tty(_OSC_BG_QUERY, more=lambda data: not data.endswith(b"\007"), timeout=timeout)
-    if not resp:
+    return PROBES.cached(
+        "dark_mode", lambda: _query_osc_is_dark(timeout), valid=lambda value: isinstance(value, bool)
+    )
+
+
+def _query_osc_is_dark(timeout: float | None) -> bool:
+    (reply,) = query_many([(_OSC_BG_QUERY, _OSC_BG_REPLY_RE)], timeout=timeout)
+    if reply is None:
         msg = "No ANSI background-color response"
         raise RuntimeError(msg)
+    resp = reply.group()
     m = _OSC_BG_RESP_RE.search(resp)
     if not m:
         msg = f"Unexpected response: {resp!r}"
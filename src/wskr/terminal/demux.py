@@ -0,0 +1,297 @@
+"""Background reader that routes terminal replies to concurrent queries.
+
+Without it every query holds the TTY lock from the request until its reply
+(or the timeout), so two threads asking the terminal something run one after
+the other, and a reply that arrives after its query gave up is left in the
+input buffer for the next, unrelated query to trip over.
+
+While a :class:`ReplyDemux` is running it owns terminal input: a thread reads
+the TTY, splits the byte stream into complete sequences (APC ``_G`` replies,
+OSC 11/21 colors, CSI reports, ...) and hands each one to the oldest waiting
+query that wants it.  Writing a request only takes the TTY lock for the write
+itself, so many queries can be in flight at once.  Sequences nobody waits for
+(late kitty acks, typed keys) are consumed and counted in
+:attr:`ReplyDemux.stray`, or passed to ``on_unclaimed``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import termios
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import ExitStack, suppress
+from dataclasses import dataclass, field
+from select import select
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Self
+
+from wskr.core.config import TIMEOUT_S
+from wskr.terminal.io import READ_SIZE, MorePredicate, _get_tty_fd, tty_attributes, write_tty
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+# One complete sequence: an APC/DCS/OSC string up to its BEL or ST, a CSI
+# sequence up to its final byte, any other two-byte escape, or a run of text.
+# A lone or unfinished escape at the end of the buffer does not match yet.
+_SEQUENCE_RE = re.compile(
+    rb"\x1b[_P\]].*?(?:\x07|\x1b\\)"
+    rb"|\x1b\[[\x30-\x3f]*[\x20-\x2f]*[\x40-\x7e]"
+    rb"|\x1b[^_P\]\[]"
+    rb"|[^\x1b]+",
+    re.DOTALL,
+)
+
+# An unterminated escape string longer than this is garbage, not a reply
+# still arriving; its first byte is dropped so parsing can resynchronize.
+_MAX_PARTIAL = 1 << 16
+
+
+def split_sequences(data: bytes | bytearray) -> tuple[list[bytes], int]:
+    """Split ``data`` into complete sequences; return them and the bytes consumed."""
+    sequences: list[bytes] = []
+    pos = 0
+    while pos < len(data):
+        m = _SEQUENCE_RE.match(data, pos)
+        if m is None:
+            if len(data) - pos <= _MAX_PARTIAL:
+                break
+            sequences.append(bytes(data[pos : pos + 1]))
+            pos += 1
+            continue
+        sequences.append(m.group())
+        pos = m.end()
+    return sequences, pos
+
+
+@dataclass(slots=True, eq=False)
+class _Waiter:
+    """One outstanding reply.
+
+    With a ``pattern`` the waiter claims the first sequence it matches;
+    otherwise (``query_tty``-style) it takes every unclaimed sequence until
+    ``more`` is satisfied.  A waiter that ``closes`` a batch resolves the
+    rest of its batch to ``None`` when it is claimed.
+    """
+
+    pattern: re.Pattern[bytes] | None = None
+    more: MorePredicate | None = None
+    batch: object = None
+    closes: bool = False
+    buf: bytearray = field(default_factory=bytearray)
+    future: Future = field(default_factory=Future)
+
+
+class ReplyDemux:
+    """Own TTY input on a background thread and dispatch replies to waiters.
+
+    Use it as a context manager (or call :meth:`start`/:meth:`stop`).  While
+    it runs, ``query_tty`` and ``query_many`` in :mod:`wskr.terminal.osc`
+    go through it; direct :func:`~wskr.terminal.io.read_tty` calls would
+    race the reader thread and should not be made.
+
+    ``fd`` may name an already open terminal descriptor; it is left open.
+    ``on_unclaimed`` receives every sequence no query was waiting for.
+    """
+
+    def __init__(
+        self,
+        fd: int | None = None,
+        *,
+        on_unclaimed: Callable[[bytes], None] | None = None,
+    ) -> None:
+        self._fd_arg = fd
+        self._on_unclaimed = on_unclaimed
+        self._waiters: list[_Waiter] = []
+        self._lock = Lock()
+        self._send_lock = Lock()
+        self._thread: Thread | None = None
+        self._stack: ExitStack | None = None
+        self._wake_w = -1
+        self.stray = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the reader thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> Self:
+        """Open the terminal, start the reader thread and make this the active demux."""
+        global _active_demux  # noqa: PLW0603
+        if self._thread is not None:
+            return self
+        stack = ExitStack()
+        try:
+            fd, wake_r = self._open(stack)
+        except BaseException:
+            stack.close()
+            raise
+        self._stack = stack
+        self._thread = Thread(target=self._run, args=(fd, wake_r), name="wskr-tty-demux", daemon=True)
+        self._thread.start()
+        _active_demux = self
+        return self
+
+    def _open(self, stack: ExitStack) -> tuple[int, int]:
+        fd = self._fd_arg if self._fd_arg is not None else _get_tty_fd()
+        if self._fd_arg is None:
+            stack.callback(os.close, fd)
+        with suppress(termios.error):
+            stack.enter_context(tty_attributes(fd))
+        wake_r, self._wake_w = os.pipe()
+        stack.callback(os.close, wake_r)
+        stack.callback(os.close, self._wake_w)
+        return fd, wake_r
+
+    def stop(self) -> None:
+        """Stop the reader, restore the terminal and fail any remaining waiters."""
+        global _active_demux  # noqa: PLW0603
+        if self._thread is None:
+            return
+        if _active_demux is self:
+            _active_demux = None
+        with suppress(OSError):
+            os.write(self._wake_w, b"\0")
+        self._thread.join()
+        self._thread = None
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.future.set_result(None)
+
+    def __enter__(self) -> Self:  # noqa: D105
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> bool:
+        """Stop the reader thread."""
+        self.stop()
+        return False
+
+    def _run(self, fd: int, wake_r: int) -> None:
+        buf = bytearray()
+        while True:
+            ready = select([fd, wake_r], [], [], None)[0]
+            if wake_r in ready:
+                return
+            try:
+                chunk = os.read(fd, READ_SIZE)
+            except OSError:
+                logger.debug("TTY read failed; demux stopping", exc_info=True)
+                return
+            if not chunk:
+                return
+            buf += chunk
+            sequences, consumed = split_sequences(buf)
+            del buf[:consumed]
+            for seq in sequences:
+                self._dispatch(seq)
+
+    def _dispatch(self, seq: bytes) -> None:
+        with self._lock:
+            claimed = self._claim(seq)
+        if claimed:
+            return
+        self.stray += 1
+        logger.debug("unclaimed terminal sequence %r", seq[:64])
+        if self._on_unclaimed is not None:
+            self._on_unclaimed(seq)
+
+    def _claim(self, seq: bytes) -> bool:
+        for waiter in self._waiters:
+            if waiter.pattern is None:
+                continue
+            m = waiter.pattern.search(seq)
+            if m is None:
+                continue
+            self._waiters.remove(waiter)
+            waiter.future.set_result(m)
+            if waiter.closes:
+                for other in [w for w in self._waiters if w.batch is waiter.batch]:
+                    self._waiters.remove(other)
+                    other.future.set_result(None)
+            return True
+        for waiter in self._waiters:
+            if waiter.more is None:
+                continue
+            waiter.buf += seq
+            if not waiter.more(bytes(waiter.buf)):
+                self._waiters.remove(waiter)
+                waiter.future.set_result(bytes(waiter.buf))
+            return True
+        return False
+
+    def _submit(self, request: bytes, waiters: list[_Waiter]) -> None:
+        # Registration and write order must agree: terminals answer in order.
+        with self._send_lock:
+            with self._lock:
+                self._waiters += waiters
+            write_tty(request)
+
+    def _withdraw(self, waiters: list[_Waiter]) -> None:
+        with self._lock:
+            for waiter in waiters:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def query(self, request: bytes, more: MorePredicate, timeout: float | None = None) -> bytes:
+        """Send ``request`` and collect unclaimed replies until ``more`` is satisfied.
+
+        Returns whatever arrived when ``timeout`` (default ``TIMEOUT_S``)
+        expires, like :func:`~wskr.terminal.osc.query_tty`.
+        """
+        waiter = _Waiter(more=more)
+        self._submit(request, [waiter])
+        try:
+            return waiter.future.result(TIMEOUT_S if timeout is None else timeout) or b""
+        except FutureTimeoutError:
+            self._withdraw([waiter])
+            with self._lock:
+                return bytes(waiter.buf)
+
+    def query_many(
+        self,
+        queries: Sequence[tuple[bytes, re.Pattern[bytes]]],
+        sentinel: tuple[bytes, re.Pattern[bytes]],
+        timeout: float | None = None,
+    ) -> list[re.Match[bytes] | None]:
+        """Send ``(request, pattern)`` queries and a ``sentinel`` query in one write.
+
+        Each query resolves to the first reply matching its pattern; when the
+        sentinel's reply arrives the queries still unanswered resolve to
+        ``None``.
+        """
+        batch = object()
+        waiters = [_Waiter(pattern=pattern, batch=batch) for _, pattern in queries]
+        closer = _Waiter(pattern=sentinel[1], batch=batch, closes=True)
+        request = b"".join(req for req, _ in queries) + sentinel[0]
+        self._submit(request, [*waiters, closer])
+        try:
+            closer.future.result(TIMEOUT_S if timeout is None else timeout)
+        except FutureTimeoutError:
+            self._withdraw([*waiters, closer])
+        return [w.future.result(0) if w.future.done() else None for w in waiters]
+
+
+_active_demux: ReplyDemux | None = None
+
+
+def active_demux() -> ReplyDemux | None:
+    """Return the running :class:`ReplyDemux`, if any."""
+    return _active_demux
+
+
+__all__ = ["ReplyDemux", "active_demux", "split_sequences"]
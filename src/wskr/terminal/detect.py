@@ -0,0 +1,106 @@
+"""Detect the terminal's graphics support with a single round trip.
+
+One write carries a kitty graphics ``a=q`` query, an XTVERSION request and a
+DA1 request; the DA1 answer comes last and both ends the read and lists the
+terminal's attributes (``4`` means sixel).  Terminals that ignore the first
+two are therefore detected as soon as DA1 returns.  Environment variables set
+by kitty-compatible terminals are used as a hint when nothing answers.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import termios
+from dataclasses import dataclass
+
+from wskr.core.config import OSC_TIMEOUT_S
+
+from . import osc
+from .probes import _XTVERSION_QUERY, _XTVERSION_RE
+
+logger = logging.getLogger(__name__)
+
+_DA1_ATTRS_RE = re.compile(rb"\x1b\[\?([\d;]*)c")
+
+# DA1 attribute advertising sixel graphics.
+_DA1_SIXEL = 4
+
+_KITTY_TERM_PROGRAMS = frozenset({"ghostty", "WezTerm"})
+
+
+def _kitty_probe() -> tuple[bytes, re.Pattern[bytes]]:
+    """Return kitty's ``a=q`` support query, a 1x1 RGB image sent directly, and its reply pattern."""
+    from wskr.protocol import kitty  # noqa: PLC0415 - kitty imports the registry, which imports us
+
+    return kitty._probe_request("d", b"\x00\x00\x00"), kitty._PROBE_RESP_RE  # noqa: SLF001
+
+
+@dataclass(frozen=True, slots=True)
+class TerminalSupport:
+    """Graphics support reported by the terminal."""
+
+    answered: bool = False
+    kitty_graphics: bool = False
+    sixel: bool = False
+    xtversion: str | None = None
+    da1: tuple[int, ...] = ()
+
+
+def kitty_env_hint() -> bool:
+    """Return ``True`` when the environment names a kitty-compatible terminal."""
+    return (
+        bool(os.getenv("KITTY_WINDOW_ID"))
+        or os.getenv("TERM", "") == "xterm-kitty"
+        or os.getenv("TERM_PROGRAM", "") in _KITTY_TERM_PROGRAMS
+    )
+
+
+def parse_support(resp: bytes) -> TerminalSupport:
+    """Interpret the replies to the combined probe."""
+    da1 = _DA1_ATTRS_RE.search(resp)
+    if da1 is None:
+        return TerminalSupport()
+    head = resp[: da1.start()]
+    attrs = tuple(int(a) for a in da1.group(1).split(b";") if a)
+    kitty = _kitty_probe()[1].search(head)
+    version = _XTVERSION_RE.search(head)
+    return TerminalSupport(
+        answered=True,
+        kitty_graphics=kitty is not None and kitty.group(1) == b"OK",
+        sixel=_DA1_SIXEL in attrs,
+        xtversion=version.group(1).decode("utf-8", "replace") if version else None,
+        da1=attrs,
+    )
+
+
+def _stdout_is_tty() -> bool:
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def probe_terminal(timeout: float | None = None) -> TerminalSupport:
+    """Ask the terminal what it supports; all-``False`` when stdout is not a TTY."""
+    if not _stdout_is_tty():
+        return TerminalSupport()
+    try:
+        resp = osc.query_tty(
+            _kitty_probe()[0] + _XTVERSION_QUERY + osc.DA1_REQUEST,
+            more=osc.DA1_REPLY_END,
+            timeout=OSC_TIMEOUT_S if timeout is None else timeout,
+        )
+    except (OSError, termios.error):
+        logger.debug("terminal probe failed", exc_info=True)
+        return TerminalSupport()
+    support = parse_support(resp)
+    if not support.answered and kitty_env_hint():
+        logger.debug("terminal probe unanswered; trusting kitty environment hints")
+        return TerminalSupport(kitty_graphics=True)
+    return support
+
+
+__all__ = ["TerminalSupport", "kitty_env_hint", "parse_support", "probe_terminal"]
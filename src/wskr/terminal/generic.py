@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from .capabilities import TerminalCapabilities, _env_is_dark
+from .geometry import window_px
 
 
 class GenericCapabilities(TerminalCapabilities):
     """Conservative, portable capability detector."""
 
     def window_px(self) -> tuple[int, int]:  # noqa: PLR6301
-        return (800, 600)
+        return window_px()
 
     def is_dark(self) -> bool:  # noqa: PLR6301
         try:
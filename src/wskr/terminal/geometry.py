@@ -0,0 +1,305 @@
+"""Terminal window and cell geometry.
+
+Rows, columns and the window size in pixels come from ``TIOCGWINSZ`` on the
+controlling TTY.  Some terminals (and most serial/multiplexer setups) leave the
+pixel fields at zero; the terminal is then asked once with the CSI 14t/16t/18t
+window reports and the resulting cell size is reused for later calls.
+
+A chained ``SIGWINCH`` handler (:class:`ResizeWatcher`) counts resizes, so
+the geometry is only re-read after the terminal actually changed; between
+resizes a lookup costs one integer comparison.
+"""
+
+from __future__ import annotations
+
+import array
+import fcntl
+import logging
+import re
+import signal
+import sys
+import termios
+import threading
+from dataclasses import dataclass
+from threading import Lock
+from typing import TYPE_CHECKING, Any
+
+from wskr.core.config import DEFAULT_TTY_ROWS, OSC_TIMEOUT_S, WATCH_RESIZE
+from wskr.terminal.osc import query_many
+from wskr.terminal.probes import PROBES
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+logger = logging.getLogger(__name__)
+
+# Rows kept free below an image for the shell prompt / status line.
+STATUS_ROWS = 3
+
+# Viewport reported when no terminal geometry is available at all.
+FALLBACK_WINDOW_PX: tuple[int, int] = (800, 600)
+
+# Text-area size in pixels (14t), cell size (16t) and size in cells (18t).
+_CSI_SIZE_QUERIES = [
+    (b"\x1b[14t", re.compile(rb"\x1b\[4;(\d+);(\d+)t")),
+    (b"\x1b[16t", re.compile(rb"\x1b\[6;(\d+);(\d+)t")),
+    (b"\x1b[18t", re.compile(rb"\x1b\[8;(\d+);(\d+)t")),
+]
+
+
+@dataclass(slots=True, frozen=True)
+class TerminalGeometry:
+    """Character grid and pixel size of the terminal window."""
+
+    cols: int
+    rows: int
+    width_px: int
+    height_px: int
+
+    @property
+    def has_pixels(self) -> bool:
+        """``True`` when the pixel size of the window is known."""
+        return self.width_px > 0 and self.height_px > 0
+
+    @property
+    def cell_px(self) -> tuple[float, float]:
+        """``(width, height)`` of one character cell in pixels."""
+        if not self.has_pixels or self.cols <= 0 or self.rows <= 0:
+            return (0.0, 0.0)
+        return (self.width_px / self.cols, self.height_px / self.rows)
+
+    def drawable_px(self, reserved_rows: int = STATUS_ROWS) -> tuple[int, int]:
+        """Return the window size minus ``reserved_rows`` text rows."""
+        rows = self.rows or DEFAULT_TTY_ROWS
+        return (self.width_px, self.height_px - (reserved_rows * self.height_px) // rows)
+
+
+FALLBACK_GEOMETRY = TerminalGeometry(80, DEFAULT_TTY_ROWS, *FALLBACK_WINDOW_PX)
+
+
+_SIGWINCH: int | None = getattr(signal, "SIGWINCH", None)
+
+
+class ResizeWatcher:
+    """Count terminal resizes with a chained ``SIGWINCH`` handler.
+
+    :attr:`generation` grows by one on every resize, so anything cached
+    against it stays valid until the window really changes.  The handler is
+    installed on first use from the main thread (the only thread Python
+    delivers signals to) and calls the handler it replaced.  When it cannot
+    be installed (no ``SIGWINCH``, not yet on the main thread, or
+    ``WSKR_WATCH_RESIZE=false``) :meth:`current` returns ``None`` and callers
+    fall back to re-reading.  A handler installed later by someone else
+    (e.g. curses) silently replaces this one; call :meth:`install` again
+    afterwards to chain in front of it.
+    """
+
+    def __init__(self, *, enabled: bool = WATCH_RESIZE) -> None:
+        self.enabled = enabled
+        self.generation = 0
+        self._handler = self._on_resize
+        self._previous: Any = None
+        self._installed = False
+        self._chaining = False
+
+    @property
+    def installed(self) -> bool:
+        """``True`` while this watcher's handler is the active ``SIGWINCH`` handler."""
+        return self._installed and _SIGWINCH is not None and signal.getsignal(_SIGWINCH) == self._handler
+
+    def _on_resize(self, signum: int, frame: FrameType | None) -> None:
+        if self._chaining:  # a handler we chain to chained back to us
+            return
+        self.generation += 1
+        previous = self._previous
+        if callable(previous):
+            self._chaining = True
+            try:
+                previous(signum, frame)
+            finally:
+                self._chaining = False
+
+    def install(self) -> bool:
+        """Install the handler if possible; return whether resizes are watched."""
+        if self.installed:
+            return True
+        if not self.enabled or _SIGWINCH is None or threading.current_thread() is not threading.main_thread():
+            return False
+        try:
+            self._previous = signal.signal(_SIGWINCH, self._handler)
+        except (OSError, ValueError):
+            logger.debug("installing SIGWINCH handler failed", exc_info=True)
+            return False
+        self._installed = True
+        self.generation += 1  # resizes before now were missed
+        return True
+
+    def uninstall(self) -> None:
+        """Restore the handler that was active before :meth:`install`."""
+        if self.installed:
+            previous = self._previous
+            signal.signal(_SIGWINCH, previous if previous is not None else signal.SIG_DFL)
+        self._installed = False
+        self._previous = None
+
+    def current(self) -> int | None:
+        """Return the resize generation, or ``None`` when resizes are not watched."""
+        if not self.enabled:
+            return None
+        if self._installed or self.install():
+            return self.generation
+        return None
+
+
+# Process-wide resize counter used by every geometry cache.
+RESIZE_WATCHER = ResizeWatcher()
+
+
+def resize_generation() -> int | None:
+    """Return :attr:`RESIZE_WATCHER.generation`, or ``None`` if resizes are not watched."""
+    return RESIZE_WATCHER.current()
+
+
+def _tty_fileno() -> int | None:
+    stdout = sys.__stdout__
+    if stdout is None:
+        return None
+    try:
+        return stdout.fileno()
+    except (OSError, ValueError):
+        return None
+
+
+def _ioctl_winsize(fd: int) -> TerminalGeometry | None:
+    buf = array.array("H", [0, 0, 0, 0])
+    try:
+        fcntl.ioctl(fd, termios.TIOCGWINSZ, buf)
+    except OSError:
+        logger.debug("TIOCGWINSZ failed on fd %d", fd, exc_info=True)
+        return None
+    n_row, n_col, w_px, h_px = buf
+    return TerminalGeometry(n_col, n_row, w_px, h_px)
+
+
+def _csi_cell_px() -> tuple[float, float] | None:
+    """Ask the terminal for its cell size using the CSI window reports."""
+    try:
+        text_px, cell, text_cells = query_many(_CSI_SIZE_QUERIES, timeout=OSC_TIMEOUT_S)
+    except (OSError, termios.error):
+        logger.debug("CSI size query failed", exc_info=True)
+        return None
+    if cell is not None and int(cell[1]) and int(cell[2]):
+        return (float(cell[2]), float(cell[1]))
+    if text_px is not None and text_cells is not None and int(text_cells[1]) and int(text_cells[2]):
+        rows, cols = int(text_cells[1]), int(text_cells[2])
+        return (int(text_px[2]) / cols, int(text_px[1]) / rows)
+    return None
+
+
+def _valid_cell_px(value: object) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) == 2  # noqa: PLR2004 - [width, height]
+        and all(isinstance(v, (int, float)) and v > 0 for v in value)
+    )
+
+
+def _probe_cell_px() -> list[float] | None:
+    cell = _csi_cell_px()
+    return list(cell) if cell is not None else None
+
+
+def _cached_cell_px() -> tuple[float, float] | None:
+    """Return the CSI cell size, reusing a result persisted by an earlier process."""
+    cell = PROBES.cached("cell_px", _probe_cell_px, valid=_valid_cell_px)
+    return (float(cell[0]), float(cell[1])) if cell else None
+
+
+class GeometryProvider:
+    """Answer terminal geometry from ``TIOCGWINSZ`` with a CSI fallback.
+
+    While :data:`RESIZE_WATCHER` is active the result is kept until the next
+    resize; otherwise the ioctl is issued on every call.  The CSI fallback
+    costs a terminal round trip, so its cell size is cached until :meth:`invalidate`;
+    the first lookup may be answered from the on-disk probe cache, later ones
+    (e.g. after a font change) always ask the terminal.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._cell_px: tuple[float, float] | None = None
+        self._csi_tried = False
+        self._reprobe = False
+        self._snapshot: tuple[int, TerminalGeometry | None] | None = None
+
+    def invalidate(self) -> None:
+        """Forget the cached geometry and any cell size learned from the CSI fallback."""
+        with self._lock:
+            self._snapshot = None
+            self._cell_px = None
+            self._csi_tried = False
+            self._reprobe = True
+
+    def get(self) -> TerminalGeometry | None:
+        """Return the current geometry, or ``None`` when there is no TTY."""
+        generation = RESIZE_WATCHER.current()
+        snapshot = self._snapshot
+        if generation is not None and snapshot is not None and snapshot[0] == generation:
+            return snapshot[1]
+        geom = self._read()
+        if generation is not None:
+            self._snapshot = (generation, geom)
+        return geom
+
+    def _read(self) -> TerminalGeometry | None:
+        fd = _tty_fileno()
+        if fd is None:
+            return None
+        geom = _ioctl_winsize(fd)
+        if geom is None or geom.has_pixels or geom.cols <= 0 or geom.rows <= 0:
+            return geom
+        with self._lock:
+            if not self._csi_tried:
+                self._csi_tried = True
+                if self._reprobe:
+                    self._cell_px = _csi_cell_px()
+                    if self._cell_px is not None:
+                        PROBES.store("cell_px", list(self._cell_px))
+                else:
+                    self._cell_px = _cached_cell_px()
+            cell = self._cell_px
+        if cell is None:
+            return geom
+        cell_w, cell_h = cell
+        return TerminalGeometry(geom.cols, geom.rows, round(cell_w * geom.cols), round(cell_h * geom.rows))
+
+
+GEOMETRY = GeometryProvider()
+
+
+def get_geometry() -> TerminalGeometry | None:
+    """Return the terminal geometry using the shared :class:`GeometryProvider`."""
+    return GEOMETRY.get()
+
+
+def window_px() -> tuple[int, int]:
+    """Return the drawable viewport in pixels, or :data:`FALLBACK_WINDOW_PX`."""
+    geom = get_geometry()
+    if geom is None or not geom.has_pixels:
+        return FALLBACK_WINDOW_PX
+    return geom.drawable_px()
+
+
+__all__ = [
+    "FALLBACK_GEOMETRY",
+    "FALLBACK_WINDOW_PX",
+    "GEOMETRY",
+    "RESIZE_WATCHER",
+    "STATUS_ROWS",
+    "GeometryProvider",
+    "ResizeWatcher",
+    "TerminalGeometry",
+    "get_geometry",
+    "resize_generation",
+    "window_px",
+]
@@ -1,20 +1,198 @@
+from __future__ import annotations
+
+import asyncio
 import os
+import re
 import sys
 import termios
 from abc import ABC, abstractmethod
-from collections.abc import Callable, Generator
-from contextlib import ExitStack, contextmanager, suppress
+from collections.abc import Callable, Generator, Iterable
+from contextlib import ExitStack, asynccontextmanager, contextmanager, suppress
 from select import select
-from threading import RLock
+from threading import RLock, get_ident
 from time import monotonic
+from typing import TYPE_CHECKING, Self
+from weakref import WeakKeyDictionary
+
+from wskr.core.config import TIMEOUT_S
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from types import TracebackType
 
 # Predicate used to determine whether more bytes should be read
 MorePredicate = Callable[[bytes], bool]
 
+# String terminators of OSC/APC/DCS replies.
+BEL = b"\x07"
+ST = b"\x1b\\"
+
+# Bytes requested per ``os.read`` once the terminal has data.
+READ_SIZE = 4096
+
+# How far back a regular-expression terminator is re-searched when new bytes
+# arrive, so a match split across two reads is still found.
+_REGEX_LOOKBACK = 256
+
+
+class Terminators:
+    """End-of-reply patterns for :meth:`TtyIO.read`, matched incrementally.
+
+    A reply is complete once ``count`` terminators (byte strings or compiled
+    ``bytes`` patterns) have been seen; only newly read bytes, plus a short
+    overlap, are searched after each read.  Anything past the final
+    terminator is kept for the next read instead of being dropped.
+    Instances are stateless and also work as a plain ``more`` predicate.
+    """
+
+    __slots__ = ("count", "lookback", "patterns")
+
+    def __init__(self, *patterns: bytes | re.Pattern[bytes], count: int = 1) -> None:
+        if not patterns:
+            msg = "at least one terminator is required"
+            raise ValueError(msg)
+        self.patterns = patterns
+        self.count = count
+        self.lookback = max(_REGEX_LOOKBACK if isinstance(p, re.Pattern) else len(p) - 1 for p in patterns)
+
+    def find(self, data: bytes | bytearray, start: int = 0) -> int:
+        """Return the end of the earliest terminator at or after ``start``, or ``-1``."""
+        best_start, best_end = -1, -1
+        for pattern in self.patterns:
+            if isinstance(pattern, re.Pattern):
+                m = pattern.search(data, start)
+                if m is None:
+                    continue
+                match_start, match_end = m.span()
+            else:
+                match_start = data.find(pattern, start)
+                if match_start < 0:
+                    continue
+                match_end = match_start + len(pattern)
+            if best_start < 0 or match_start < best_start:
+                best_start, best_end = match_start, match_end
+        return best_end
+
+    def scanner(self) -> _ReplyScanner:
+        """Return fresh per-read matching state."""
+        return _ReplyScanner(self)
+
+    def __call__(self, data: bytes) -> bool:
+        """Return ``True`` while ``data`` is not yet a complete reply."""
+        return self.scanner().feed(data) < 0
+
+
+class _ReplyScanner:
+    __slots__ = ("_found", "_last_end", "_scanned", "_terminators")
+
+    def __init__(self, terminators: Terminators) -> None:
+        self._terminators = terminators
+        self._found = 0
+        self._last_end = 0
+        self._scanned = 0
+
+    def feed(self, data: bytes | bytearray) -> int:
+        """Scan the unseen tail of ``data``; return the reply's end once complete, else ``-1``."""
+        terms = self._terminators
+        start = max(self._last_end, self._scanned - terms.lookback)
+        while (end := terms.find(data, start)) >= 0:
+            self._found += 1
+            self._last_end = start = end
+            if self._found >= terms.count:
+                return end
+        self._scanned = len(data)
+        return -1
+
 
 # Reentrant lock for synchronizing access to the TTY
 _tty_lock = RLock()
 
+# Thread whose event loop runs an :class:`AsyncTtyIO` call holding the TTY.
+# ``_tty_lock`` is reentrant, so this is what keeps other callers on that
+# thread (a synchronous call from a loop callback, a second ``AsyncTtyIO``)
+# out of the middle of the coroutine's exchange.
+_async_owner: int | None = None
+
+
+def _acquire_tty() -> None:
+    """Take the TTY lock for a synchronous call."""
+    _tty_lock.acquire()
+    if _async_owner == get_ident():
+        _tty_lock.release()
+        # waiting would block the loop that has to finish the async call
+        msg = "the terminal is in use by an asyncio call on this thread"
+        raise RuntimeError(msg)
+
+
+# Bounds on a single ``writev`` call: the platform's iovec limit and a byte
+# budget that keeps each syscall (and any terminal-side stall) short.
+try:
+    _IOV_MAX = max(os.sysconf("SC_IOV_MAX"), 16)
+except (AttributeError, OSError, ValueError):
+    _IOV_MAX = 1024
+WRITEV_MAX_BYTES = 1 << 20
+
+
+def _writev_batch(fd: int, batch: list[memoryview], timeout: float) -> int:
+    """Write ``batch`` completely and return the number of write syscalls made.
+
+    Short writes resume where they stopped; on a non-blocking ``fd`` that is
+    full (``EAGAIN``) the call waits up to ``timeout`` seconds for it to
+    become writable again and raises :class:`TimeoutError` if it does not.
+    """
+    calls = 0
+    start = 0
+    while start < len(batch):
+        try:
+            n = os.write(fd, batch[start]) if start == len(batch) - 1 else os.writev(fd, batch[start:])
+        except BlockingIOError:
+            if not select([], [fd], [], timeout)[1]:
+                msg = f"terminal not writable for {timeout}s"
+                raise TimeoutError(msg) from None
+            continue
+        calls += 1
+        while start < len(batch) and n >= len(batch[start]):
+            n -= len(batch[start])
+            start += 1
+        if n:
+            batch[start] = batch[start][n:]
+    return calls
+
+
+def write_segments(
+    fd: int, segments: Iterable[bytes | bytearray | memoryview], *, timeout: float = TIMEOUT_S
+) -> tuple[int, int]:
+    """Write ``segments`` to ``fd`` in batched ``os.writev`` calls.
+
+    Segments are passed as memoryviews, never joined, and short or
+    ``EAGAIN`` writes are resumed where they stopped.  A descriptor that
+    stays full for ``timeout`` seconds (a stalled or detached terminal)
+    raises :class:`TimeoutError`.  Return the number of bytes written and
+    the number of successful write syscalls it took.
+    """
+    total = calls = 0
+    batch: list[memoryview] = []
+    size = 0
+    for segment in segments:
+        view = memoryview(segment).cast("B")
+        if not view:
+            continue
+        batch.append(view)
+        size += len(view)
+        if len(batch) >= _IOV_MAX or size >= WRITEV_MAX_BYTES:
+            calls += _writev_batch(fd, batch, timeout)
+            total += size
+            batch, size = [], 0
+    if batch:
+        calls += _writev_batch(fd, batch, timeout)
+        total += size
+    return total, calls
+
+
+def write_all(fd: int, segments: Iterable[bytes | bytearray | memoryview]) -> int:
+    """Write ``segments`` to ``fd`` (see :func:`write_segments`); return the bytes written."""
+    return write_segments(fd, segments)[0]
+
 
 # Open TTY file descriptor safely
 def _get_tty_fd() -> int:
@@ -53,8 +231,11 @@ def lock_tty(func):
     """Decorate function to lock access to TTY."""
 
     def wrapper(*args, **kwargs):
-        with _tty_lock:
+        _acquire_tty()
+        try:
             return func(*args, **kwargs)
+        finally:
+            _tty_lock.release()
 
     return wrapper
 
@@ -84,15 +265,211 @@ class TtyIO(ABC):
         return self.read(timeout=timeout, more=more)
 
 
+# Bytes read past the end of a terminated reply, handed to the next reader.
+_pending = bytearray()
+
+
+def _read_available(fd: int, buf: bytearray) -> bytearray:
+    """Append whatever ``fd`` can deliver without blocking to ``buf``."""
+    while select([fd], [], [], 0)[0]:
+        chunk = os.read(fd, READ_SIZE)
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
+def _reply_end(buf: bytearray, scanner: _ReplyScanner | None, more: MorePredicate) -> int:
+    """Return where the reply in ``buf`` ends once ``more`` is satisfied, else ``-1``."""
+    if scanner is not None:
+        return scanner.feed(buf)
+    return -1 if more(bytes(buf)) else len(buf)
+
+
+def _read_fd(
+    fd: int,
+    *,
+    timeout: float | None,
+    min_bytes: int,
+    more: MorePredicate,
+) -> bytes:
+    """Read from ``fd`` (already in non-canonical mode) until ``more`` is satisfied.
+
+    Whatever the terminal has buffered is pulled in ``READ_SIZE`` reads.  When
+    ``more`` is a :class:`Terminators` only the new tail is scanned and bytes
+    after the reply are kept in :data:`_pending`; any other predicate is
+    called once per read with the whole buffer.
+    """
+    global _pending  # noqa: PLW0603
+    buf, _pending = _pending, bytearray()
+    if timeout is None:
+        return bytes(_read_available(fd, buf))
+
+    scanner = more.scanner() if isinstance(more, Terminators) else None
+    deadline = monotonic() + timeout
+    if len(buf) < min_bytes:
+        buf += os.read(fd, min_bytes - len(buf))
+    while (end := _reply_end(buf, scanner, more)) < 0:
+        remaining = deadline - monotonic()
+        if timeout >= 0 and remaining <= 0:
+            break
+        if select([fd], [], [], remaining if timeout >= 0 else None)[0]:
+            chunk = os.read(fd, READ_SIZE)
+            if not chunk:
+                break
+            buf += chunk
+    else:
+        _pending = buf[end:]
+        return bytes(buf[:end])
+    return bytes(buf)
+
+
+class TtySession:
+    """One TTY descriptor held open, in no-echo non-canonical mode, for a batch of I/O.
+
+    While a session is active on a thread, :data:`TTY_IO` (and therefore
+    :func:`write_tty`, :func:`read_tty` and ``query_tty``) goes through it
+    instead of reopening the terminal and switching its attributes on every
+    call.  Writes are not drained one by one; call :meth:`drain` where output
+    must have reached the terminal (leaving the session also drains).  The
+    TTY lock is held for the whole session, so other threads wait for the
+    batch to finish.  A session entered inside another one shares its
+    descriptor.
+
+    ``fd`` may name an already open terminal descriptor; it is left open.
+    """
+
+    def __init__(self, fd: int | None = None) -> None:
+        self._fd_arg = fd
+        self._fd = -1
+        self._stack: ExitStack | None = None
+        self._previous: TtySession | None = None
+        self._owner: int | None = None
+
+    @property
+    def fd(self) -> int:
+        """Descriptor of the terminal, ``-1`` outside the ``with`` block."""
+        return self._fd
+
+    def _open(self, outer: TtySession | None) -> None:
+        if outer is not None and self._fd_arg is None:
+            self._fd = outer.fd
+            return
+        stack = ExitStack()
+        fd = self._fd_arg if self._fd_arg is not None else _get_tty_fd()
+        if self._fd_arg is None:
+            stack.callback(os.close, fd)
+        with suppress(termios.error):
+            stack.enter_context(tty_attributes(fd))
+        self._stack = stack
+        self._fd = fd
+
+    def __enter__(self) -> Self:
+        """Open the terminal (or join the active session) and make this session current."""
+        global _active_session  # noqa: PLW0603
+        _acquire_tty()
+        outer = _active_session
+        try:
+            self._open(outer)
+        except BaseException:
+            _tty_lock.release()
+            raise
+        self._previous = outer
+        self._owner = get_ident()
+        _active_session = self
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> bool:
+        """Drain output, restore the terminal attributes and release the TTY."""
+        global _active_session  # noqa: PLW0603
+        try:
+            if self._stack is not None:
+                self.drain()
+                self._stack.close()
+        finally:
+            _active_session = self._previous
+            self._stack = None
+            self._previous = None
+            self._owner = None
+            self._fd = -1
+            _tty_lock.release()
+        return False
+
+    def drain(self) -> None:
+        """Block until everything written so far has been sent to the terminal."""
+        with suppress(termios.error):
+            termios.tcdrain(self._fd)
+
+    def write(self, data: bytes) -> None:
+        """Write ``data`` without draining."""
+        write_all(self._fd, (data,))
+
+    def read(
+        self,
+        *,
+        timeout: float | None = None,
+        min_bytes: int = 0,
+        more: MorePredicate = lambda _b: True,
+    ) -> bytes:
+        """Read a response; see :meth:`TtyIO.read`."""
+        return _read_fd(self._fd, timeout=timeout, min_bytes=min_bytes, more=more)
+
+    def query(self, request: bytes, more: MorePredicate, timeout: float | None = None) -> bytes:
+        """Send ``request`` and read the response on the session descriptor."""
+        self.write(request)
+        return self.read(timeout=timeout, more=more)
+
+
+_active_session: TtySession | None = None
+
+
+def active_session() -> TtySession | None:
+    """Return the :class:`TtySession` open on the calling thread, if any."""
+    session = _active_session
+    if session is None or session._owner != get_ident():  # noqa: SLF001
+        return None
+    return session
+
+
+@contextmanager
+def tty_session() -> Generator[TtySession | None]:
+    """Hold a :class:`TtySession` for the block when the terminal can be opened.
+
+    Yield ``None`` instead when stdout is not a terminal (or the TTY is busy
+    with an asyncio call on this thread); the calls in the block then handle
+    the terminal on their own, as they would outside a session.
+    """
+    with ExitStack() as stack:
+        try:
+            session = stack.enter_context(TtySession())
+        except (OSError, RuntimeError, ValueError):
+            session = None
+        yield session
+
+
 class PosixTtyIO(TtyIO):
-    """POSIX implementation of :class:`TtyIO`."""
+    """POSIX implementation of :class:`TtyIO`.
+
+    Each call opens and configures the terminal on its own unless a
+    :class:`TtySession` is active, in which case the call goes through it
+    (``echo`` is then ignored: sessions never echo).
+    """
 
     @lock_tty
     def write(self, data: bytes) -> None:
         _ = self
+        session = active_session()
+        if session is not None:
+            session.write(data)
+            return
         fd = _get_tty_fd()
         try:
-            os.write(fd, data)
+            write_all(fd, (data,))
             with suppress(termios.error):
                 termios.tcdrain(fd)
         finally:
@@ -109,7 +486,9 @@ class PosixTtyIO(TtyIO):
         fd: int | None = None,
     ) -> bytes:
         _ = self
-        input_data = bytearray()
+        session = active_session()
+        if session is not None and fd in {None, session.fd}:
+            return session.read(timeout=timeout, min_bytes=min_bytes, more=more)
 
         owns_fd = fd is None
         if fd is None:
@@ -118,29 +497,20 @@ class PosixTtyIO(TtyIO):
         try:
             with suppress(TypeError):
                 stack.enter_context(tty_attributes(fd, min_bytes=min_bytes, echo=echo))
-
-            r, w, x = [fd], [], []
-            if timeout is None:
-                while select(r, w, x, 0)[0]:
-                    input_data.extend(os.read(fd, 100))
-            else:
-                start = monotonic()
-                if min_bytes > 0:
-                    input_data.extend(os.read(fd, min_bytes))
-                while (timeout < 0 or monotonic() - start < timeout) and more(bytes(input_data)):
-                    if select(r, w, x, timeout - (monotonic() - start))[0]:
-                        input_data.extend(os.read(fd, 1))
+            return _read_fd(fd, timeout=timeout, min_bytes=min_bytes, more=more)
         finally:
             if owns_fd:
                 os.close(fd)
             stack.close()
-        return bytes(input_data)
 
     @lock_tty
     def query(self, request: bytes, more: MorePredicate, timeout: float | None = None) -> bytes:
+        session = active_session()
+        if session is not None:
+            return session.query(request, more, timeout)
         fd = _get_tty_fd()
         try:
-            os.write(fd, request)
+            write_all(fd, (request,))
             with suppress(termios.error):
                 termios.tcdrain(fd)
             return self.read(timeout=timeout, more=more, fd=fd)
@@ -150,6 +520,148 @@ class PosixTtyIO(TtyIO):
 
 TTY_IO = PosixTtyIO()
 
+# How often a coroutine retries the TTY lock while another thread holds it.
+_LOCK_POLL_S = 0.005
+
+
+async def _fd_ready(fd: int, *, writable: bool = False) -> None:
+    """Wait on the running loop until ``fd`` is readable (or writable)."""
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    add, remove = (loop.add_writer, loop.remove_writer) if writable else (loop.add_reader, loop.remove_reader)
+    add(fd, lambda: ready.done() or ready.set_result(None))
+    try:
+        await ready
+    finally:
+        remove(fd)
+
+
+class AsyncTtyIO:
+    """Asyncio counterpart of :class:`PosixTtyIO`.
+
+    The terminal descriptor is switched to non-blocking mode and watched with
+    ``loop.add_reader``/``add_writer``, so waiting for a reply never blocks
+    the event loop.  Calls are serialized with an :class:`asyncio.Lock` (one
+    per running loop, created on first use) and, for the duration of each
+    call, also hold the TTY lock shared with the synchronous API; it is
+    polled rather than waited on, so a busy thread delays the coroutine
+    without stalling the loop.  A synchronous call made on the loop's thread
+    meanwhile raises :class:`RuntimeError` instead of interleaving with the
+    exchange.  An active :class:`TtySession` on the loop's thread lends its
+    descriptor.
+
+    ``fd`` may name an already open terminal descriptor; it is left open.
+    """
+
+    def __init__(self, fd: int | None = None) -> None:
+        self._fd_arg = fd
+        self._locks: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = WeakKeyDictionary()
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    async def _hold_tty() -> None:
+        global _async_owner  # noqa: PLW0603
+        # a threading lock offers nothing to await, so poll it
+        while True:
+            if _tty_lock.acquire(blocking=False):
+                if _async_owner is None:
+                    break
+                _tty_lock.release()  # another AsyncTtyIO on this loop holds it
+            await asyncio.sleep(_LOCK_POLL_S)
+        _async_owner = get_ident()
+
+    @asynccontextmanager
+    async def _terminal(self) -> AsyncGenerator[int]:
+        global _async_owner  # noqa: PLW0603
+        async with self._loop_lock():
+            await self._hold_tty()
+            try:
+                with ExitStack() as stack:
+                    session = active_session()
+                    if self._fd_arg is None and session is not None:
+                        fd = session.fd
+                    else:
+                        fd = self._fd_arg if self._fd_arg is not None else _get_tty_fd()
+                        if self._fd_arg is None:
+                            stack.callback(os.close, fd)
+                        with suppress(termios.error):
+                            stack.enter_context(tty_attributes(fd))
+                    if os.get_blocking(fd):
+                        os.set_blocking(fd, False)
+                        stack.callback(os.set_blocking, fd, True)  # noqa: FBT003
+                    yield fd
+            finally:
+                _async_owner = None
+                _tty_lock.release()
+
+    @staticmethod
+    async def _write_fd(fd: int, data: bytes | bytearray | memoryview) -> None:
+        view = memoryview(data).cast("B")
+        while view:
+            try:
+                view = view[os.write(fd, view) :]
+            except BlockingIOError:
+                await _fd_ready(fd, writable=True)
+
+    @staticmethod
+    async def _read_reply(fd: int, *, timeout: float | None, more: MorePredicate) -> bytes:  # noqa: ASYNC109
+        """Like the module-level ``_read_fd``, waiting on the loop instead of ``select``."""
+        global _pending  # noqa: PLW0603
+        buf, _pending = _pending, bytearray()
+        if timeout is None:
+            with suppress(BlockingIOError):
+                while chunk := os.read(fd, READ_SIZE):
+                    buf += chunk
+            return bytes(buf)
+
+        scanner = more.scanner() if isinstance(more, Terminators) else None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (end := _reply_end(buf, scanner, more)) < 0:
+            remaining = deadline - loop.time()
+            if timeout >= 0 and remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(_fd_ready(fd), remaining if timeout >= 0 else None)
+            except TimeoutError:
+                break
+            try:
+                chunk = os.read(fd, READ_SIZE)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break
+            buf += chunk
+        else:
+            _pending = buf[end:]
+            return bytes(buf[:end])
+        return bytes(buf)
+
+    async def write(self, data: bytes) -> None:
+        """Write ``data`` to the terminal, yielding to the loop while it is full."""
+        async with self._terminal() as fd:
+            await self._write_fd(fd, data)
+
+    async def read(self, *, timeout: float | None = None, more: MorePredicate = lambda _b: True) -> bytes:  # noqa: ASYNC109
+        """Read a response; see :meth:`TtyIO.read`."""
+        async with self._terminal() as fd:
+            return await self._read_reply(fd, timeout=timeout, more=more)
+
+    async def query(self, request: bytes, more: MorePredicate, timeout: float | None = None) -> bytes:  # noqa: ASYNC109
+        """Send ``request`` then read the response on the same descriptor."""
+        async with self._terminal() as fd:
+            await self._write_fd(fd, request)
+            return await self._read_reply(fd, timeout=timeout, more=more)
+
+
+ASYNC_TTY_IO = AsyncTtyIO()
+
 
 def write_tty(data: bytes) -> None:
     """Write data to the TTY using the default :class:`TtyIO`."""
@@ -169,12 +681,23 @@ def read_tty(
 
 
 __all__ = [
+    "ASYNC_TTY_IO",
+    "BEL",
+    "READ_SIZE",
+    "ST",
     "TTY_IO",
+    "AsyncTtyIO",
     "MorePredicate",
     "PosixTtyIO",
+    "Terminators",
     "TtyIO",
+    "TtySession",
+    "active_session",
     "lock_tty",
     "read_tty",
     "tty_attributes",
+    "tty_session",
+    "write_all",
+    "write_segments",
     "write_tty",
 ]
@@ -1,40 +1,22 @@
 from __future__ import annotations
 
 import logging
-import shutil
 
-from wskr.core.config import DEFAULT_TTY_ROWS
 from wskr.terminal.capabilities import TerminalCapabilities, _env_is_dark, _osc_is_dark
-from wskr.terminal.core.command import CommandRunner
+from wskr.terminal.geometry import window_px
 
 logger = logging.getLogger(__name__)
 
 
 class KittyCapabilities(TerminalCapabilities):
-    """Kitty-specific capability detector using its control helpers."""
+    """Kitty-specific capability detector.
 
-    def __init__(self) -> None:
-        kb = shutil.which("kitty")
-        if not kb:
-            msg = "kitty binary not found"
-            raise FileNotFoundError(msg)
-        self._kitty = kb
-        self._runner = CommandRunner()
+    Everything is asked of the terminal itself, so no local ``kitty`` binary is
+    needed (the terminal may be on the other end of an SSH connection).
+    """
 
-    def window_px(self) -> tuple[int, int]:
-        try:
-            proc = self._runner.run(
-                [self._kitty, "+kitten", "icat", "--print-window-size"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            w_px, h_px = map(int, proc.stdout.strip().split("x"))
-        except OSError:  # fall back conservatively on exec errors
-            logger.debug("KittyCapabilities.window_px failed", exc_info=True)
-            return (800, 600)
-        rows = DEFAULT_TTY_ROWS
-        return (w_px, h_px - (3 * h_px) // rows)
+    def window_px(self) -> tuple[int, int]:  # noqa: PLR6301
+        return window_px()
 
     def is_dark(self) -> bool:  # noqa: PLR6301
         # Prefer OSC background query; fall back to COLORFGBG
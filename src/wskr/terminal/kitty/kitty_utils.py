@@ -5,7 +5,7 @@ from __future__ import annotations
 import re
 from typing import TYPE_CHECKING
 
-from wskr.terminal.osc import query_tty
+from wskr.terminal.osc import query_many
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -25,6 +25,7 @@ KITTY_COLOR_KEYS = (
     *[str(k) for k in range(16)],
 )
 
+_REPLY_RE = re.compile(rb"\x1b\]21;[^\x07\x1b]*(?:\x07|\x1b\\)?")
 _RESP_RE = re.compile(rb"(?:\]21;|;)([^=]+)=rgb:([0-9A-Fa-f]{2})/([0-9A-Fa-f]{2})/([0-9A-Fa-f]{2})")
 
 
@@ -49,10 +50,10 @@ def query_colors(
     """
     body = ";".join(f"{k}=?" for k in keys)
     req = f"{OSC}21;{body}{ST}".encode()
-    resp = query_tty(req, more=lambda b: not b.endswith(ST.encode()), timeout=timeout)
-    if not resp:
+    (reply,) = query_many([(req, _REPLY_RE)], timeout=timeout)
+    if reply is None:
         return {}
-    return _parse_response(resp)
+    return _parse_response(reply.group())
 
 
 def query_kitty_color(
@@ -1,11 +1,104 @@
 from __future__ import annotations
 
-from .io import TTY_IO, MorePredicate
+import re
+from typing import TYPE_CHECKING
+
+from wskr.core.config import TIMEOUT_S
+
+from .demux import active_demux
+from .io import ASYNC_TTY_IO, TTY_IO, MorePredicate, Terminators
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# Primary device attributes.  Every terminal answers it, and answers in order,
+# so its reply marks the end of any batch of queries sent before it.
+DA1_REQUEST = b"\x1b[c"
+DA1_REPLY_RE = re.compile(rb"\x1b\[\?[\d;]*c")
+DA1_REPLY_END = Terminators(DA1_REPLY_RE)
 
 
 def query_tty(request: bytes, more: MorePredicate, timeout: float | None = None) -> bytes:
-    """Send a request to the terminal and read the response."""
+    """Send a request to the terminal and read the response.
+
+    While a :class:`~wskr.terminal.demux.ReplyDemux` runs, the reply is
+    collected by its reader thread instead.
+    """
+    demux = active_demux()
+    if demux is not None:
+        return demux.query(request, more, timeout)
     return TTY_IO.query(request, more, timeout)
 
 
-__all__ = ["query_tty"]
+def _batch_request(queries: Sequence[tuple[bytes, re.Pattern[bytes]]]) -> bytes:
+    return b"".join(req for req, _ in queries) + DA1_REQUEST
+
+
+def _match_replies(
+    queries: Sequence[tuple[bytes, re.Pattern[bytes]]], resp: bytes
+) -> list[re.Match[bytes] | None]:
+    sentinel = DA1_REPLY_RE.search(resp)
+    if sentinel is not None:
+        resp = resp[: sentinel.start()]
+    results: list[re.Match[bytes] | None] = []
+    pos = 0
+    for _, pattern in queries:
+        m = pattern.search(resp, pos)
+        results.append(m)
+        if m is not None:
+            pos = m.end()
+    return results
+
+
+def query_many(
+    queries: Sequence[tuple[bytes, re.Pattern[bytes]]],
+    timeout: float | None = None,
+) -> list[re.Match[bytes] | None]:
+    """Send several ``(request, reply_pattern)`` queries in one round trip.
+
+    The requests are written together followed by a DA1 sentinel and the
+    replies are read once, up to the DA1 answer.  Each query resolves to the
+    match of its pattern (searched in order, after the previous query's reply)
+    or ``None`` when the terminal did not answer it.  Terminals that ignore a
+    query are therefore detected as soon as the sentinel comes back instead of
+    after ``timeout`` (which defaults to ``TIMEOUT_S`` and only matters when
+    the terminal answers nothing at all).
+    """
+    demux = active_demux()
+    if demux is not None:
+        return demux.query_many(queries, (DA1_REQUEST, DA1_REPLY_RE), timeout)
+    resp = query_tty(
+        _batch_request(queries),
+        more=DA1_REPLY_END,
+        timeout=TIMEOUT_S if timeout is None else timeout,
+    )
+    return _match_replies(queries, resp)
+
+
+async def query_tty_async(request: bytes, more: MorePredicate, timeout: float | None = None) -> bytes:  # noqa: ASYNC109
+    """Send a request to the terminal and await the response without blocking the loop."""
+    return await ASYNC_TTY_IO.query(request, more, timeout)
+
+
+async def query_many_async(
+    queries: Sequence[tuple[bytes, re.Pattern[bytes]]],
+    timeout: float | None = None,  # noqa: ASYNC109
+) -> list[re.Match[bytes] | None]:
+    """Awaitable :func:`query_many`."""
+    resp = await query_tty_async(
+        _batch_request(queries),
+        more=DA1_REPLY_END,
+        timeout=TIMEOUT_S if timeout is None else timeout,
+    )
+    return _match_replies(queries, resp)
+
+
+__all__ = [
+    "DA1_REPLY_END",
+    "DA1_REPLY_RE",
+    "DA1_REQUEST",
+    "query_many",
+    "query_many_async",
+    "query_tty",
+    "query_tty_async",
+]
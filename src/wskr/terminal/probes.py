@@ -0,0 +1,233 @@
+"""On-disk cache of terminal probe results.
+
+Short-lived processes otherwise pay for every probe (the kitty binary lookup,
+the OSC 11 background-color query, the CSI cell-size fallback) before their
+first image.  Results are stored in ``$XDG_CACHE_HOME/wskr/probes.json``
+under a key derived from the terminal's identity: ``TERM``, ``TERM_PROGRAM``
+(and its version), ``KITTY_WINDOW_ID`` and the TTY device.  Each field has
+its own time-to-live.  A stale value is still returned at once, and the
+next lookup of that field probes again on the calling thread.  Probing
+writes to the terminal and reads its replies, so it never happens on a
+background thread that could cut into an image being written or take
+keystrokes meant for the program.
+
+The terminal's XTVERSION reply is recorded next to the other fields rather
+than folded into the key, because asking for it costs the round trip the
+cache exists to avoid.  When a refresh finds a different reply, every field
+cached for that identity is discarded.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from wskr.core.config import PROBE_CACHE
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_IDENTITY_ENV_VARS = ("TERM", "TERM_PROGRAM", "TERM_PROGRAM_VERSION", "KITTY_WINDOW_ID")
+
+# Default time-to-live per field, in seconds.
+PROBE_TTLS: dict[str, float] = {
+    "kitty_binary": 24 * 3600.0,
+    "dark_mode": 3600.0,
+    "cell_px": 3600.0,
+    "xtversion": 24 * 3600.0,
+}
+_DEFAULT_TTL_S = 3600.0
+
+# Identities kept in the file; the least recently written are dropped.
+_MAX_IDENTITIES = 32
+
+_XTVERSION_QUERY = b"\x1b[>0q"
+_XTVERSION_RE = re.compile(rb"\x1bP>\|([^\x1b]*)\x1b\\")
+
+
+def _cache_dir() -> Path:
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "wskr"
+
+
+def terminal_identity() -> str:
+    """Return a stable key for the terminal this process writes to."""
+    parts = [os.getenv(var, "") for var in _IDENTITY_ENV_VARS]
+    stdout = sys.__stdout__
+    tty = ""
+    if stdout is not None:
+        with contextlib.suppress(OSError, ValueError):
+            tty = os.ttyname(stdout.fileno())
+    parts.append(tty)
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=12).hexdigest()
+
+
+def _xtversion() -> str | None:
+    from wskr.terminal.osc import query_many  # noqa: PLC0415 - osc imports the TTY stack
+
+    (m,) = query_many([(_XTVERSION_QUERY, _XTVERSION_RE)])
+    return m.group(1).decode("utf-8", "replace") if m else None
+
+
+class ProbeCache:
+    """Probe results for the current terminal, persisted as JSON.
+
+    :meth:`cached` is the main entry point.  All methods are no-ops that
+    simply run the probe when the cache is disabled
+    (``WSKR_PROBE_CACHE=false``).
+    """
+
+    def __init__(self, path: Path | None = None, *, enabled: bool = PROBE_CACHE) -> None:
+        self._path = path
+        self.enabled = enabled
+        self._lock = Lock()
+        self._due: set[str] = set()  # stale fields already served once
+        self._identity: str | None = None
+
+    @property
+    def path(self) -> Path:
+        """Location of the cache file."""
+        return self._path if self._path is not None else _cache_dir() / "probes.json"
+
+    @property
+    def identity(self) -> str:
+        """Key of the current terminal; computed once per cache."""
+        if self._identity is None:
+            self._identity = terminal_identity()
+        return self._identity
+
+    def _load(self) -> dict[str, dict[str, list[Any]]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _store(self, data: dict[str, dict[str, list[Any]]]) -> None:
+        path = self.path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            tmp.replace(path)
+        except OSError:
+            logger.debug("writing probe cache %s failed", path, exc_info=True)
+
+    def lookup(self, field: str) -> tuple[Any, float] | None:
+        """Return ``(value, age_s)`` for ``field``, or ``None`` if it is not cached."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._load().get(self.identity, {}).get(field)
+        if not isinstance(entry, list) or len(entry) != 2:  # noqa: PLR2004 - [value, stamp]
+            return None
+        value, stamp = entry
+        return value, max(time.time() - float(stamp), 0.0)
+
+    def store(self, field: str, value: object) -> None:
+        """Record ``value`` (JSON-serializable) for ``field``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            data = self._load()
+            entries = data.pop(self.identity, {})
+            if field == "xtversion" and entries.get(field, [value])[0] != value:
+                logger.debug("terminal version changed; dropping cached probes")
+                entries = {}
+            entries[field] = [value, time.time()]
+            data[self.identity] = entries  # re-inserted last: most recently written
+            while len(data) > _MAX_IDENTITIES:
+                del data[next(iter(data))]
+            self._store(data)
+
+    def clear(self) -> None:
+        """Forget everything cached for the current terminal."""
+        with self._lock:
+            data = self._load()
+            if data.pop(self.identity, None) is not None:
+                self._store(data)
+
+    def cached(
+        self,
+        field: str,
+        probe: Callable[[], _T | None],
+        *,
+        ttl: float | None = None,
+        valid: Callable[[_T], bool] | None = None,
+    ) -> _T | None:
+        """Return ``field`` from the cache, running ``probe`` only when needed.
+
+        A fresh value is returned as is.  A stale one is returned too, once
+        per process; the next call (or the first one, past twice the TTL)
+        runs ``probe`` to replace it.  With nothing usable cached (or a value
+        rejected by ``valid``) ``probe`` runs as well.  ``probe`` always runs
+        on the calling thread.  ``probe`` returning ``None`` or raising stores
+        nothing; exceptions propagate only when there is no stale value to
+        fall back on.
+        """
+        hit = self.lookup(field)
+        if hit is not None and (valid is None or valid(hit[0])):
+            value, age = hit
+            limit = ttl if ttl is not None else PROBE_TTLS.get(field, _DEFAULT_TTL_S)
+            if age <= limit:
+                return value
+            with self._lock:
+                serve = field not in self._due and age <= 2 * limit
+                self._due.add(field)
+            if serve:
+                return value
+            return self._refresh(field, probe, value)
+        value = probe()
+        if value is not None:
+            self.store(field, value)
+        return value
+
+    def _refresh(self, field: str, probe: Callable[[], _T | None], stale: _T) -> _T:
+        with self._lock:
+            self._due.discard(field)
+        try:
+            self.refresh_version()
+            value = probe()
+        except Exception:  # a failed refresh keeps the stale value
+            logger.debug("refresh of %r failed", field, exc_info=True)
+            return stale
+        if value is None:
+            return stale
+        self.store(field, value)
+        return value
+
+    def refresh_version(self) -> None:
+        """Ask the terminal for XTVERSION and drop the cache if it changed."""
+        version = _xtversion()
+        if version is not None:
+            self.store("xtversion", version)
+
+
+# Process-wide cache for the controlling terminal.
+PROBES = ProbeCache()
+
+
+def kitty_binary() -> str | None:
+    """Return the path of the ``kitty`` executable, or ``None`` if not installed."""
+    return PROBES.cached(
+        "kitty_binary",
+        lambda: shutil.which("kitty"),
+        valid=lambda path: isinstance(path, str) and os.access(path, os.X_OK),
+    )
+
+
+__all__ = ["PROBES", "PROBE_TTLS", "ProbeCache", "kitty_binary", "terminal_identity"]
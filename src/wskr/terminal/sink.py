@@ -0,0 +1,117 @@
+"""Coalescing output sink for escape-sequence frames.
+
+Everything a protocol emits for one image (cursor moves, placements, deletes
+of evicted images, payload chunks) is collected as memoryview segments and
+written in as few ``writev`` calls as the platform allows when the frame ends.
+Writes resume after short writes and wait out ``EAGAIN`` on non-blocking
+descriptors, and each flushed frame's byte and syscall counts are recorded.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import RLock
+from typing import TYPE_CHECKING, BinaryIO, TextIO
+
+from wskr.terminal.io import write_segments
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class FrameStats:
+    """Bytes and write syscalls spent on one flushed frame."""
+
+    nbytes: int = 0
+    syscalls: int = 0
+
+
+@dataclass(slots=True)
+class SinkStats:
+    """Running totals of an :class:`OutputSink`."""
+
+    frames: int = 0
+    nbytes: int = 0
+    syscalls: int = 0
+
+
+class OutputSink:
+    """Collect a frame's escape segments and flush them together.
+
+    ``target`` is a descriptor or a file object; the default resolves
+    ``sys.stdout`` at every flush, so redirections made after the sink was
+    created are honored.  File objects with a usable ``fileno()`` are
+    flushed and then bypassed with ``writev``; others get one joined write.
+
+    Outside :meth:`frame` every :meth:`write` is flushed right away.  A frame
+    holds the sink's lock, so frames from different threads never interleave.
+    """
+
+    def __init__(self, target: int | TextIO | BinaryIO | None = None) -> None:
+        self._target = target
+        self._segments: list[bytes | bytearray | memoryview] = []
+        self._depth = 0
+        self._lock = RLock()
+        self.stats = SinkStats()
+        self.last_frame = FrameStats()
+
+    @contextmanager
+    def frame(self) -> Generator[OutputSink]:
+        """Buffer writes until the outermost ``frame`` block exits, then flush once."""
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if not self._depth:
+                    self.flush()
+
+    def write(self, segments: Iterable[bytes | bytearray | memoryview]) -> None:
+        """Queue ``segments``; flush immediately unless a frame is open."""
+        with self._lock:
+            self._segments.extend(segments)
+            if not self._depth:
+                self.flush()
+
+    def flush(self) -> FrameStats:
+        """Write every queued segment and return the frame's statistics."""
+        with self._lock:
+            segments, self._segments = self._segments, []
+            if not segments:
+                return FrameStats()
+            nbytes, syscalls = self._emit(segments)
+            stats = FrameStats(nbytes, syscalls)
+            self.last_frame = stats
+            self.stats.frames += 1
+            self.stats.nbytes += nbytes
+            self.stats.syscalls += syscalls
+        logger.debug("OutputSink: frame of %d bytes in %d syscalls", nbytes, syscalls)
+        return stats
+
+    def _emit(self, segments: list[bytes | bytearray | memoryview]) -> tuple[int, int]:
+        target = sys.stdout if self._target is None else self._target
+        if isinstance(target, int):
+            return write_segments(target, segments)
+        try:
+            fd = target.fileno()
+        except (AttributeError, OSError, ValueError):
+            data = b"".join(segments)
+            getattr(target, "buffer", target).write(data)
+            target.flush()
+            return len(data), 1
+        target.flush()
+        return write_segments(fd, segments)
+
+
+# Shared by the protocols writing to standard output.
+STDOUT_SINK = OutputSink()
+
+
+__all__ = ["STDOUT_SINK", "FrameStats", "OutputSink", "SinkStats"]
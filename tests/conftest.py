@@ -1,13 +1,17 @@
 import contextlib
 import os
 import select
+import signal
 import subprocess
 import termios
+import time
 
 import pytest
 
 from wskr.protocol.base import ImageProtocol
 from wskr.terminal import io
+from wskr.terminal.geometry import RESIZE_WATCHER
+from wskr.terminal.probes import PROBES
 
 MAX_OUTPUT_LINES = 32
 MAX_TIME_PER_TEST = 5
@@ -39,6 +43,18 @@ def pytest_runtest_logreport(report: pytest.TestReport) -> None:
     report.sections = new_sections
 
 
+@pytest.fixture(autouse=True)
+def _no_probe_cache(monkeypatch):
+    """Keep tests from reading or writing the user's on-disk probe cache."""
+    monkeypatch.setattr(PROBES, "enabled", False)
+
+
+@pytest.fixture(autouse=True)
+def _no_resize_watch(monkeypatch):
+    """Re-read geometry on every call unless a test opts into ``SIGWINCH`` caching."""
+    monkeypatch.setattr(RESIZE_WATCHER, "enabled", False)
+
+
 class DummyTransport(ImageProtocol):
     def __init__(self, width=800, height=600):
         self.width = width
@@ -63,6 +79,27 @@ def dummy_transport() -> DummyTransport:
     return DummyTransport()
 
 
+@pytest.fixture
+def resize_watch(monkeypatch):
+    """Enable the process-wide ``SIGWINCH`` watcher; yields a function simulating a resize."""
+    monkeypatch.setattr(RESIZE_WATCHER, "enabled", True)
+    yield lambda: os.kill(os.getpid(), signal.SIGWINCH)
+    RESIZE_WATCHER.uninstall()
+
+
+@pytest.fixture
+def wait_for():
+    """Return a function polling ``predicate`` until it holds or ``timeout`` seconds pass."""
+
+    def wait(predicate, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return predicate()
+
+    return wait
+
+
 @pytest.fixture
 def dummy_png() -> bytes:
     return b"\x89PNG\r\n\x1a\n" + b"\x00" * 12
@@ -85,6 +122,7 @@ def fake_tty(monkeypatch, tmp_path):
 
     # 5) os.write doesn't actually write
     monkeypatch.setattr(os, "write", lambda fd, data: len(data))
+    monkeypatch.setattr(os, "writev", lambda fd, buffers: sum(len(b) for b in buffers))
 
     # 6) termios.tcdrain → no-op
     monkeypatch.setattr(termios, "tcdrain", lambda fd: None)
@@ -1,8 +1,14 @@
+import threading
+
 import matplotlib.pyplot as plt
+import pytest
 from matplotlib.backend_bases import FigureManagerBase
 from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.transforms import Bbox
 
-from wskr.render.matplotlib.core import WskrFigureCanvas, WskrFigureManager
+from wskr.protocol.base import ImageProtocol
+from wskr.render.matplotlib.core import WskrFigureCanvas, WskrFigureManager, bbox_to_region
+from wskr.render.matplotlib.timer import SCHEDULER
 
 
 def test_manager_resizes_figure_and_sends_image(dummy_transport):
@@ -60,3 +66,159 @@ def test_draw_reentrancy_is_guarded(monkeypatch):
     manager = DummyManager(canvas)
     canvas.draw()
     assert manager.calls == 1
+
+
+def test_interactive_redraw_skips_unchanged_frames(monkeypatch, dummy_transport):
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: False)
+    fig = plt.figure()
+    ax = fig.add_subplot(1, 1, 1)
+    canvas = WskrFigureCanvas(fig)
+    manager = WskrFigureManager(canvas=canvas, transport_factory=lambda: dummy_transport)
+    canvas.manager = manager
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: True)
+    sent = []
+    monkeypatch.setattr(dummy_transport, "send_image", sent.append)
+
+    canvas.draw()
+    canvas.draw_idle()  # no event loop runs, so this draws at once
+    assert len(sent) == 1
+    assert manager.frames.skipped == 1
+    ax.plot([0, 1], [1, 0])
+    canvas.draw_idle()
+    assert len(sent) == 2
+    assert not canvas.idle_draws.pending
+
+
+def test_draw_idle_burst_sends_one_frame(monkeypatch, dummy_transport):
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: False)
+    fig = plt.figure()
+    ax = fig.add_subplot(1, 1, 1)
+    (line,) = ax.plot([0, 1], [0, 1])
+    canvas = WskrFigureCanvas(fig)
+    canvas.manager = WskrFigureManager(canvas=canvas, transport_factory=lambda: dummy_transport)
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: True)
+    sent = []
+    monkeypatch.setattr(dummy_transport, "send_image", sent.append)
+    canvas.idle_draws.min_interval = 60  # only the explicit flush below may draw
+    monkeypatch.setattr("wskr.render.matplotlib.idle.event_loop_running", lambda _thread: True)
+
+    for i in range(10):
+        line.set_ydata([i, -i])
+        ax.set_xlim(0, i + 1)
+        canvas.draw_idle()
+    assert sent == []
+    assert canvas.idle_draws.flush()
+    assert len(sent) == 1
+    assert canvas.idle_draws.stats.requested == 10
+    assert canvas.idle_draws.stats.delivered == 1
+
+
+def test_quiescent_draw_idle_draws_once(monkeypatch, dummy_transport):
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: False)
+    fig = plt.figure()
+    fig.add_subplot(1, 1, 1).plot([0, 1], [0, 1])
+    canvas = WskrFigureCanvas(fig)
+    manager = WskrFigureManager(canvas=canvas, transport_factory=lambda: dummy_transport)
+    manager.transmit_queue = None
+    canvas.manager = manager
+    # pyplot's stale callback turns every stale figure into a ``draw_idle``
+    monkeypatch.setattr("matplotlib.is_interactive", lambda: True)
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: True)
+    canvas.idle_draws.min_interval = 0.01
+    canvas.idle_draws.max_fps = 0
+
+    SCHEDULER.call_later(0, canvas.draw_idle, owner=threading.get_ident())
+    canvas.start_event_loop(0.3)
+    assert canvas.idle_draws.stats.delivered == 1
+    assert not canvas.idle_draws.pending
+    plt.close(fig)
+
+
+class _PixelTransport(ImageProtocol):
+    supports_pixels = True
+
+    def __init__(self):
+        self.full = 0
+        self.patches = []
+
+    def get_window_size_px(self):
+        return (200, 150)
+
+    def send_image(self, png_bytes):
+        pytest.fail("pixel transports are not sent PNGs")
+
+    def init_image(self, png_bytes):
+        return 1
+
+    def send_pixels(self, rgba, width, height):
+        self.full += 1
+
+    def patch_pixels(self, rgba, width, height, regions=None):
+        if not self.full:
+            return False
+        self.patches.append(regions)
+        return True
+
+
+def _blit_setup(monkeypatch, transport):
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: False)
+    fig = plt.figure(figsize=(4, 3), dpi=50)
+    ax = fig.add_subplot(1, 1, 1)
+    (line,) = ax.plot([0, 1], [0, 1], animated=True)
+    canvas = WskrFigureCanvas(fig)
+    manager = WskrFigureManager(canvas=canvas, transport_factory=lambda: transport)
+    manager.transmit_queue = None
+    canvas.manager = manager
+    manager.show()
+    background = canvas.copy_from_bbox(ax.bbox)
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: True)
+    return canvas, manager, ax, line, background
+
+
+def test_blit_sends_only_the_bbox_region(monkeypatch):
+    transport = _PixelTransport()
+    canvas, manager, ax, line, background = _blit_setup(monkeypatch, transport)
+    assert transport.full == 1
+
+    canvas.restore_region(background)
+    line.set_ydata([1, 0])
+    ax.draw_artist(line)
+    canvas.blit(ax.bbox)
+
+    width, height = canvas.get_width_height(physical=True)
+    ((region,),) = transport.patches
+    assert region == bbox_to_region(ax.bbox, width, height)
+    assert region[2] < width
+    assert region[3] < height
+    assert manager.frames.sent == 2
+
+    canvas.blit(ax.bbox)  # nothing new drawn: nothing sent
+    assert len(transport.patches) == 1
+
+
+def test_blit_composites_full_frame_for_png_transports(monkeypatch, dummy_transport):
+    canvas, _, ax, line, background = _blit_setup(monkeypatch, dummy_transport)
+    sent = []
+    monkeypatch.setattr(dummy_transport, "send_image", sent.append)
+    monkeypatch.setattr(canvas, "draw", pytest.fail)  # blitting must not rasterize the figure
+
+    canvas.restore_region(background)
+    ax.draw_artist(line)
+    canvas.blit(ax.bbox)
+    assert len(sent) == 1
+    assert sent[0].startswith(b"\x89PNG")
+
+
+def test_blit_is_ignored_when_not_live(monkeypatch):
+    transport = _PixelTransport()
+    canvas, *_ = _blit_setup(monkeypatch, transport)
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: False)
+    canvas.blit()
+    assert transport.patches == []
+
+
+def test_bbox_to_region_flips_and_clips():
+    assert bbox_to_region(None, 100, 50) == (0, 0, 100, 50)
+    assert bbox_to_region(Bbox.from_extents(10.2, 5, 20.5, 15), 100, 50) == (10, 35, 11, 10)
+    assert bbox_to_region(Bbox.from_extents(-5, -5, 200, 200), 100, 50) == (0, 0, 100, 50)
+    assert bbox_to_region(Bbox.from_extents(150, 0, 160, 10), 100, 50) is None
@@ -6,7 +6,7 @@ import threading
 import pytest
 
 from wskr.render.matplotlib import utils
-from wskr.terminal import io
+from wskr.terminal import io, osc
 
 
 def test_env_color_strategy(monkeypatch):
@@ -31,19 +31,19 @@ def test_osc_strategy_uses_config_timeout(monkeypatch):
         seen["timeout"] = timeout
         return b"\x1b]11;rgb:0000/0000/0000\x07"
 
-    monkeypatch.setattr(utils, "query_tty", fake_query)
+    monkeypatch.setattr(osc, "query_tty", fake_query)
     assert utils.OscQueryStrategy().detect() is True
     assert seen["timeout"] == 0.5
 
 
-def test_osc_strategy_parser_error(monkeypatch):
-    monkeypatch.setattr(utils, "query_tty", lambda *_a, **_k: b"oops")
-    with pytest.raises(ValueError, match="Unexpected"):
+def test_osc_strategy_unrelated_reply(monkeypatch):
+    monkeypatch.setattr(osc, "query_tty", lambda *_a, **_k: b"oops\x1b[?62;4c")
+    with pytest.raises(RuntimeError, match="No ANSI"):
         utils.OscQueryStrategy().detect()
 
 
 def test_osc_strategy_parser_partial(monkeypatch):
-    monkeypatch.setattr(utils, "query_tty", lambda *_a, **_k: b"\x1b]11;rgb:0000/0000\x07")
+    monkeypatch.setattr(osc, "query_tty", lambda *_a, **_k: b"\x1b]11;rgb:0000/0000\x07")
     with pytest.raises(ValueError, match="Unexpected"):
         utils.OscQueryStrategy().detect()
 
@@ -56,13 +56,13 @@ def test_detect_dark_mode_chain(monkeypatch):
         called["osc"] = True
         return b""
 
-    monkeypatch.setattr(utils, "query_tty", fake_query)
+    monkeypatch.setattr(osc, "query_tty", fake_query)
     assert utils.detect_dark_mode() is True
     assert "osc" not in called
 
     monkeypatch.delenv("COLORFGBG", raising=False)
     monkeypatch.setattr(
-        utils,
+        osc,
         "query_tty",
         lambda *_a, **_k: b"\x1b]11;rgb:0000/0000/0000\x07",
     )
@@ -79,7 +79,7 @@ def test_osc_strategy_real_tty(monkeypatch):
 
     def responder():
         data = os.read(master_fd, 100)
-        assert data == utils._OSC_BG_QUERY
+        assert data.startswith(utils._OSC_BG_QUERY)
         os.write(master_fd, b"\x1b]11;rgb:0000/0000/0000\x07")
 
     t = threading.Thread(target=responder)
@@ -109,7 +109,7 @@ def test_darkdetect_strategy(monkeypatch):
     monkeypatch.setattr(utils, "darkdetect", DummyDD)
     # Ensure earlier strategies fail so DarkDetectStrategy is used
     monkeypatch.delenv("COLORFGBG", raising=False)
-    monkeypatch.setattr(utils, "query_tty", lambda *_a, **_k: b"")
+    monkeypatch.setattr(osc, "query_tty", lambda *_a, **_k: b"")
     assert utils.detect_dark_mode(strategies=[utils.DarkDetectStrategy()]) is True
     DummyDD.theme = staticmethod(lambda: "Light")  # type: ignore[assignment]
     assert utils.detect_dark_mode(strategies=[utils.DarkDetectStrategy()]) is False
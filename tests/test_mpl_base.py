@@ -1,13 +1,19 @@
+import os
+import threading
+
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 from wskr.protocol.base import ImageProtocol
 from wskr.render.matplotlib.core import (
+    FrameHistory,
     WskrFigureCanvas,
     WskrFigureManager,
     _BackendTermAgg,
     render_figure_to_terminal,
 )
+from wskr.render.transmit import TransmitQueue
+from wskr.terminal import osc
 
 
 def test_canvas_class_exists_and_manager_property():
@@ -72,6 +78,24 @@ def test_render_with_invalid_scale_defaults_to_1(monkeypatch):
     assert transport.last_image.startswith(b"\x89PNG")  # type: ignore[possibly-unbound-attribute]
 
 
+def test_render_sends_agg_pixels_when_supported():
+    class PixelTransport(DummyTransport):
+        supports_pixels = True
+
+        def send_pixels(self, rgba, width, height):
+            self.last_pixels = (bytes(rgba), width, height)
+
+    fig = plt.figure()
+    canvas = FigureCanvasAgg(fig)
+    transport = PixelTransport()
+    render_figure_to_terminal(canvas, transport)
+
+    assert transport.last_image is None
+    data, width, height = transport.last_pixels
+    assert (width, height) == canvas.get_width_height(physical=True)
+    assert len(data) == width * height * 4
+
+
 def test_terminalbackend_draw_if_interactive_and_show(monkeypatch):
     called = {}
 
@@ -92,3 +116,99 @@ def test_terminalbackend_draw_if_interactive_and_show(monkeypatch):
     monkeypatch.setattr("matplotlib.is_interactive", lambda: True)
     _BackendTermAgg.draw_if_interactive()
     assert called["show"]
+
+
+def test_unchanged_frames_are_skipped(monkeypatch):
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    line = ax.plot([0, 1], [0, 1])[0]
+    canvas = FigureCanvasAgg(fig)
+    transport = DummyTransport()
+    sent = []
+    monkeypatch.setattr(transport, "send_image", sent.append)
+    history = FrameHistory()
+
+    assert render_figure_to_terminal(canvas, transport, history=history, skip_unchanged=True)
+    assert not render_figure_to_terminal(canvas, transport, history=history, skip_unchanged=True)
+    line.set_ydata([1, 0])
+    assert render_figure_to_terminal(canvas, transport, history=history, skip_unchanged=True)
+    # an explicit show always sends, even when nothing changed
+    assert render_figure_to_terminal(canvas, transport, history=history)
+    assert len(sent) == 3
+    assert (history.sent, history.skipped) == (3, 1)
+    assert all(png.startswith(b"\x89PNG") for png in sent)
+
+
+def test_frame_dropped_by_the_queue_is_sent_again(monkeypatch):
+    queue = TransmitQueue(max_bytes=1)
+    started, release = threading.Event(), threading.Event()
+    queue.submit("busy", lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+
+    canvases = [FigureCanvasAgg(plt.figure()) for _ in range(2)]
+    for canvas in canvases:
+        canvas.figure.add_subplot(111).plot([0, 1])
+    transport = DummyTransport()
+    sent = []
+    monkeypatch.setattr(transport, "send_image", sent.append)
+    history = FrameHistory()
+    assert render_figure_to_terminal(canvases[0], transport, queue=queue, history=history)
+    # the second figure's frame pushes the first one out of the queue
+    assert render_figure_to_terminal(canvases[1], transport, queue=queue)
+    release.set()
+    assert queue.flush(5)
+    assert (len(sent), queue.stats.dropped, history.sent) == (1, 1, 0)
+
+    assert render_figure_to_terminal(
+        canvases[0], transport, queue=queue, history=history, skip_unchanged=True
+    )
+    assert queue.flush(5)
+    assert (len(sent), history.sent) == (2, 1)
+    queue.close()
+
+
+def test_frame_whose_send_failed_is_sent_again(monkeypatch):
+    fig = plt.figure()
+    fig.add_subplot(111).plot([0, 1])
+    canvas = FigureCanvasAgg(fig)
+    transport = DummyTransport()
+
+    def fail(png):
+        msg = "terminal went away"
+        raise OSError(msg)
+
+    monkeypatch.setattr(transport, "send_image", fail)
+    queue = TransmitQueue()
+    history = FrameHistory()
+    assert render_figure_to_terminal(canvas, transport, queue=queue, history=history)
+    assert queue.flush(5)
+    assert queue.stats.failed == 1
+
+    sent = []
+    monkeypatch.setattr(transport, "send_image", sent.append)
+    assert render_figure_to_terminal(canvas, transport, queue=queue, history=history, skip_unchanged=True)
+    assert queue.flush(5)
+    assert len(sent) == 1
+    assert history.skipped == 0
+    queue.close()
+
+
+def test_frame_opens_the_terminal_once(monkeypatch, fake_tty):
+    opens = []
+    monkeypatch.setattr(os, "open", lambda *a, **kw: (opens.append(a), 99)[1])
+
+    class QueryingTransport(DummyTransport):
+        def get_window_size_px(self):
+            osc.query_tty(b"\x1b[14t", more=lambda b: True, timeout=0)
+            return super().get_window_size_px()
+
+        def send_image(self, png_bytes: bytes) -> None:
+            osc.query_tty(osc.DA1_REQUEST, more=lambda b: True, timeout=0)
+            super().send_image(png_bytes)
+
+    transport = QueryingTransport()
+    render_figure_to_terminal(FigureCanvasAgg(plt.figure()), transport)
+
+    assert transport.last_image.startswith(b"\x89PNG")
+    assert len(opens) == 1
+    assert fake_tty == [99]
@@ -0,0 +1,115 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from wskr.render.matplotlib.idle import IdleDrawScheduler
+from wskr.render.matplotlib.timer import EventLoop
+
+
+@pytest.fixture
+def deferred(monkeypatch):
+    """Defer draws as if the owner thread ran an event loop; yields a function spinning one."""
+    monkeypatch.setattr("wskr.render.matplotlib.idle.event_loop_running", lambda _thread: True)
+    return lambda until, timeout=2.0: EventLoop().run(timeout, until=until)
+
+
+def test_burst_is_coalesced_into_one_draw(deferred):
+    draws = []
+    sched = IdleDrawScheduler(lambda: draws.append(time.monotonic()), min_interval=0.02, max_fps=0)
+    for _ in range(50):
+        sched.request()
+    assert draws == []
+    deferred(lambda: sched.stats.delivered == 1)
+    deferred(lambda: False, timeout=0.05)
+    assert len(draws) == 1
+    assert sched.stats.requested == 50
+    assert not sched.pending
+
+
+def test_max_fps_spaces_out_draws(deferred):
+    draws = []
+    sched = IdleDrawScheduler(lambda: draws.append(time.monotonic()), min_interval=0, max_fps=20)
+    for n in range(1, 4):
+        sched.request()
+        deferred(lambda n=n: len(draws) == n)
+    gaps = [b - a for a, b in itertools.pairwise(draws)]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_deferred_draw_runs_on_the_owner_thread(deferred):
+    threads = []
+    sched = IdleDrawScheduler(lambda: threads.append(threading.current_thread()), min_interval=0)
+    worker = threading.Thread(target=sched.request)
+    worker.start()
+    worker.join()
+    deferred(lambda: sched.stats.delivered == 1)
+    assert threads == [threading.current_thread()]
+
+
+def test_request_during_draw_schedules_another(deferred):
+    entered = threading.Event()
+    calls = []
+
+    def draw():
+        calls.append(1)
+        if len(calls) == 1:
+            entered.set()
+            worker.join(2)
+
+    def request_while_drawing():
+        assert entered.wait(2)
+        sched.request()  # arrives while the first draw is still running
+
+    sched = IdleDrawScheduler(draw, min_interval=0, max_fps=0)
+    worker = threading.Thread(target=request_while_drawing)
+    worker.start()
+    sched.request()
+    deferred(lambda: sched.stats.delivered == 2)
+    assert len(calls) == 2
+
+
+def test_request_from_the_draw_itself_is_dropped(deferred):
+    calls = []
+    sched = IdleDrawScheduler(lambda: (calls.append(1), sched.request()), min_interval=0, max_fps=0)
+    sched.request()
+    deferred(lambda: sched.stats.delivered == 1)
+    deferred(lambda: False, timeout=0.05)
+    assert calls == [1]
+    assert not sched.pending
+
+
+def test_without_an_event_loop_requests_draw_at_once():
+    calls = []
+    sched = IdleDrawScheduler(lambda: (calls.append(1), sched.request()), min_interval=60, max_fps=0)
+    sched.request()
+    sched.request()
+    assert calls == [1, 1]
+    assert sched.stats.delivered == 2
+    assert not sched.pending
+
+
+def test_flush_and_cancel(deferred):
+    calls = []
+    sched = IdleDrawScheduler(lambda: calls.append(1), min_interval=60, max_fps=0)
+    assert not sched.flush()
+    sched.request()
+    assert sched.flush()
+    assert calls == [1]
+    sched.request()
+    sched.cancel()
+    assert not sched.pending
+    assert not sched.flush()
+    assert calls == [1]
+
+
+def test_failed_draw_is_logged_and_counted(deferred, caplog):
+    def draw():
+        raise RuntimeError
+
+    sched = IdleDrawScheduler(draw, min_interval=60, max_fps=0)
+    sched.request()
+    assert sched.flush()
+    assert sched.stats.delivered == 1
+    assert "deferred draw failed" in caplog.text
@@ -0,0 +1,128 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.gridspec import GridSpec
+
+from wskr.render.matplotlib.core import WskrFigureCanvas, WskrFigureManager
+from wskr.render.matplotlib.partial import PartialRedraw
+from wskr.render.matplotlib.plot import initialize_subplots
+
+
+@pytest.fixture(autouse=True)
+def _close_figures():
+    yield
+    plt.close("all")
+
+
+def _dashboard():
+    fig = plt.figure(figsize=(8, 6), dpi=60)
+    gs = GridSpec(2, 2, figure=fig)
+    axes = initialize_subplots(fig, gs, [(0, 0, 0, 0), (0, 0, 1, 1), (1, 1, 0, 1)], {}, {}, {}, None)
+    lines = [ax.plot(np.arange(20) * (i + 1))[0] for i, ax in enumerate(axes)]
+    fig.suptitle("dashboard")
+    return fig, axes, lines
+
+
+def _full_render(update):
+    fig, axes, lines = _dashboard()
+    update(axes, lines)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.array(canvas.buffer_rgba())
+
+
+def _tick(axes, lines):
+    lines[1].set_ydata(np.arange(20)[::-1] * 50)
+    axes[1].relim()
+    axes[1].autoscale_view()
+
+
+def test_only_stale_axes_are_redrawn_and_match_full_draw():
+    fig, axes, lines = _dashboard()
+    canvas = FigureCanvasAgg(fig)
+    partial = PartialRedraw()
+    assert partial.draw(canvas) == pytest.approx(1.0)
+    assert partial.draw(canvas) == pytest.approx(0.0)  # nothing stale: the buffer is current
+
+    _tick(axes, lines)
+    fraction = partial.draw(canvas)
+    assert 0 < fraction < 0.5
+    np.testing.assert_array_equal(np.array(canvas.buffer_rgba()), _full_render(_tick))
+    assert not any(ax.stale for ax in axes)
+
+
+def test_artists_outside_layout_are_restored():
+    def build():
+        fig, axes, _ = _dashboard()
+        note = axes[0].text(1.02, 0.5, "note", transform=axes[0].transAxes, clip_on=False)
+        note.set_in_layout(False)
+        return fig, note
+
+    def relabel(note):
+        note.set_text("moved")
+        note.set_y(0.2)
+
+    fig, note = build()
+    canvas = FigureCanvasAgg(fig)
+    partial = PartialRedraw()
+    partial.draw(canvas)
+    relabel(note)
+    assert partial.draw(canvas) < 1.0
+
+    fig, expected = build()
+    relabel(expected)
+    full = FigureCanvasAgg(fig)
+    full.draw()
+    np.testing.assert_array_equal(np.array(canvas.buffer_rgba()), np.array(full.buffer_rgba()))
+
+
+def test_overlapping_figure_artist_forces_full_draw():
+    fig, axes, lines = _dashboard()
+    canvas = FigureCanvasAgg(fig)
+    partial = PartialRedraw()
+    partial.draw(canvas)
+    text = fig.text(0.75, 0.75, "over the second axes")
+    partial.draw(canvas)  # a new figure-level artist is stale: full draw
+    _tick(axes, lines)
+    assert partial.draw(canvas) == pytest.approx(1.0)
+    text.set_visible(False)
+    partial.draw(canvas)
+    _tick(axes, lines)
+    assert partial.draw(canvas) < 1.0
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda fig, canvas: fig.set_size_inches(5, 4),
+        lambda fig, canvas: fig.add_subplot(2, 2, 1),
+        lambda fig, canvas: fig.set_layout_engine("constrained"),
+        lambda fig, canvas: canvas.draw(),  # a full draw made elsewhere
+    ],
+)
+def test_layout_changes_fall_back_to_full_draw(change):
+    fig, axes, lines = _dashboard()
+    canvas = FigureCanvasAgg(fig)
+    partial = PartialRedraw()
+    partial.draw(canvas)
+    change(fig, canvas)
+    _tick(axes, lines)
+    assert partial.draw(canvas) == pytest.approx(1.0)
+
+
+def test_manager_reports_fraction_redrawn(monkeypatch, dummy_transport):
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: False)
+    fig, axes, lines = _dashboard()
+    canvas = WskrFigureCanvas(fig)
+    manager = WskrFigureManager(canvas=canvas, transport_factory=lambda: dummy_transport)
+    manager.transmit_queue = None
+    canvas.manager = manager
+    manager.show()
+    assert manager.frames.redrawn == pytest.approx(1.0)
+
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: True)
+    _tick(axes, lines)
+    canvas.draw()
+    assert 0 < manager.frames.redrawn < 0.5
+    assert manager.frames.sent == 2
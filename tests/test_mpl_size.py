@@ -1,10 +1,13 @@
 import matplotlib.pyplot as plt
 import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 from wskr.render.matplotlib.size import (
     TerminalMetrics,
     autosize_figure,
+    cell_box_px,
     compute_terminal_figure_size,
+    set_size_px,
 )
 
 
@@ -38,3 +41,23 @@ def test_compute_terminal_figure_size_uses_metrics():
     w_in, h_in = compute_terminal_figure_size(50, 25, metrics)
     assert w_in == pytest.approx((50 * 10) / (100 * 100 * 2.0))
     assert h_in == pytest.approx((25 * 20) / (50 * 100 * 2.0))
+
+
+def test_autosize_figure_fits_both_bounds_in_whole_pixels():
+    fig = plt.figure(figsize=(6.4, 4.8), dpi=100)
+    autosize_figure(fig, width_px=1600, height_px=500)
+    assert FigureCanvasAgg(fig).get_width_height() == (667, 500)
+
+
+@pytest.mark.parametrize("dpi", [72, 100, 144.5, 227])
+def test_set_size_px_is_exact(dpi):
+    fig = plt.figure()
+    for width, height in [(1, 1), (199, 301), (641, 383), (1533, 977)]:
+        set_size_px(fig, width, height, dpi)
+        fig.set_dpi(dpi)
+        assert FigureCanvasAgg(fig).get_width_height() == (width, height)
+
+
+def test_cell_box_px_uses_measured_cells():
+    metrics = TerminalMetrics(w_px=1600, h_px=1000, n_col=200, n_row=50, dpi=100)
+    assert cell_box_px(40, 10, metrics) == (320, 200)
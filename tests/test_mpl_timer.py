@@ -0,0 +1,139 @@
+import threading
+import time
+
+import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+
+from wskr.render.matplotlib.core import TerminalBackend, WskrFigureCanvas, WskrFigureManager
+from wskr.render.matplotlib.timer import EventLoop, Scheduler, TerminalTimer, run_pending
+
+
+def test_scheduler_runs_in_deadline_order_and_honours_cancel(wait_for):
+    sched = Scheduler()
+    order = []
+    now = time.monotonic()
+    sched.call_at(now + 0.03, lambda: order.append("late"))
+    sched.call_at(now + 0.01, lambda: order.append("early"))
+    sched.call_at(now + 0.02, lambda: order.append("cancelled")).cancel()
+    assert wait_for(lambda: len(order) == 2)
+    time.sleep(0.02)
+    assert order == ["early", "late"]
+
+
+def test_timer_fires_repeatedly_until_stopped():
+    ticks = []
+    timer = TerminalTimer(interval=10)
+    timer.add_callback(lambda: ticks.append(time.monotonic()))
+    timer.start()
+    assert timer.running
+    EventLoop().run(2, until=lambda: len(ticks) >= 3)
+    timer.stop()
+    assert not timer.running
+    count = len(ticks)
+    EventLoop().run(0.05)
+    assert len(ticks) == count
+
+
+def test_single_shot_timer_fires_once():
+    ticks = []
+    timer = TerminalTimer(interval=5)
+    timer.single_shot = True
+    timer.add_callback(lambda: ticks.append(1))
+    timer.start()
+    EventLoop().run(2, until=lambda: bool(ticks))
+    EventLoop().run(0.04)
+    assert ticks == [1]
+    assert not timer.running
+
+
+def test_ticks_wait_for_the_thread_that_made_the_timer():
+    run_pending()  # drop anything earlier tests left queued for this thread
+    threads = []
+    timer = TerminalTimer(interval=5)
+    timer.add_callback(lambda: threads.append(threading.current_thread()))
+    timer.start()
+    time.sleep(0.05)
+    assert threads == []  # nothing ran on the scheduler thread
+    assert run_pending() == 1  # one tick waited; the next is scheduled when it runs
+    timer.stop()
+    assert threads == [threading.current_thread()]
+
+
+def test_late_ticks_are_skipped_not_queued():
+    ticks = []
+
+    def slow():
+        ticks.append(time.monotonic())
+        if len(ticks) == 1:
+            time.sleep(0.055)  # overruns five 10 ms ticks
+
+    timer = TerminalTimer(interval=10)
+    timer.add_callback(slow)
+    timer.start()
+    EventLoop().run(2, until=lambda: len(ticks) >= 3)
+    timer.stop()
+    assert timer.skipped >= 4
+    # the tick after the stall keeps the grid instead of firing a catch-up burst
+    assert ticks[2] - ticks[1] >= 0.008
+
+
+def test_event_loop_runs_callbacks_on_its_thread():
+    sched = Scheduler()
+    loop = EventLoop()
+    seen = []
+
+    def callback():
+        seen.append(threading.current_thread())
+        loop.stop()
+
+    sched.call_later(0.01, callback, owner=threading.get_ident())
+    loop.run(timeout=2)
+    assert seen == [threading.current_thread()]
+
+
+def test_event_loop_returns_after_timeout():
+    start = time.monotonic()
+    EventLoop().run(timeout=0.03)
+    assert 0.025 <= time.monotonic() - start < 1
+
+
+def test_pause_delivers_deferred_draw_on_calling_thread(monkeypatch):
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: True)
+    fig = plt.figure()
+    fig.add_subplot(1, 1, 1)
+    canvas = WskrFigureCanvas(fig)
+    threads = []
+
+    class Manager:
+        def show(self):
+            threads.append(threading.current_thread())
+
+    canvas.manager = Manager()
+    canvas.draw_idle()
+    canvas.start_event_loop(0.1)
+    assert threads == [threading.current_thread()]
+
+
+def test_blocking_show_plays_animation_until_it_ends(monkeypatch, dummy_transport):
+    monkeypatch.setattr("matplotlib.is_interactive", lambda: False)
+    fig = plt.figure()
+    ax = fig.add_subplot(1, 1, 1)
+    (line,) = ax.plot([0, 1], [0, 1])
+    canvas = WskrFigureCanvas(fig)
+    manager = WskrFigureManager(canvas, transport_factory=lambda: dummy_transport)
+    manager.transmit_queue = None
+    frames = []
+
+    def update(i):
+        frames.append(i)
+        line.set_ydata([0, i])
+        return (line,)
+
+    anim = FuncAnimation(fig, update, frames=3, interval=10, repeat=False)
+    canvas.draw()  # starts the animation's timer, as the first show does
+    monkeypatch.setattr("wskr.render.matplotlib.core.Gcf.get_active", lambda: manager)
+    monkeypatch.setattr("wskr.render.matplotlib.core.Gcf.destroy_all", lambda: None)
+    TerminalBackend.show()
+    assert frames[-3:] == [0, 1, 2]
+    assert not canvas.has_running_timers
+    del anim
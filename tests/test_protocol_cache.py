@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from wskr.protocol.cache import MAX_IMAGE_ID, ImageCache, payload_digest
+
+
+def test_digest_is_content_addressed():
+    assert payload_digest(b"abc") == payload_digest(bytearray(b"abc"))
+    assert payload_digest(b"abc") != payload_digest(b"abd")
+
+
+def test_allocate_id_is_monotonic():
+    cache = ImageCache(first_id=7)
+    assert [cache.allocate_id() for _ in range(3)] == [7, 8, 9]
+
+
+def test_allocate_id_starts_at_random_id_and_wraps():
+    starts = {ImageCache().allocate_id() for _ in range(5)}
+    assert len(starts) > 1  # two runs in one window must not share IDs
+    assert all(1 <= image_id <= MAX_IMAGE_ID for image_id in starts)
+    cache = ImageCache(first_id=MAX_IMAGE_ID)
+    assert [cache.allocate_id() for _ in range(2)] == [MAX_IMAGE_ID, 1]
+
+
+def test_get_refreshes_lru_order():
+    cache = ImageCache(max_images=2)
+    cache.put(b"a", 1, 10)
+    cache.put(b"b", 2, 10)
+    assert cache.get(b"a") == 1
+    assert cache.put(b"c", 3, 10) == [2]
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == 1
+
+
+def test_evicts_by_total_bytes():
+    cache = ImageCache(max_bytes=25)
+    cache.put(b"a", 1, 10)
+    cache.put(b"b", 2, 10)
+    assert cache.put(b"c", 3, 10) == [1]
+    assert cache.nbytes == 20
+    assert len(cache) == 2
+
+
+def test_oversized_entry_is_kept_alone():
+    cache = ImageCache(max_bytes=5)
+    cache.put(b"a", 1, 2)
+    assert cache.put(b"big", 2, 50) == [1]
+    assert cache.get(b"big") == 2
+
+
+def test_replacing_digest_frees_old_id():
+    cache = ImageCache()
+    cache.put(b"a", 1, 10)
+    assert cache.put(b"a", 2, 12) == [1]
+    assert cache.nbytes == 12
+
+
+def test_clear_returns_ids():
+    cache = ImageCache()
+    cache.put(b"a", 1, 10)
+    cache.put(b"b", 2, 10)
+    assert cache.clear() == [1, 2]
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_discard_forgets_digest():
+    cache = ImageCache()
+    cache.put(b"a", 1, 10)
+    assert cache.discard(b"a") == 1
+    assert cache.discard(b"a") is None
+    assert cache.get(b"a") is None
+    assert cache.nbytes == 0
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from wskr.protocol.dirty import changed_regions
+
+
+def _frame(h: int = 64, w: int = 80) -> np.ndarray:
+    return np.zeros((h, w, 4), dtype=np.uint8)
+
+
+def test_identical_frames_have_no_regions():
+    assert changed_regions(_frame(), _frame()) == []
+
+
+def test_single_pixel_change():
+    cur = _frame()
+    cur[10, 20, 2] = 255
+    assert changed_regions(_frame(), cur) == [(20, 10, 1, 1)]
+
+
+def test_separate_areas_stay_separate_and_near_ones_merge():
+    cur = _frame()
+    cur[5:8, 2:6] = 1
+    cur[5:8, 60:70] = 1
+    cur[40:42, 10:12] = 1
+    cur[45, 10] = 1  # within the merge gap of the block above
+    assert changed_regions(_frame(), cur, gap=4) == [
+        (2, 5, 4, 3),
+        (60, 5, 10, 3),
+        (10, 40, 2, 6),
+    ]
+
+
+def test_too_many_regions_collapse_to_bounding_box():
+    cur = _frame()
+    cur[::8, ::8] = 1
+    assert changed_regions(_frame(), cur, gap=0, max_regions=4) == [(0, 0, 73, 57)]
+
+
+def test_shape_mismatch_rejected():
+    with pytest.raises(ValueError, match="shapes differ"):
+        changed_regions(_frame(), _frame(h=10))
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import pytest
+
+from wskr.protocol import medium
+
+
+def test_shared_memory_roundtrip():
+    name = medium.stage_payload(medium.SHARED_MEMORY, b"pixels")
+    assert name.startswith("/wskr-")
+    assert len(name) <= 31
+    shm = shared_memory.SharedMemory(name=name.lstrip("/"))
+    try:
+        assert bytes(shm.buf[:6]) == b"pixels"
+    finally:
+        shm.close()
+    medium.discard_payload(medium.SHARED_MEMORY, name)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name.lstrip("/"))
+
+
+def test_temp_file_roundtrip():
+    path = medium.stage_payload(medium.TEMP_FILE, memoryview(b"pixels"))
+    assert "tty-graphics-protocol" in path
+    assert Path(path).read_bytes() == b"pixels"
+    medium.discard_payload(medium.TEMP_FILE, path)
+    assert not Path(path).exists()
+
+
+def test_stage_direct_is_rejected():
+    with pytest.raises(ValueError, match="medium"):
+        medium.stage_payload(medium.DIRECT, b"x")
+
+
+@pytest.mark.parametrize("var", ["SSH_CONNECTION", "SSH_CLIENT", "SSH_TTY"])
+def test_remote_session_detection(monkeypatch, var):
+    for name in ("SSH_CONNECTION", "SSH_CLIENT", "SSH_TTY"):
+        monkeypatch.delenv(name, raising=False)
+    assert medium.is_remote_session() is False
+    monkeypatch.setenv(var, "1")
+    assert medium.is_remote_session() is True
@@ -0,0 +1,160 @@
+import threading
+import time
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from PIL import Image
+from rich.console import Console
+
+from wskr.render.matplotlib.core import (
+    FrameHistory,
+    WskrFigureCanvas,
+    WskrFigureManager,
+    render_figure_to_terminal,
+)
+from wskr.render.pipeline import FramePipeline, encode_png
+from wskr.render.rich.plt import RichPlot
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = FramePipeline()
+    yield pipeline
+    pipeline.close()
+
+
+def test_frames_pass_every_stage_in_order(pipeline):
+    sent = []
+    futures = [pipeline.submit(lambda i=i: i, lambda i: i * 10, sent.append) for i in range(5)]
+    assert pipeline.flush(5)
+    assert sent == [0, 10, 20, 30, 40]
+    assert all(f.done() for f in futures)
+    for stage in (pipeline.stats.render, pipeline.stats.encode, pipeline.stats.transmit):
+        assert stage.frames == 5
+        assert stage.max_s >= stage.mean_s >= 0
+    assert pipeline.inflight == 0
+
+
+def test_full_queue_blocks_the_producer():
+    pipeline = FramePipeline(depth=1)
+    release = threading.Event()
+    for i in range(5):
+        if i == 4:
+            threading.Timer(0.05, release.set).start()
+        pipeline.submit(lambda i=i: i, lambda i: i, lambda _: release.wait(5))
+    # transmitting, waiting to transmit, held by the encoder, queued: the fifth waited
+    assert pipeline.stats.blocked_s >= 0.03
+    assert pipeline.flush(5)
+    assert pipeline.stats.transmit.frames == 5
+    pipeline.close()
+
+
+def test_render_returning_none_skips_the_frame(pipeline):
+    assert pipeline.submit(lambda: None, pytest.fail, pytest.fail) is None
+    assert pipeline.stats.skipped == 1
+    assert pipeline.inflight == 0
+
+
+def test_stage_failure_is_counted_and_set_on_the_future(pipeline):
+    def boom(_frame):
+        msg = "bad frame"
+        raise ValueError(msg)
+
+    future = pipeline.submit(lambda: 1, boom, pytest.fail)
+    ok = pipeline.submit(lambda: 2, lambda x: x, lambda x: x)
+    assert pipeline.flush(5)
+    with pytest.raises(ValueError, match="bad frame"):
+        future.result(1)
+    assert ok.result(1) == 2
+    assert pipeline.stats.failed == 1
+
+
+def test_close_sends_queued_frames_then_rejects_new_ones():
+    pipeline = FramePipeline()
+    sent = []
+    pipeline.submit(lambda: 1, lambda x: x, lambda x: (time.sleep(0.02), sent.append(x)))
+    pipeline.close()
+    assert sent == [1]
+    with pytest.raises(RuntimeError, match="closed"):
+        pipeline.submit(lambda: 1, lambda x: x, sent.append)
+
+
+def test_depth_must_be_positive():
+    with pytest.raises(ValueError, match="depth"):
+        FramePipeline(depth=0)
+
+
+def test_encode_png_round_trips():
+    rgba = np.zeros((3, 4, 4), dtype=np.uint8)
+    rgba[1, 2] = (255, 0, 0, 255)
+    png = encode_png(rgba)
+    assert png.startswith(b"\x89PNG")
+    np.testing.assert_array_equal(np.asarray(Image.open(BytesIO(png))), rgba)
+
+
+def test_manager_sends_frames_through_pipeline(monkeypatch, dummy_transport, pipeline):
+    monkeypatch.setattr("wskr.render.matplotlib.core.is_interactive", lambda: False)
+    fig = plt.figure(figsize=(2, 1), dpi=50)
+    fig.add_subplot(1, 1, 1).plot([0, 1])
+    canvas = WskrFigureCanvas(fig)
+    manager = WskrFigureManager(canvas=canvas, transport_factory=lambda: dummy_transport)
+    manager.transmit_queue = None
+    manager.pipeline = pipeline
+    canvas.manager = manager
+    manager.show()
+    assert pipeline.flush(5)
+    assert dummy_transport.last_image.startswith(b"\x89PNG")
+    assert pipeline.stats.transmit.frames == 1
+    plt.close(fig)
+
+
+def test_rich_plot_shows_submitted_frame(monkeypatch, dummy_transport, pipeline):
+    monkeypatch.setattr("wskr.render.rich.plt.get_terminal_size", lambda: (10, 20, 80, 24))
+    monkeypatch.setattr("wskr.render.rich.img.get_image_protocol", lambda: dummy_transport)
+    fig = plt.figure()
+    fig.add_subplot(1, 1, 1).plot([0, 1, 2], [1, 2, 1])
+    rp = RichPlot(fig, desired_width=10, desired_height=3, pipeline=pipeline)
+    assert not rp.submit()  # the cell box is unknown before the first print
+
+    console = Console()
+    with console.capture():
+        console.print(rp)
+    assert dummy_transport.counter == 1
+    assert rp.submit()
+    assert pipeline.flush(5)
+    assert dummy_transport.counter == 2  # uploaded on the pipeline's thread
+    renders = pipeline.stats.render.frames
+
+    monkeypatch.setattr(rp, "_render_to_buffer", pytest.fail)
+    with console.capture():
+        console.print(rp)
+    assert dummy_transport.counter == 2  # the submitted image was reused
+    assert pipeline.stats.render.frames == renders
+    plt.close(fig)
+
+
+def test_history_records_only_transmitted_frames(monkeypatch, dummy_transport, pipeline):
+    fig = plt.figure(figsize=(2, 1), dpi=50)
+    fig.add_subplot(1, 1, 1).plot([0, 1])
+    canvas = WskrFigureCanvas(fig)
+    history = FrameHistory()
+
+    def fail(png):
+        msg = "terminal went away"
+        raise OSError(msg)
+
+    monkeypatch.setattr(dummy_transport, "send_image", fail)
+    assert render_figure_to_terminal(canvas, dummy_transport, history=history, pipeline=pipeline)
+    assert pipeline.flush(5)
+    assert (history.digest, history.sent) == (None, 0)
+
+    monkeypatch.undo()
+    assert render_figure_to_terminal(
+        canvas, dummy_transport, history=history, skip_unchanged=True, pipeline=pipeline
+    )
+    assert pipeline.flush(5)
+    assert dummy_transport.last_image.startswith(b"\x89PNG")
+    assert history.sent == 1
+    plt.close(fig)
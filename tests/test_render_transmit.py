@@ -0,0 +1,74 @@
+import threading
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from wskr.render.matplotlib.core import render_figure_to_terminal
+from wskr.render.transmit import TransmitQueue
+
+
+def _blocked_queue(**kwargs):
+    """Return a queue whose writer is stuck in a first frame, and its release event."""
+    queue = TransmitQueue(**kwargs)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    queue.submit("warmup", slow, 1)
+    started.wait(5)
+    return queue, release
+
+
+def test_latest_frame_wins_per_key():
+    queue, release = _blocked_queue()
+    sent = []
+    for i in range(5):
+        queue.submit("fig", lambda i=i: sent.append(("fig", i)), 10)
+    queue.submit("other", lambda: sent.append(("other", 0)), 10)
+    assert queue.pending_bytes == 20
+    release.set()
+    assert queue.flush(5)
+    assert sent == [("fig", 4), ("other", 0)]
+    assert queue.stats.dropped == 4
+    assert queue.stats.sent == 3
+    queue.close()
+
+
+def test_byte_bound_drops_oldest_waiting_frames():
+    queue, release = _blocked_queue(max_bytes=25)
+    sent = []
+    for key in "abc":
+        queue.submit(key, lambda key=key: sent.append(key), 10)
+    release.set()
+    assert queue.flush(5)
+    assert sent == ["b", "c"]
+    assert queue.stats.dropped == 1
+    queue.close()
+
+
+def test_failed_send_is_counted_not_raised():
+    queue = TransmitQueue()
+
+    def boom():
+        raise OSError
+
+    queue.submit("fig", boom)
+    assert queue.flush(5)
+    assert queue.stats.failed == 1
+    queue.close()
+
+
+def test_render_returns_before_frame_is_sent(dummy_transport):
+    queue, release = _blocked_queue()
+    fig = plt.figure()
+    canvas = FigureCanvasAgg(fig)
+    transport = dummy_transport
+    render_figure_to_terminal(canvas, transport, queue=queue)
+    assert transport.last_image is None
+    release.set()
+    assert queue.flush(5)
+    assert transport.last_image.startswith(b"\x89PNG")
+    queue.close()
+    plt.close(fig)
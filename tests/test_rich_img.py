@@ -1,3 +1,5 @@
+from io import BytesIO
+
 from rich.console import Console
 
 from wskr.protocol.base import ImageProtocol
@@ -39,6 +41,16 @@ def test_rich_image_loads_from_filepath(tmp_path):
     assert len(non_empty) == 2
 
 
+def test_placeholders_encode_image_id_as_24_bit_color():
+    image = RichImage(
+        BytesIO(b"png"), desired_width=2, desired_height=1, transport=DummyTransport(), image_id=0x01002C
+    )
+    console = Console(color_system="truecolor", force_terminal=True)
+    with console.capture() as capture:
+        console.print(image)
+    assert "\x1b[38;2;1;0;44m" in capture.get()
+
+
 def test_rich_image_fallback(tmp_path):
     data = b"\x89PNG\r\n\x1a\n" + b"\x00" * 10
     p = tmp_path / "image.png"
@@ -64,3 +76,22 @@ def test_rich_image_fallback(tmp_path):
     console = Console(record=True)
     console.print(rich_img)
     assert transport.sent
+
+
+def test_rich_image_batch_uploads_once(tmp_path):
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"image{i}.png"
+        p.write_bytes(b"\x89PNG\r\n\x1a\n" + bytes([i]))
+        paths.append(str(p))
+
+    class BatchTransport(DummyTransport):
+        def init_images(self, pngs):
+            self.batches = [list(pngs)]
+            return [10, -1, 12]
+
+    transport = BatchTransport()
+    images = RichImage.batch(paths, desired_width=3, desired_height=2, transport=transport)
+    assert [img.image_id for img in images] == [10, -1, 12]
+    assert len(transport.batches[0]) == 3
+    assert transport.counter == 0
@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 from rich.console import Console
 
 from wskr.render.rich.plt import RichPlot, get_terminal_size
+from wskr.terminal.geometry import GeometryProvider
 
 
 def test_rich_plot_can_render_to_console(monkeypatch, dummy_transport):
@@ -55,15 +56,35 @@ def test_rich_plot_ansi_output(dummy_transport, monkeypatch):
     assert all(len(line.strip()) > 0 for line in lines)
 
 
-def test_get_terminal_size_is_cached(monkeypatch):
+def test_get_terminal_size_is_cached_until_resize(monkeypatch, resize_watch):
     calls = {"count": 0}
 
     def fake_ioctl(fd, req, buf):
         calls["count"] += 1
         raise OSError
 
+    monkeypatch.setattr("wskr.terminal.geometry._tty_fileno", lambda: 1)
+    monkeypatch.setattr("wskr.terminal.geometry.GEOMETRY", GeometryProvider())
     monkeypatch.setattr("fcntl.ioctl", fake_ioctl)
     sz1 = get_terminal_size()
     sz2 = get_terminal_size()
     assert sz1 == sz2
     assert calls["count"] == 1
+    resize_watch()
+    get_terminal_size()
+    assert calls["count"] == 2
+
+
+def _png_size(png: bytes) -> tuple[int, int]:
+    return int.from_bytes(png[16:20], "big"), int.from_bytes(png[20:24], "big")
+
+
+def test_rich_plot_rasterizes_at_cell_box_pixels(monkeypatch, dummy_transport):
+    monkeypatch.setattr("wskr.render.rich.plt.get_terminal_size", lambda: (1600, 1000, 200, 50))
+    monkeypatch.setattr("wskr.render.rich.img.get_image_protocol", lambda: dummy_transport)
+    fig = plt.figure(dpi=100)
+    fig.add_subplot(111).plot([0, 1], [1, 0])
+    Console(record=True).print(RichPlot(fig, desired_width=30, desired_height=7))
+    assert _png_size(dummy_transport.last_image) == (240, 140)
+    Console(record=True).print(RichPlot(fig, desired_width=30, desired_height=7, zoom=1.7, oversample=2))
+    assert _png_size(dummy_transport.last_image) == (480, 280)
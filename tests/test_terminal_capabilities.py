@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+from wskr.terminal import geometry
 from wskr.terminal.generic import GenericCapabilities
 
 
-def test_generic_window_size_is_fallback():
+def test_generic_window_size_is_fallback(monkeypatch):
+    monkeypatch.setattr(geometry, "get_geometry", lambda: None)
     caps = GenericCapabilities()
     assert caps.window_px() == (800, 600)
 
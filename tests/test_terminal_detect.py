@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from wskr.protocol import registry
+from wskr.protocol.kitty import KittyTransport
+from wskr.protocol.noop import NoOpProtocol
+from wskr.terminal import detect, osc
+from wskr.terminal.detect import TerminalSupport
+
+_KITTY_OK = b"\x1b_Gi=31;OK\x1b\\"
+_XTVERSION = b"\x1bP>|kitty(0.36.2)\x1b\\"
+
+
+@pytest.fixture
+def tty_stdout(monkeypatch):
+    monkeypatch.setattr(detect, "_stdout_is_tty", lambda: True)
+    for var in ("KITTY_WINDOW_ID", "TERM", "TERM_PROGRAM"):
+        monkeypatch.delenv(var, raising=False)
+
+
+@pytest.fixture
+def fresh_auto(monkeypatch):
+    monkeypatch.setattr(registry, "_AUTO_CHOICE", None)
+    monkeypatch.delenv("WSKR_PROTOCOL", raising=False)
+
+
+def test_parse_kitty_reply():
+    support = detect.parse_support(_KITTY_OK + _XTVERSION + b"\x1b[?62;22c")
+    assert support == TerminalSupport(
+        answered=True, kitty_graphics=True, xtversion="kitty(0.36.2)", da1=(62, 22)
+    )
+
+
+def test_parse_sixel_and_kitty_error():
+    support = detect.parse_support(b"\x1b_Gi=31;ENOTSUPPORTED:x\x1b\\\x1b[?64;4;22c")
+    assert support.answered
+    assert not support.kitty_graphics
+    assert support.sixel
+    assert support.xtversion is None
+
+
+def test_probe_is_one_round_trip(monkeypatch, tty_stdout):
+    sent = []
+
+    def fake_query(request, more, timeout):
+        sent.append(request)
+        return _KITTY_OK + b"\x1b[?62c"
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    assert detect.probe_terminal().kitty_graphics
+    assert len(sent) == 1
+    assert sent[0].startswith(b"\x1b_Ga=q,i=31,")
+    assert sent[0].endswith(b"\x1b[>0q\x1b[c")
+
+
+def test_unanswered_probe_uses_env_hint(monkeypatch, tty_stdout):
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"")
+    assert detect.probe_terminal() == TerminalSupport()
+    monkeypatch.setenv("TERM", "xterm-kitty")
+    assert detect.probe_terminal().kitty_graphics
+
+
+def test_not_a_tty_skips_probe(monkeypatch):
+    monkeypatch.setattr(detect, "_stdout_is_tty", lambda: False)
+    monkeypatch.setattr(osc, "query_tty", pytest.fail)
+    assert detect.probe_terminal() == TerminalSupport()
+
+
+def test_auto_picks_kitty_once(monkeypatch, fresh_auto):
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return TerminalSupport(answered=True, kitty_graphics=True)
+
+    monkeypatch.setattr(detect, "probe_terminal", probe)
+    assert isinstance(registry.get_image_protocol(), KittyTransport)
+    assert isinstance(registry.get_image_protocol("auto"), KittyTransport)
+    assert calls == [1]
+
+
+def test_auto_without_graphics_is_noop(monkeypatch, fresh_auto):
+    # sixel is reported but no sixel protocol is registered
+    monkeypatch.setattr(detect, "probe_terminal", lambda: TerminalSupport(answered=True, sixel=True))
+    assert registry.detect_image_protocol() == "noop"
+    assert isinstance(registry.get_image_protocol(), NoOpProtocol)
+
+
+def test_auto_registers_kitty_in_a_fresh_interpreter():
+    script = """
+import sys
+from wskr.terminal import detect
+detect.probe_terminal = lambda: detect.TerminalSupport(answered=True, kitty_graphics=True, sixel=True)
+from wskr.protocol import registry
+assert "wskr.protocol.kitty" not in sys.modules
+print(registry.detect_image_protocol())
+"""
+    src = str(Path(registry.__file__).parents[2])
+    env = {**os.environ, "PYTHONPATH": src}
+    env.pop("WSKR_PROTOCOL", None)
+    out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, check=True, text=True)
+    assert out.stdout.strip() == "kitty"
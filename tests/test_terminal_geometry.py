@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import fcntl
+import signal
+import threading
+
+import pytest
+
+from wskr.terminal import geometry, osc
+from wskr.terminal.generic import GenericCapabilities
+from wskr.terminal.geometry import GeometryProvider, TerminalGeometry
+
+
+def _fake_ioctl(rows: int, cols: int, w_px: int, h_px: int):
+    def ioctl(fd, req, buf):
+        buf[0], buf[1], buf[2], buf[3] = rows, cols, w_px, h_px
+
+    return ioctl
+
+
+@pytest.fixture
+def tty_fd(monkeypatch):
+    monkeypatch.setattr(geometry, "_tty_fileno", lambda: 1)
+
+
+def test_ioctl_geometry(monkeypatch, tty_fd):
+    monkeypatch.setattr(fcntl, "ioctl", _fake_ioctl(50, 200, 1600, 1000))
+    monkeypatch.setattr(osc, "query_tty", pytest.fail)
+    geom = GeometryProvider().get()
+    assert geom == TerminalGeometry(cols=200, rows=50, width_px=1600, height_px=1000)
+    assert geom.cell_px == (8.0, 20.0)
+    assert geom.drawable_px() == (1600, 1000 - 60)
+
+
+def test_csi_fallback_when_pixels_unknown(monkeypatch, tty_fd):
+    monkeypatch.setattr(fcntl, "ioctl", _fake_ioctl(50, 200, 0, 0))
+    queries: list[bytes] = []
+
+    def fake_query(request, more, timeout):
+        queries.append(request)
+        return b"\x1b[4;1000;1600t\x1b[6;20;8t\x1b[8;50;200t"
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    provider = GeometryProvider()
+    assert provider.get() == TerminalGeometry(cols=200, rows=50, width_px=1600, height_px=1000)
+    # the cell size is learned once and reused after a resize
+    monkeypatch.setattr(fcntl, "ioctl", _fake_ioctl(25, 100, 0, 0))
+    assert provider.get() == TerminalGeometry(cols=100, rows=25, width_px=800, height_px=500)
+    assert queries == [b"\x1b[14t\x1b[16t\x1b[18t\x1b[c"]
+
+
+def test_csi_fallback_without_cell_report(monkeypatch, tty_fd):
+    monkeypatch.setattr(fcntl, "ioctl", _fake_ioctl(50, 200, 0, 0))
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"\x1b[4;1000;1600t\x1b[8;50;200t")
+    assert GeometryProvider().get() == TerminalGeometry(cols=200, rows=50, width_px=1600, height_px=1000)
+
+
+def test_unanswered_csi_keeps_zero_pixels(monkeypatch, tty_fd):
+    monkeypatch.setattr(fcntl, "ioctl", _fake_ioctl(50, 200, 0, 0))
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"")
+    geom = GeometryProvider().get()
+    assert geom is not None
+    assert not geom.has_pixels
+
+
+def test_no_tty_returns_none(monkeypatch, tty_fd):
+    def bad_ioctl(fd, req, buf):
+        raise OSError
+
+    monkeypatch.setattr(fcntl, "ioctl", bad_ioctl)
+    monkeypatch.setattr(osc, "query_tty", pytest.fail)
+    assert GeometryProvider().get() is None
+    assert geometry.window_px() == geometry.FALLBACK_WINDOW_PX
+
+
+def test_generic_capabilities_use_geometry(monkeypatch):
+    monkeypatch.setattr(
+        geometry, "get_geometry", lambda: TerminalGeometry(cols=100, rows=30, width_px=1000, height_px=600)
+    )
+    assert GenericCapabilities().window_px() == (1000, 540)
+
+
+def test_resize_invalidates_cached_geometry(monkeypatch, tty_fd, resize_watch):
+    calls = []
+
+    def ioctl(fd, req, buf):
+        calls.append(fd)
+        buf[0], buf[1], buf[2], buf[3] = 50, 200, 1600, 1000
+
+    monkeypatch.setattr(fcntl, "ioctl", ioctl)
+    provider = GeometryProvider()
+    first = provider.get()
+    assert provider.get() is first
+    assert len(calls) == 1
+    resize_watch()
+    monkeypatch.setattr(fcntl, "ioctl", _fake_ioctl(25, 100, 800, 500))
+    assert provider.get() == TerminalGeometry(cols=100, rows=25, width_px=800, height_px=500)
+
+
+def test_resize_watcher_chains_previous_handler(resize_watch):
+    seen = []
+    previous = signal.signal(signal.SIGWINCH, lambda signum, frame: seen.append(signum))
+    try:
+        watcher = geometry.ResizeWatcher(enabled=True)
+        start = watcher.current()
+        assert watcher.installed
+        resize_watch()
+        assert watcher.current() == start + 1
+        assert seen == [signal.SIGWINCH]
+        watcher.uninstall()
+        assert not watcher.installed
+        resize_watch()
+        assert seen == [signal.SIGWINCH, signal.SIGWINCH]
+    finally:
+        signal.signal(signal.SIGWINCH, previous)
+
+
+def test_resize_watcher_only_installs_on_main_thread():
+    watcher = geometry.ResizeWatcher(enabled=True)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(watcher.current()))
+    thread.start()
+    thread.join()
+    assert result == [None]
+    assert geometry.ResizeWatcher(enabled=False).current() is None
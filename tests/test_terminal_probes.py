@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from wskr.terminal import geometry, probes
+from wskr.terminal.probes import ProbeCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(probes, "terminal_identity", lambda: "term-a")
+    monkeypatch.setattr(probes, "_xtversion", lambda: None)
+    return ProbeCache(tmp_path / "wskr" / "probes.json", enabled=True)
+
+
+def _age(cache, field, seconds):
+    data = json.loads(cache.path.read_text())
+    data[cache.identity][field][1] -= seconds
+    cache.path.write_text(json.dumps(data))
+
+
+def test_fresh_value_skips_probe(cache):
+    calls = []
+    assert cache.cached("dark_mode", lambda: calls.append(1) or True) is True
+    assert cache.cached("dark_mode", lambda: calls.append(1) or False) is True
+    assert calls == [1]
+    value, age = cache.lookup("dark_mode")
+    assert value is True
+    assert age < 1
+
+
+def test_stale_value_served_once_then_reprobed_on_caller(cache):
+    cache.store("cell_px", [9.0, 18.0])
+    _age(cache, "cell_px", 4000)
+    threads = []
+
+    def probe():
+        threads.append(threading.current_thread())
+        return [10.0, 20.0]
+
+    assert cache.cached("cell_px", probe) == [9.0, 18.0]
+    time.sleep(0.02)
+    assert threads == []  # nothing probes behind the caller's back
+    assert cache.cached("cell_px", probe) == [10.0, 20.0]
+    assert threads == [threading.current_thread()]
+    assert cache.lookup("cell_px")[0] == [10.0, 20.0]
+
+
+def test_long_expired_value_is_reprobed_at_once(cache):
+    cache.store("cell_px", [9.0, 18.0])
+    _age(cache, "cell_px", 7200 + 10)
+    assert cache.cached("cell_px", lambda: [10.0, 20.0]) == [10.0, 20.0]
+
+
+def test_failed_refresh_keeps_stale_value(cache):
+    cache.store("cell_px", [9.0, 18.0])
+    _age(cache, "cell_px", 7200 + 10)
+
+    def probe():
+        raise OSError
+
+    assert cache.cached("cell_px", probe) == [9.0, 18.0]
+    assert cache.lookup("cell_px")[0] == [9.0, 18.0]
+
+
+def test_version_change_drops_identity(cache):
+    cache.store("xtversion", "kitty(0.35.0)")
+    cache.store("dark_mode", True)
+    cache.store("xtversion", "kitty(0.35.0)")
+    assert cache.lookup("dark_mode")[0] is True
+    cache.store("xtversion", "kitty(0.36.0)")
+    assert cache.lookup("dark_mode") is None
+    assert cache.lookup("xtversion")[0] == "kitty(0.36.0)"
+
+
+def test_invalid_or_missing_results_are_not_kept(cache, tmp_path):
+    cache.store("kitty_binary", str(tmp_path / "gone"))
+    exe = tmp_path / "kitty"
+    exe.write_text("")
+    exe.chmod(0o755)
+    valid = lambda p: os.access(p, os.X_OK)  # noqa: E731
+    assert cache.cached("kitty_binary", lambda: str(exe), valid=valid) == str(exe)
+    assert cache.lookup("kitty_binary")[0] == str(exe)
+    cache.clear()
+    assert cache.cached("kitty_binary", lambda: None) is None
+    assert cache.lookup("kitty_binary") is None
+
+
+def test_identities_are_separate(cache, monkeypatch):
+    cache.store("dark_mode", True)
+    other = ProbeCache(cache.path, enabled=True)
+    monkeypatch.setattr(probes, "terminal_identity", lambda: "term-b")
+    assert other.lookup("dark_mode") is None
+
+
+def test_disabled_cache_always_probes(tmp_path):
+    cache = ProbeCache(tmp_path / "probes.json", enabled=False)
+    assert cache.cached("dark_mode", lambda: True) is True
+    assert not cache.path.exists()
+
+
+def test_corrupt_file_is_ignored(cache):
+    cache.path.parent.mkdir(parents=True)
+    cache.path.write_text("{not json")
+    assert cache.lookup("dark_mode") is None
+    cache.store("dark_mode", False)
+    assert cache.lookup("dark_mode")[0] is False
+
+
+def test_geometry_cell_size_uses_cache(cache, monkeypatch):
+    monkeypatch.setattr(geometry, "PROBES", cache)
+    cache.store("cell_px", [8.0, 16.0])
+    monkeypatch.setattr(geometry, "_tty_fileno", lambda: 1)
+    monkeypatch.setattr(geometry, "_ioctl_winsize", lambda fd: geometry.TerminalGeometry(80, 24, 0, 0))
+    monkeypatch.setattr(geometry, "_csi_cell_px", lambda: (10.0, 20.0))
+    provider = geometry.GeometryProvider()
+    assert provider.get() == geometry.TerminalGeometry(80, 24, 640, 384)
+    provider.invalidate()
+    assert provider.get() == geometry.TerminalGeometry(80, 24, 800, 480)
+    assert cache.lookup("cell_px")[0] == [10.0, 20.0]
@@ -0,0 +1,139 @@
+import io as stdio
+import os
+import shutil
+import threading
+
+import pytest
+
+import wskr.protocol.kitty as kitty_mod
+from wskr.terminal import io
+from wskr.terminal.sink import STDOUT_SINK, FrameStats, OutputSink
+
+
+@pytest.fixture
+def pipe():
+    r, w = os.pipe()
+    yield r, w
+    os.close(r)
+    os.close(w)
+
+
+def test_frame_coalesces_into_one_writev(monkeypatch, pipe):
+    r, w = pipe
+    calls = []
+    real_writev = os.writev
+    monkeypatch.setattr(os, "writev", lambda fd, bufs: (calls.append(len(bufs)), real_writev(fd, bufs))[1])
+    sink = OutputSink(w)
+    with sink.frame():
+        sink.write([b"\r\x1b[3C"])
+        with sink.frame():
+            sink.write([b"\x1b_Ga=p,i=1;\x1b\\", memoryview(b"payload")])
+        sink.write([b"\n"])
+        assert calls == []  # nothing written before the frame ends
+    assert os.read(r, 100) == b"\r\x1b[3C\x1b_Ga=p,i=1;\x1b\\payload\n"
+    assert calls == [4]
+    assert sink.last_frame == FrameStats(nbytes=26, syscalls=1)
+    assert sink.stats.frames == 1
+
+
+def test_write_outside_frame_flushes_immediately(pipe):
+    r, w = pipe
+    sink = OutputSink(w)
+    sink.write([b"ab", b"cd"])
+    assert os.read(r, 10) == b"abcd"
+    sink.write([b"e"])
+    assert os.read(r, 10) == b"e"
+    assert sink.stats.frames == 2
+    assert sink.stats.nbytes == 5
+    assert sink.flush() == FrameStats()
+
+
+def test_nonblocking_target_waits_out_eagain(pipe):
+    r, w = pipe
+    os.set_blocking(w, False)
+    payload = os.urandom(1 << 20)  # far more than the pipe buffer holds
+    received = bytearray()
+
+    def drain():
+        while len(received) < len(payload) + 4:
+            received.extend(os.read(r, 65536))
+
+    reader = threading.Thread(target=drain)
+    reader.start()
+    sink = OutputSink(w)
+    with sink.frame():
+        sink.write([b"head", memoryview(payload)[:1000], memoryview(payload)[1000:]])
+    reader.join(5)
+    assert bytes(received) == b"head" + payload
+    assert sink.last_frame.nbytes == len(payload) + 4
+    assert sink.last_frame.syscalls > 1
+
+
+def test_write_segments_retries_after_eagain(monkeypatch):
+    out = bytearray()
+    attempts = []
+
+    def flaky_writev(fd, bufs):
+        attempts.append(len(bufs))
+        if len(attempts) == 1:
+            raise BlockingIOError
+        data = b"".join(bytes(b) for b in bufs)[:3]
+        out.extend(data)
+        return len(data)
+
+    def write(fd, data):
+        out.extend(bytes(data))
+        return len(data)
+
+    waits = []
+    monkeypatch.setattr(os, "writev", flaky_writev)
+    monkeypatch.setattr(os, "write", write)
+    monkeypatch.setattr(io, "select", lambda r, w, x, t: waits.append(w) or ([], w, []))
+    assert io.write_segments(9, [b"abcd", b"efgh"]) == (8, 3)  # the EAGAIN attempt is not counted
+    assert bytes(out) == b"abcdefgh"
+    assert waits == [[9]]
+
+
+def test_write_segments_gives_up_on_stalled_terminal(monkeypatch):
+    def full(fd, bufs):
+        raise BlockingIOError
+
+    waits = []
+    monkeypatch.setattr(os, "writev", full)
+    monkeypatch.setattr(io, "select", lambda r, w, x, t: waits.append(t) or ([], [], []))
+    with pytest.raises(TimeoutError, match="not writable"):
+        io.write_segments(9, [b"ab", b"cd"], timeout=0.25)
+    assert waits == [0.25]
+
+
+def test_file_object_without_fileno():
+    class Buffered:
+        def __init__(self):
+            self.buffer = stdio.BytesIO()
+
+        def flush(self):
+            pass
+
+    target = Buffered()
+    sink = OutputSink(target)  # type: ignore[arg-type]
+    with sink.frame():
+        sink.write([b"a", memoryview(b"bc")])
+    assert target.buffer.getvalue() == b"abc"
+    assert sink.last_frame == FrameStats(nbytes=3, syscalls=1)
+
+
+def test_kitty_send_image_is_one_frame(monkeypatch, pipe):
+    r, w = pipe
+    monkeypatch.setattr(STDOUT_SINK, "_target", w)
+    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    transport = kitty_mod.KittyTransport(
+        medium="direct", cache=kitty_mod.ImageCache(max_images=1, first_id=1)
+    )
+    frames = STDOUT_SINK.stats.frames
+    transport.send_image(b"first")
+    transport.send_image(b"second")  # evicts the first image in the same frame
+    assert STDOUT_SINK.stats.frames == frames + 2
+    assert STDOUT_SINK.last_frame.syscalls == 1
+    data = os.read(r, 4096)
+    assert data.endswith(b"\n\x1b_Ga=d,d=I,i=1,q=2;\x1b\\")
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import pty
+import re
+import threading
+
+import pytest
+
+from wskr.terminal import io, osc
+
+
+@pytest.fixture
+def pty_pair():
+    master, slave = pty.openpty()
+    yield master, slave
+    os.close(master)
+    os.close(slave)
+
+
+def test_async_query_reads_reply_without_blocking(pty_pair):
+    master, slave = pty_pair
+    tty = io.AsyncTtyIO(fd=slave)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        loop = asyncio.get_running_loop()
+        # answer after the loop has had time to run other work
+        loop.call_later(0.05, os.write, master, b"\x1b]11;rgb:0/0/0\x07tail")
+        resp = await tty.query(b"\x1b]11;?\x07", more=io.Terminators(io.BEL), timeout=1)
+        task.cancel()
+        return resp
+
+    assert asyncio.run(main()) == b"\x1b]11;rgb:0/0/0\x07"
+    assert os.read(master, 100) == b"\x1b]11;?\x07"
+    assert ticks > 5
+    assert os.get_blocking(slave)
+    # bytes past the reply are kept for the next reader
+    assert asyncio.run(tty.read(timeout=None)) == b"tail"
+
+
+def test_async_read_times_out(pty_pair):
+    _, slave = pty_pair
+    tty = io.AsyncTtyIO(fd=slave)
+    assert asyncio.run(tty.read(timeout=0.02, more=io.Terminators(io.ST))) == b""
+
+
+def test_async_calls_are_serialized(pty_pair):
+    master, slave = pty_pair
+    tty = io.AsyncTtyIO(fd=slave)
+
+    async def main():
+        first = tty.query(b"1", more=io.Terminators(b";"), timeout=1)
+        second = tty.query(b"2", more=io.Terminators(b";"), timeout=1)
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.02, os.write, master, b"a;")
+        loop.call_later(0.04, os.write, master, b"b;")
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(main()) == [b"a;", b"b;"]
+
+
+def test_async_waits_for_thread_holding_tty_lock(pty_pair):
+    master, slave = pty_pair
+    tty = io.AsyncTtyIO(fd=slave)
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with io._tty_lock:
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait()
+
+    async def main():
+        write = asyncio.create_task(tty.write(b"x"))
+        await asyncio.sleep(0.02)
+        assert not write.done()
+        release.set()
+        await write
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+        thread.join()
+    assert os.read(master, 10) == b"x"
+
+
+def test_sync_call_on_loop_thread_does_not_interleave(pty_pair, monkeypatch):
+    master, slave = pty_pair
+    tty = io.AsyncTtyIO(fd=slave)
+    monkeypatch.setattr(io, "_get_tty_fd", lambda: pytest.fail("the sync write reached the terminal"))
+    errors = []
+
+    def sync_write():
+        try:
+            io.TTY_IO.write(b"y")
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, sync_write)  # runs while the query waits for its reply
+        loop.call_later(0.03, os.write, master, b"a;")
+        return await tty.query(b"1", more=io.Terminators(b";"), timeout=1)
+
+    assert asyncio.run(main()) == b"a;"
+    assert len(errors) == 1
+    assert os.read(master, 10) == b"1"
+
+
+def test_async_instances_on_one_loop_are_serialized(pty_pair):
+    master, slave = pty_pair
+    first, second = io.AsyncTtyIO(fd=slave), io.AsyncTtyIO(fd=slave)
+
+    async def main():
+        one = asyncio.create_task(first.query(b"1", more=io.Terminators(b";"), timeout=1))
+        await asyncio.sleep(0.01)
+        two = asyncio.create_task(second.query(b"2", more=io.Terminators(b";"), timeout=1))
+        await asyncio.sleep(0.02)
+        assert os.read(master, 10) == b"1"  # the second query waits for the first reply
+        os.write(master, b"a;")
+        assert await one == b"a;"
+        await asyncio.sleep(0.02)
+        os.write(master, b"b;")
+        return await two
+
+    assert asyncio.run(main()) == b"b;"
+    assert os.read(master, 10) == b"2"
+
+
+def test_async_tty_is_usable_from_successive_loops(pty_pair):
+    master, slave = pty_pair
+    tty = io.AsyncTtyIO(fd=slave)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, os.write, master, b"a;b;")
+        # contention binds the call lock to the running loop
+        return await asyncio.gather(
+            *(tty.query(b"?", more=io.Terminators(b";"), timeout=1) for _ in range(2))
+        )
+
+    assert asyncio.run(main()) == [b"a;", b"b;"]
+    assert asyncio.run(main()) == [b"a;", b"b;"]
+
+
+def test_query_many_async(monkeypatch):
+    async def fake_query(request, more, timeout):  # noqa: ASYNC109
+        assert request == b"\x1b[16t\x1b[c"
+        await asyncio.sleep(0)
+        return b"\x1b[6;20;10t\x1b[?62c"
+
+    monkeypatch.setattr(osc, "query_tty_async", fake_query)
+    (cell,) = asyncio.run(osc.query_many_async([(b"\x1b[16t", re.compile(rb"\x1b\[6;(\d+);(\d+)t"))]))
+    assert cell is not None
+    assert cell.groups() == (b"20", b"10")
@@ -0,0 +1,138 @@
+import os
+import pty
+import re
+import threading
+import time
+from select import select
+
+import pytest
+
+from wskr.terminal import demux, io, osc
+
+_OSC_BG = (b"\x1b]11;?\x07", re.compile(rb"\x1b\]11;([^\x07]*)\x07"))
+_CELL = (b"\x1b[16t", re.compile(rb"\x1b\[6;(\d+);(\d+)t"))
+_ANSWERS = {
+    b"\x1b]11;?\x07": b"\x1b]11;rgb:0000/0000/0000\x07",
+    b"\x1b[16t": b"\x1b[6;20;10t",
+    b"\x1b[c": b"\x1b[?62;4c",
+}
+
+
+class FakeTerminal:
+    """Answer known queries on the master side of a pty, in order."""
+
+    def __init__(self, master: int) -> None:
+        self.master = master
+        self.received: list[bytes] = []
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        buf = bytearray()
+        while not self.stop.is_set():
+            if not select([self.master], [], [], 0.01)[0]:
+                continue
+            buf += os.read(self.master, 1024)
+            sequences, consumed = demux.split_sequences(buf)
+            del buf[:consumed]
+            for seq in sequences:
+                self.received.append(seq)
+                if seq in _ANSWERS:
+                    os.write(self.master, _ANSWERS[seq])
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    master, slave = pty.openpty()
+    monkeypatch.setattr(io, "_get_tty_fd", lambda: os.dup(slave))
+    term = FakeTerminal(master)
+    term.thread.start()
+    with demux.ReplyDemux(fd=slave) as dmx:
+        yield term, dmx
+    term.stop.set()
+    term.thread.join()
+    os.close(master)
+    os.close(slave)
+
+
+def test_split_sequences_keeps_partial_tail():
+    data = b"a\x1b_Gi=1;OK\x1b\\\x1b[6;2;3t\x1b]11;rgb:1/2/3\x07\x1bOA\x1b]11;rg"
+    sequences, consumed = demux.split_sequences(data)
+    assert sequences == [
+        b"a",
+        b"\x1b_Gi=1;OK\x1b\\",
+        b"\x1b[6;2;3t",
+        b"\x1b]11;rgb:1/2/3\x07",
+        b"\x1bO",
+        b"A",
+    ]
+    assert data[consumed:] == b"\x1b]11;rg"
+
+
+def test_concurrent_queries_are_routed(terminal):
+    term, dmx = terminal
+    assert demux.active_demux() is dmx
+    # a late ack from an earlier upload is consumed, not handed to a query
+    os.write(term.master, b"\x1b_Gi=5;OK\x1b\\")
+    results: dict[str, object] = {}
+
+    def ask(name, query):
+        results[name] = osc.query_many([query], timeout=2)[0]
+
+    threads = [
+        threading.Thread(target=ask, args=("bg", _OSC_BG)),
+        threading.Thread(target=ask, args=("cell", _CELL)),
+    ]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start < 1
+    assert results["bg"].group(1) == b"rgb:0000/0000/0000"
+    assert results["cell"].groups() == (b"20", b"10")
+    assert dmx.stray == 1
+
+
+def test_unanswered_query_resolves_at_sentinel(terminal):
+    _, _dmx = terminal
+    unknown = (b"\x1b]21;foreground=?\x07", re.compile(rb"\x1b\]21;"))
+    start = time.monotonic()
+    reply, cell = osc.query_many([unknown, _CELL], timeout=2)
+    assert time.monotonic() - start < 1
+    assert reply is None
+    assert cell is not None
+
+
+def test_query_tty_through_demux_and_late_reply_is_stray(terminal):
+    term, dmx = terminal
+    resp = osc.query_tty(b"\x1b[16t", more=io.Terminators(b"t"), timeout=2)
+    assert resp == b"\x1b[6;20;10t"
+    # nothing answers this one; the reply arriving after the timeout is dropped
+    assert osc.query_tty(b"\x1b[99t", more=io.Terminators(b"t"), timeout=0.05) == b""
+    os.write(term.master, b"\x1b[9;1;1t")
+    deadline = time.monotonic() + 1
+    while dmx.stray == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert dmx.stray == 1
+    (cell,) = osc.query_many([_CELL], timeout=2)
+    assert cell is not None
+    assert cell.groups() == (b"20", b"10")
+
+
+def test_stop_releases_waiters(monkeypatch):
+    master, slave = pty.openpty()
+    monkeypatch.setattr(io, "_get_tty_fd", lambda: os.dup(slave))
+    try:
+        dmx = demux.ReplyDemux(fd=slave).start()
+        result: list[bytes] = []
+        t = threading.Thread(target=lambda: result.append(dmx.query(b"?", more=lambda b: True, timeout=5)))
+        t.start()
+        time.sleep(0.05)
+        dmx.stop()
+        t.join(1)
+        assert result == [b""]
+        assert demux.active_demux() is None
+    finally:
+        os.close(master)
+        os.close(slave)
@@ -1,5 +1,6 @@
 import contextlib
 import os
+import re
 import termios
 
 from wskr.terminal import io, osc
@@ -107,10 +108,187 @@ def test_read_tty_variants(monkeypatch):
 def test_query_tty(monkeypatch):
     monkeypatch.setattr(io, "_get_tty_fd", lambda: 55)
     writes = []
-    monkeypatch.setattr(os, "write", lambda fd, data: writes.append((fd, data)))
+    monkeypatch.setattr(os, "write", lambda fd, data: (writes.append((fd, bytes(data))), len(data))[1])
     monkeypatch.setattr(termios, "tcdrain", lambda fd: None)
     monkeypatch.setattr(os, "close", lambda fd: None)
     monkeypatch.setattr(io.TTY_IO, "read", lambda *, fd=None, timeout=None, more=None, echo=False: b"resp")
     resp = osc.query_tty(b"req", more=lambda b: True)
     assert resp == b"resp"
     assert writes == [(55, b"req")]
+
+
+def test_query_many_single_round_trip(monkeypatch):
+    requests = []
+
+    def fake_query(request, more, timeout):
+        requests.append(request)
+        # the second query goes unanswered; replies after DA1 are not ours
+        return b"\x1b[4;10;20t\x1b[8;5;6t\x1b[?62;4c\x1b[6;1;1t"
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    px, cell, cells = osc.query_many([
+        (b"\x1b[14t", re.compile(rb"\x1b\[4;(\d+);(\d+)t")),
+        (b"\x1b[16t", re.compile(rb"\x1b\[6;(\d+);(\d+)t")),
+        (b"\x1b[18t", re.compile(rb"\x1b\[8;(\d+);(\d+)t")),
+    ])
+    assert requests == [b"\x1b[14t\x1b[16t\x1b[18t\x1b[c"]
+    assert px is not None
+    assert px.groups() == (b"10", b"20")
+    assert cell is None
+    assert cells is not None
+    assert cells.groups() == (b"5", b"6")
+
+
+def test_query_many_matches_replies_in_order(monkeypatch):
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"\x1b]11;a\x07\x1b]11;b\x07\x1b[?1c")
+    pattern = re.compile(rb"\x1b\]11;(\w)\x07")
+    first, second, third = osc.query_many([(b"1", pattern), (b"2", pattern), (b"3", pattern)])
+    assert first is not None
+    assert first.group(1) == b"a"
+    assert second is not None
+    assert second.group(1) == b"b"
+    assert third is None
+
+
+def test_query_many_sentinel_ends_the_read(monkeypatch):
+    seen = {}
+
+    def fake_query(request, more, timeout):
+        seen["timeout"] = timeout
+        assert more(b"\x1b]11;rgb:0/0/0\x07")
+        assert not more(b"\x1b]11;rgb:0/0/0\x07\x1b[?62c")
+        return b""
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    assert osc.query_many([(b"?", re.compile(rb"x"))], timeout=0.25) == [None]
+    assert seen["timeout"] == 0.25
+
+
+def test_write_all_resumes_short_writes(monkeypatch):
+    out = bytearray()
+    calls = []
+
+    def short_writev(fd, buffers):
+        # accept at most 5 bytes per call
+        chunk = b"".join(bytes(b) for b in buffers)[:5]
+        calls.append(len(buffers))
+        out.extend(chunk)
+        return len(chunk)
+
+    def short_write(fd, data):
+        out.extend(bytes(data)[:5])
+        return min(len(data), 5)
+
+    monkeypatch.setattr(os, "writev", short_writev)
+    monkeypatch.setattr(os, "write", short_write)
+    segments = [b"abc", memoryview(b"defghij"), b"", b"klmnopq"]
+    assert io.write_all(3, segments) == 17
+    assert bytes(out) == b"abcdefghijklmnopq"
+    assert calls[0] == 3  # the empty segment is skipped
+
+
+def test_write_all_batches_by_size(monkeypatch):
+    calls = []
+    monkeypatch.setattr(io, "WRITEV_MAX_BYTES", 4)
+    monkeypatch.setattr(os, "writev", lambda fd, bufs: (calls.append(len(bufs)), sum(map(len, bufs)))[1])
+    monkeypatch.setattr(os, "write", lambda fd, data: (calls.append(1), len(data))[1])
+    io.write_all(3, [b"ab", b"cd", b"ef", b"gh", b"i"])
+    assert calls == [2, 2, 1]
+
+
+def test_tty_session_reuses_one_fd(monkeypatch):
+    opens, closes, drains, attrs, writes = [], [], [], [], []
+    monkeypatch.setattr(io, "_get_tty_fd", lambda: (opens.append(1), 42)[1])
+    monkeypatch.setattr(os, "close", closes.append)
+    monkeypatch.setattr(os, "write", lambda fd, data: (writes.append((fd, bytes(data))), len(data))[1])
+    monkeypatch.setattr(termios, "tcdrain", drains.append)
+
+    @contextlib.contextmanager
+    def fake_attributes(fd, min_bytes=0, *, echo=False):
+        attrs.append(("set", fd))
+        yield
+        attrs.append(("restore", fd))
+
+    monkeypatch.setattr(io, "tty_attributes", fake_attributes)
+    monkeypatch.setattr(io, "select", lambda r, w, x, t: ([], [], []))
+
+    with io.TtySession() as tty:
+        assert io.active_session() is tty
+        io.write_tty(b"one")
+        io.write_tty(b"two")
+        assert osc.query_tty(b"?", more=lambda b: True, timeout=0) == b""
+        with io.TtySession() as inner:
+            assert inner.fd == tty.fd == 42
+            io.write_tty(b"three")
+        assert io.active_session() is tty
+        assert drains == []
+        tty.drain()
+
+    assert io.active_session() is None
+    assert opens == [1]
+    assert closes == [42]
+    assert attrs == [("set", 42), ("restore", 42)]
+    assert drains == [42, 42]
+    assert [d for _, d in writes] == [b"one", b"two", b"?", b"three"]
+
+
+def test_tty_session_borrowed_fd_stays_open(monkeypatch):
+    closes = []
+    monkeypatch.setattr(os, "close", closes.append)
+    monkeypatch.setattr(termios, "tcdrain", lambda fd: None)
+    monkeypatch.setattr(io, "tty_attributes", lambda *a, **k: contextlib.nullcontext())
+    with io.TtySession(fd=7) as tty:
+        assert tty.fd == 7
+    assert tty.fd == -1
+    assert closes == []
+
+
+def _chunked_tty(monkeypatch, chunks):
+    """Serve ``chunks`` as successive ``os.read`` results on fd 5."""
+    pending = list(chunks)
+    sizes = []
+
+    def fake_read(fd, n):
+        sizes.append(n)
+        return pending.pop(0) if pending else b""
+
+    monkeypatch.setattr(os, "read", fake_read)
+    monkeypatch.setattr(io, "select", lambda r, w, x, t: (r, [], []) if pending else ([], [], []))
+    monkeypatch.setattr(io, "tty_attributes", lambda *a, **k: contextlib.nullcontext())
+    monkeypatch.setattr(io, "_pending", bytearray())
+    return sizes
+
+
+def test_read_terminator_split_across_reads_keeps_leftover(monkeypatch):
+    sizes = _chunked_tty(monkeypatch, [b"\x1b]11;rgb:0/0/0\x1b", b"\\\x1b[?62c", b"tail"])
+    reply = io.read_tty(timeout=1, more=io.Terminators(io.BEL, io.ST), fd=5)
+    assert reply == b"\x1b]11;rgb:0/0/0\x1b\\"
+    assert sizes == [io.READ_SIZE, io.READ_SIZE]
+    # the DA1 reply read along with it is handed to the next reader
+    da1 = io.Terminators(re.compile(rb"\x1b\[\?[\d;]*c"))
+    assert io.read_tty(timeout=1, more=da1, fd=5) == b"\x1b[?62c"
+    assert io.read_tty(timeout=None, fd=5) == b"tail"
+
+
+def test_read_counts_terminators(monkeypatch):
+    _chunked_tty(monkeypatch, [b"\x1b[4;1;2t\x1b[6;3", b";4t\x1b[8;5;6t"])
+    reply = io.read_tty(timeout=1, more=io.Terminators(re.compile(rb"\x1b\[\d;\d+;\d+t"), count=3), fd=5)
+    assert reply.count(b"t") == 3
+
+
+def test_read_calls_plain_predicate_once_per_read(monkeypatch):
+    _chunked_tty(monkeypatch, [b"ab", b"cd\x07"])
+    seen = []
+
+    def more(data):
+        seen.append(data)
+        return not data.endswith(b"\x07")
+
+    assert io.read_tty(timeout=1, more=more, fd=5) == b"abcd\x07"
+    assert seen == [b"", b"ab", b"abcd\x07"]
+
+
+def test_terminators_as_predicate():
+    end = io.Terminators(io.ST)
+    assert end(b"\x1b_Gi=1;OK")
+    assert not end(b"\x1b_Gi=1;OK\x1b\\")
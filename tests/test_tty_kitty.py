@@ -1,11 +1,17 @@
+import base64
 import importlib
+import re
 import shutil
 import subprocess
 import sys
+import zlib
 from io import BytesIO
 from time import sleep
 
+import matplotlib.pyplot as plt
+import numpy as np
 import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 import wskr.core.config as cfg
 import wskr.protocol.kitty as kitty_mod
@@ -14,7 +20,13 @@ from wskr.core.errors import (
     TransportRuntimeError,
     TransportUnavailableError,
 )
+from wskr.protocol import medium
+from wskr.protocol.cache import ImageCache
 from wskr.protocol.kitty import KittyChunkParser, KittyTransport
+from wskr.render.matplotlib.core import blit_figure_to_terminal
+from wskr.terminal import geometry, osc
+from wskr.terminal.geometry import TerminalGeometry
+from wskr.terminal.sink import STDOUT_SINK
 
 
 def test_parse_init_response_success():
@@ -24,7 +36,12 @@ def test_parse_init_response_success():
 def test_kitty_transport_init_fails(monkeypatch):
     monkeypatch.setattr("shutil.which", lambda _: None)
     with pytest.raises(TransportUnavailableError, match="not available"):
-        kitty_mod.KittyTransport()
+        kitty_mod.KittyTransport(mode="icat")
+
+
+def test_direct_mode_needs_no_kitty_binary(monkeypatch):
+    monkeypatch.setattr("shutil.which", pytest.fail)
+    assert kitty_mod.KittyTransport(mode="direct").mode == "direct"
 
 
 def test_send_chunk_chunked_mode(monkeypatch):
@@ -91,36 +108,21 @@ class DummyProc:
 
 
 def test_get_window_size_px_caches_and_computes(monkeypatch):
-    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
     calls = []
 
-    def fake_run(self, args, capture_output=None, text=None, check=None, timeout=None, **kwargs):
-        calls.append(args)
-        return type("P", (), {"stdout": "80x120"})()
+    def fake_geometry():
+        calls.append(1)
+        return TerminalGeometry(cols=10, rows=40, width_px=80, height_px=120)
 
-    monkeypatch.setattr(kitty_mod.CommandRunner, "run", fake_run)
+    monkeypatch.setattr(geometry, "get_geometry", fake_geometry)
 
     kt = KittyTransport()
     first = kt.get_window_size_px()
     second = kt.get_window_size_px()
     assert first == second
     assert len(calls) == 1
-    assert first == (80, 120 - (3 * 120) // 24)
-
-
-def test_tput_lines_failure(monkeypatch):
-    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
-
-    def fake_run(self, cmd, capture_output=None, text=None, check=None, timeout=None, **kwargs):
-        # sourcery skip: no-conditionals-in-tests
-        if "+kitten" in cmd:
-            return type("P", (), {"stdout": "10x20"})()
-        raise subprocess.CalledProcessError(1, cmd)
-
-    monkeypatch.setattr(kitty_mod.CommandRunner, "run", fake_run)
-    kt2 = KittyTransport()
-    size = kt2.get_window_size_px()
-    assert size == (10, 20 - (3 * 20) // 24)
+    # three of the 40 real rows are reserved, not three of a nominal 24
+    assert first == (80, 120 - (3 * 120) // 40)
 
 
 @pytest.fixture(autouse=True)
@@ -129,13 +131,21 @@ def fake_which(monkeypatch):
     monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
 
 
-def test_get_window_size_px_uses_timeout(monkeypatch):
-    def fake_run(args, capture_output, text, check, timeout):
-        # we expect our 1.0s timeout
-        assert timeout == 1.0
-        return type("P", (), {"stdout": "100x200"})()
+@pytest.fixture(autouse=True)
+def fresh_image_cache(monkeypatch):
+    cache = ImageCache(first_id=1)
+    monkeypatch.setattr(kitty_mod, "IMAGE_CACHE", cache)
+    return cache
 
-    monkeypatch.setattr(subprocess, "run", fake_run)
+
+def test_get_window_size_px_spawns_no_subprocess(monkeypatch):
+    def no_subprocess(*a, **k):  # pragma: no cover - fail path
+        raise AssertionError
+
+    monkeypatch.setattr(subprocess, "run", no_subprocess)
+    monkeypatch.setattr(
+        geometry, "get_geometry", lambda: TerminalGeometry(cols=80, rows=24, width_px=100, height_px=200)
+    )
     kt = KittyTransport()
     w, _h = kt.get_window_size_px()
     assert w == 100
@@ -148,65 +158,404 @@ def test_send_image_uses_timeout(monkeypatch):
         seen["t"] = timeout
 
     monkeypatch.setattr(subprocess, "run", fake_run)
-    kt = KittyTransport()
+    kt = KittyTransport(mode="icat")
     kt.send_image(b"foo")
     assert seen.get("t") == 1.0
 
 
-@pytest.mark.parametrize("mode", ["error", "badout"])
-def test_get_window_size_px_defaults(monkeypatch, mode):
-    if mode == "error":
-
-        def bad_run(self, *a, **k):
-            msg = "boom"
-            raise CommandRunnerError(msg)
-
-        monkeypatch.setattr(kitty_mod.CommandRunner, "run", bad_run)
-    else:
-        monkeypatch.setattr(
-            kitty_mod.CommandRunner,
-            "run",
-            lambda self, *a, **k: type("P", (), {"stdout": "oops"})(),
-        )
+@pytest.mark.parametrize("geom", [None, TerminalGeometry(cols=80, rows=24, width_px=0, height_px=0)])
+def test_get_window_size_px_defaults(monkeypatch, geom):
+    monkeypatch.setattr(geometry, "get_geometry", lambda: geom)
     kt = KittyTransport()
     assert kt.get_window_size_px() == (800, 600)
 
 
-@pytest.mark.parametrize(("which_ok", "stdout"), [(False, None), (True, "bad")])
-def test_tput_lines_defaults(monkeypatch, which_ok, stdout):
-    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}" if which_ok else None)
-    if stdout is not None:
-        monkeypatch.setattr(
-            kitty_mod.CommandRunner,
-            "run",
-            lambda self, *a, **k: type("P", (), {"stdout": stdout})(),
-        )
-    assert KittyTransport._tput_lines() == 24
-
-
 def test_send_image_logs_error(monkeypatch, caplog):
     def bad_run(self, *a, **k):
         msg = "boom"
         raise CommandRunnerError(msg)
 
     monkeypatch.setattr(kitty_mod.CommandRunner, "run", bad_run)
-    kt = KittyTransport()
+    kt = KittyTransport(mode="icat")
     with caplog.at_level("ERROR"):
         kt.send_image(b"foo")
     assert any("Error sending image" in r.message for r in caplog.records)
 
 
-def test_init_image_success(monkeypatch, dummy_png):
-    sent = []
+class _BufferStdout:
+    def __init__(self):
+        self.buffer = BytesIO()
+
+    def flush(self):
+        pass
+
+
+def test_encode_command_single_chunk():
+    out = KittyChunkParser.encode_command("a=T,f=100", b"abc")
+    assert out == b"\x1b_Ga=T,f=100;YWJj\x1b\\"
+
+
+def test_encode_command_multi_chunk(monkeypatch):
+    monkeypatch.setattr(kitty_mod, "IMAGE_CHUNK_SIZE", 8)
+    out = KittyChunkParser.encode_command("a=T", b"0123456789")
+    chunks = out.split(b"\x1b\\")[:-1]
+    assert chunks[0] == b"\x1b_Ga=T,m=1;MDEyMzQ1"
+    assert chunks[1] == b"\x1b_Gm=0;Njc4OQ=="
+    assert all(len(c.split(b";", 1)[1]) % 4 == 0 for c in chunks)
+
+
+def test_frame_command_slices_without_copying(monkeypatch):
+    monkeypatch.setattr(kitty_mod, "IMAGE_CHUNK_SIZE", 10)  # rounded down to 8
+    segments = KittyChunkParser.frame_command("a=t,i=3", b"0123456789", more=True)
+    assert all(isinstance(s, memoryview) for s in segments[1::2])
+    assert segments[1].obj is segments[3].obj
+    assert b"".join(segments) == b"\x1b_Ga=t,i=3,m=1;MDEyMzQ1\x1b\\\x1b_Gm=1;Njc4OQ==\x1b\\"
+
+
+def test_send_image_direct_writes_centered_apc(monkeypatch):
+    png = b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR" + (200).to_bytes(4, "big") + (100).to_bytes(4, "big")
+    fake_stdout = _BufferStdout()
+    monkeypatch.setattr(sys, "stdout", fake_stdout)
     monkeypatch.setattr(
-        "wskr.protocol.kitty.KittyChunkParser.send_chunk",
-        lambda n, c, final=False: sent.append((n, c, final)),
+        kitty_mod, "get_geometry", lambda: TerminalGeometry(cols=100, rows=30, width_px=1000, height_px=600)
     )
-    monkeypatch.setattr("wskr.protocol.kitty.query_tty", lambda *a, **k: b"\x1b_Gi=5,i=1;OK\x1b\\")
+
+    def no_subprocess(*a, **k):  # pragma: no cover - fail path
+        raise AssertionError
+
+    monkeypatch.setattr(subprocess, "run", no_subprocess)
+    KittyTransport(mode="direct").send_image(png)
+
+    out = fake_stdout.buffer.getvalue()
+    # 200px on 10px cells -> 20 columns, centred in 100 columns -> indent 40
+    assert out.startswith(b"\r\x1b[40C\x1b_Ga=T,f=100,i=1,q=2,t=d;")
+    assert out.endswith(b"\x1b\\\n")
+
+
+def test_send_image_repeat_emits_placement_only(monkeypatch, dummy_png):
+    fake_stdout = _BufferStdout()
+    monkeypatch.setattr(sys, "stdout", fake_stdout)
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    queries = []
+    monkeypatch.setattr(osc, "query_tty", lambda req, **k: (queries.append(req), b"\x1b[?62c")[1])
+    kt = KittyTransport()
+
+    kt.send_image(dummy_png)
+    first = fake_stdout.buffer.getvalue()
+    assert b"a=T,f=100,i=1,q=2,t=d;" in first
+    assert queries == []
+
+    fake_stdout.buffer = BytesIO()
+    kt.send_image(dummy_png)
+    assert fake_stdout.buffer.getvalue() == b"\r\x1b_Ga=p,i=1,q=1;\x1b\\\n"
+    assert queries == [osc.DA1_REQUEST]
+
+
+def test_send_image_reuploads_image_the_terminal_dropped(monkeypatch, dummy_png):
+    fake_stdout = _BufferStdout()
+    monkeypatch.setattr(sys, "stdout", fake_stdout)
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    cache = ImageCache(first_id=1)
+    kt = KittyTransport(cache=cache)
+    kt.send_image(dummy_png)
+
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"\x1b_Gi=1;ENOENT:image not found\x1b\\\x1b[?62c")
+    fake_stdout.buffer = BytesIO()
+    kt.send_image(dummy_png)
+    out = fake_stdout.buffer.getvalue()
+    assert out.startswith(b"\r\x1b_Ga=p,i=1,q=1;\x1b\\\r\x1b_Ga=T,f=100,i=2,q=2,t=d;")
+    assert out.endswith(b"\x1b\\\n")
+    assert cache.get(kitty_mod.payload_digest(dummy_png)) == 2
+
+
+def test_send_image_eviction_deletes_terminal_side(monkeypatch):
+    fake_stdout = _BufferStdout()
+    monkeypatch.setattr(sys, "stdout", fake_stdout)
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    kt = KittyTransport(cache=ImageCache(max_images=2, first_id=1))
+    for payload in (b"one", b"two", b"three"):
+        kt.send_image(payload)
+    out = fake_stdout.buffer.getvalue()
+    assert out.count(b"a=d,d=I,") == 1
+    assert b"\x1b_Ga=d,d=I,i=1,q=2;\x1b\\" in out
+
+
+def test_init_image_cache_hit_sends_nothing(monkeypatch, dummy_png):
+    sent = []
+    queries = []
+    monkeypatch.setattr(kitty_mod, "_write_stdout", sent.append)
+
+    def fake_query(*a, **k):
+        queries.append(a)
+        return b"\x1b_Gi=5,i=1;OK\x1b\\"
+
+    monkeypatch.setattr("wskr.terminal.osc.query_tty", fake_query)
+    kt = KittyTransport()
+    assert kt.init_image(dummy_png) == 5
+    n_sent = len(sent)
+    assert KittyTransport().init_image(dummy_png) == 5
+    assert len(sent) == n_sent
+    assert len(queries) == 1
+
+
+@pytest.fixture
+def local_medium(monkeypatch):
+    for var in ("SSH_CONNECTION", "SSH_CLIENT", "SSH_TTY"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(kitty_mod, "_MEDIUM_SUPPORT", {})
+    monkeypatch.setattr(kitty_mod, "KITTY_MEDIUM_MIN_BYTES", 0)
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+
+
+@pytest.fixture
+def stdout_buffer(monkeypatch):
+    # sys.stdout is re-captured when the test body starts; patch it lazily
+    fake_stdout = _BufferStdout()
+    return lambda: (monkeypatch.setattr(sys, "stdout", fake_stdout), fake_stdout.buffer)[1]
+
+
+@pytest.mark.usefixtures("local_medium")
+def test_send_image_uses_shared_memory_when_accepted(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    probes = []
+
+    def fake_query(request, more, timeout):
+        probes.append(request)
+        # like kitty, consume (unlink) the staged probe object
+        name = base64.b64decode(request.split(b";", 1)[1][:-2]).decode()
+        medium.discard_payload(medium.SHARED_MEMORY, name)
+        return b"\x1b_Gi=31;OK\x1b\\"
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    payload = b"x" * 1000
+    KittyTransport().send_image(payload)
+    KittyTransport().send_image(payload + b"y")
+
+    assert len(probes) == 1
+    assert b"t=s" in probes[0]
+    out = buffer.getvalue()
+    assert out.count(b",t=s,S=") == 2
+    assert base64.b64encode(payload) not in out
+    for control_and_name in re.findall(rb"t=s,S=\d+;([^\x1b]+)", out):
+        medium.discard_payload(medium.SHARED_MEMORY, base64.b64decode(control_and_name).decode())
+
+
+@pytest.mark.usefixtures("local_medium")
+def test_send_image_falls_back_when_medium_rejected(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    probes = []
+
+    def fake_query(request, more, timeout):
+        probes.append(request)
+        return b"\x1b_Gi=31;EBADF:no such object\x1b\\"
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    KittyTransport().send_image(b"x" * 1000)
+    assert [b"t=s" in p for p in probes] == [True, False]
+    assert b"t=t" in probes[1]
+    assert b",t=d;" in buffer.getvalue()
+
+
+@pytest.mark.usefixtures("local_medium")
+def test_send_image_direct_for_remote_sessions(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    monkeypatch.setenv("SSH_CONNECTION", "10.0.0.1 22 10.0.0.2 5555")
+    monkeypatch.setattr(osc, "query_tty", pytest.fail)
+    KittyTransport().send_image(b"x" * 1000)
+    assert b",t=d;" in buffer.getvalue()
+
+
+def test_send_pixels_rgba_raw(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    kt = KittyTransport(pixel_format="rgba", zlib_level=0)
+    assert kt.supports_pixels
+    pixels = bytes(range(16))  # 2x2 RGBA
+    kt.send_pixels(memoryview(pixels), 2, 2)
+    assert buffer.getvalue() == (
+        b"\r\x1b_Ga=T,f=32,s=2,v=2,i=1,q=2,t=d;" + base64.b64encode(pixels) + b"\x1b\\\n"
+    )
+
+
+def test_send_pixels_rgb_zlib(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"\x1b[?62c")
+    kt = KittyTransport(pixel_format="rgb", zlib_level=6)
+    pixels = bytes(range(16))
+    kt.send_pixels(memoryview(pixels), 2, 2)
+    kt.send_pixels(memoryview(pixels), 2, 2)
+    first, second = buffer.getvalue().split(b"\n")[:2]
+    control, data = first.split(b";", 1)
+    assert control == b"\r\x1b_Ga=T,f=24,s=2,v=2,o=z,i=1,q=2,t=d"
+    assert zlib.decompress(base64.b64decode(data[:-2])) == bytes(
+        b for i, b in enumerate(pixels) if i % 4 != 3
+    )
+    # same pixels and geometry reuse the resident image
+    assert second == b"\r\x1b_Ga=p,i=1,q=1;\x1b\\"
+
+
+def test_send_pixels_dirty_rects_edit_changed_region(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    kt = KittyTransport(pixel_format="rgba", zlib_level=0, dirty_rects=True)
+    frame = np.zeros((40, 60, 4), dtype=np.uint8)
+    kt.send_pixels(memoryview(frame), 60, 40)
+    assert b"a=T,f=32,s=60,v=40,i=1," in buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    frame[10:12, 30:33] = 255
+    kt.send_pixels(memoryview(frame), 60, 40)
+    control, data = buffer.getvalue().split(b";", 1)
+    assert control == b"\x1b_Ga=f,r=1,i=1,f=32,x=30,y=10,s=3,v=2,q=2,t=d"
+    assert base64.b64decode(data[:-2]) == b"\xff" * 24
+
+    # unchanged frames send nothing; the cache now maps the new content to image 1
+    buffer.seek(0)
+    buffer.truncate()
+    kt.send_pixels(memoryview(frame), 60, 40)
+    assert buffer.getvalue() == b""
+    assert len(kt.image_cache) == 1
+
+    # a resize falls back to a full upload
+    kt.send_pixels(memoryview(np.zeros((20, 30, 4), dtype=np.uint8)), 30, 20)
+    assert b"a=T,f=32,s=30,v=20,i=2," in buffer.getvalue()
+
+
+def test_patch_pixels_sends_named_regions_only(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    kt = KittyTransport(pixel_format="rgba", zlib_level=0)
+    frame = np.zeros((40, 60, 4), dtype=np.uint8)
+    # nothing to edit yet: the caller sends the full frame, which is now kept
+    assert not kt.patch_pixels(memoryview(frame), 60, 40, [(0, 0, 4, 4)])
+    kt.send_pixels(memoryview(frame), 60, 40)
+
+    buffer.seek(0)
+    buffer.truncate()
+    frame[5:7, 8:10] = 255
+    frame[30, 50] = 255  # outside the named region, so not sent
+    assert kt.patch_pixels(memoryview(frame), 60, 40, [(8, 5, 2, 2)])
+    control, data = buffer.getvalue().split(b";", 1)
+    assert control == b"\x1b_Ga=f,r=1,i=1,f=32,x=8,y=5,s=2,v=2,q=2,t=d"
+    assert base64.b64decode(data[:-2]) == b"\xff" * 16
+    assert not KittyTransport(pixel_format="png").patch_pixels(memoryview(frame), 60, 40)
+
+
+def test_blit_edits_png_image_with_default_config(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    monkeypatch.setattr(kitty_mod, "get_geometry", lambda: None)
+    kt = KittyTransport(medium="direct")
+    assert not kt.supports_pixels  # the default transfer format is PNG
+    fig = plt.figure(figsize=(3, 2), dpi=50)
+    ax = fig.add_subplot(1, 1, 1)
+    (line,) = ax.plot([0, 1], [0, 1], animated=True)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    assert blit_figure_to_terminal(canvas, kt)  # the base image, sent as a PNG
+    assert b"a=T,f=100,i=1," in buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    line.set_ydata([1, 0])
+    ax.draw_artist(line)
+    assert blit_figure_to_terminal(canvas, kt, ax.bbox)
+    out = buffer.getvalue()
+    assert out.startswith(b"\x1b_Ga=f,r=1,i=1,f=32,")
+    assert b"a=T" not in out
+    plt.close(fig)
+
+
+def test_supports_pixels_defaults_to_png():
+    assert not KittyTransport(pixel_format="png").supports_pixels
+    assert not KittyTransport(mode="icat", pixel_format="rgba").supports_pixels
+    with pytest.raises(ValueError, match="pixel format"):
+        KittyTransport(pixel_format="bmp")
+    with pytest.raises(ValueError, match="zlib level"):
+        KittyTransport(zlib_level=10)
+
+
+def test_send_image_unknown_mode():
+    with pytest.raises(ValueError, match="send mode"):
+        KittyTransport(mode="carrier-pigeon")
+    with pytest.raises(ValueError, match="medium"):
+        KittyTransport(medium="carrier-pigeon")
+
+
+def test_init_images_pipelined_single_round_trip(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    queries = []
+
+    def fake_query(request, more, timeout):
+        queries.append(request)
+        resp = b"\x1b_Gi=2;ENODATA:bad png\x1b\\\x1b[?62;4c"
+        assert not more(resp)
+        return resp
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    monkeypatch.setattr(kitty_mod, "KITTY_MEDIUM_MIN_BYTES", 1 << 30)
+    kt = KittyTransport()
+    assert kt.init_images([b"one", b"two", b"one", b"three"]) == [1, -1, 1, 3]
+
+    assert queries == [b"\x1b[c"]
+    stream = buffer.getvalue()
+    assert stream.count(b"a=t,f=100,") == 3
+    assert stream.count(b",q=1,") == 3
+    # failed uploads are not cached; successful ones are
+    assert kt.init_images([b"one", b"three"], verify=False) == [1, 3]
+    assert len(queries) == 1
+
+
+def test_init_images_unverified_never_reads(monkeypatch, stdout_buffer):
+    buffer = stdout_buffer()
+    monkeypatch.setattr(osc, "query_tty", pytest.fail)
+    monkeypatch.setattr(kitty_mod, "KITTY_MEDIUM_MIN_BYTES", 1 << 30)
+    assert KittyTransport().init_images([b"a", b"b"], verify=False) == [1, 2]
+    assert buffer.getvalue().count(b",q=2,t=d;") == 2
+
+
+def test_init_images_without_sentinel_reply(monkeypatch):
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"")
+    with pytest.raises(TransportRuntimeError, match="pipelined"):
+        KittyTransport().init_images([b"a"])
+
+
+def test_init_image_success(monkeypatch, dummy_png, stdout_buffer):
+    buffer = stdout_buffer()
+    queries = []
+
+    def fake_query(request, more, timeout):
+        queries.append(request)
+        return b"\x1b_Gi=5,i=1;OK\x1b\\"
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
     kt = KittyTransport()
     img_id = kt.init_image(dummy_png)
     assert img_id == 5
-    assert sent[-1][2] is True
+    assert buffer.getvalue() == b"\x1b_Ga=t,f=100,i=1,q=0,t=d,m=1;" + base64.b64encode(dummy_png) + b"\x1b\\"
+    assert queries == [b"\x1b_Gm=0;\x1b\\\x1b[c"]
+
+
+def test_init_image_inside_frame_sends_chunks_before_terminator(monkeypatch, dummy_png, stdout_buffer):
+    buffer = stdout_buffer()
+    seen = []
+
+    def fake_query(request, more, timeout):
+        seen.append(buffer.getvalue())
+        return b"\x1b_Gi=5,i=1;OK\x1b\\"
+
+    monkeypatch.setattr(osc, "query_tty", fake_query)
+    with STDOUT_SINK.frame():
+        STDOUT_SINK.write([b"\r"])
+        KittyTransport().init_image(dummy_png)
+    assert seen == [b"\r\x1b_Ga=t,f=100,i=1,q=0,t=d,m=1;" + base64.b64encode(dummy_png) + b"\x1b\\"]
+
+
+def test_init_image_accepts_kitty_single_id_reply(monkeypatch, dummy_png):
+    monkeypatch.setattr(kitty_mod, "_write_stdout", lambda segments: None)
+    monkeypatch.setattr(osc, "query_tty", lambda *a, **k: b"\x1b_Gi=1;OK\x1b\\")
+    assert KittyTransport().init_image(dummy_png) == 1
 
 
 @pytest.mark.parametrize(
@@ -217,8 +566,8 @@ def test_init_image_success(monkeypatch, dummy_png):
     ],
 )
 def test_init_image_error_variants(monkeypatch, dummy_png, resp, pattern):
-    monkeypatch.setattr("wskr.protocol.kitty.KittyChunkParser.send_chunk", lambda *a, **k: None)
-    monkeypatch.setattr("wskr.protocol.kitty.query_tty", lambda *a, **k: resp)
+    monkeypatch.setattr(kitty_mod, "_write_stdout", lambda segments: None)
+    monkeypatch.setattr("wskr.terminal.osc.query_tty", lambda *a, **k: resp)
     kt = KittyTransport()
     with pytest.raises(TransportRuntimeError, match=pattern):
         kt.init_image(dummy_png)
@@ -226,13 +575,13 @@ def test_init_image_error_variants(monkeypatch, dummy_png, resp, pattern):
 
 def test_init_image_uses_timeout(monkeypatch, dummy_png):
     sent = {}
-    monkeypatch.setattr("wskr.protocol.kitty.KittyChunkParser.send_chunk", lambda *a, **k: None)
+    monkeypatch.setattr(kitty_mod, "_write_stdout", lambda segments: None)
 
     def fake_query(cmd, more, timeout):
         sent["timeout"] = timeout
         return b"\x1b_Gi=5,i=1;OK\x1b\\"
 
-    monkeypatch.setattr("wskr.protocol.kitty.query_tty", fake_query)
+    monkeypatch.setattr("wskr.terminal.osc.query_tty", fake_query)
     kt = KittyTransport()
     kt.init_image(dummy_png)
     assert sent["timeout"] == cfg.TIMEOUT_S
@@ -245,11 +594,11 @@ def test_get_window_size_px_cache_ttl(monkeypatch):
 
     calls = []
 
-    def fake_run(self, args, capture_output=None, text=None, check=None, timeout=None, **kwargs):
-        calls.append(args)
-        return type("P", (), {"stdout": "80x120"})()
+    def fake_geometry():
+        calls.append(1)
+        return TerminalGeometry(cols=10, rows=24, width_px=80, height_px=120)
 
-    monkeypatch.setattr(kitty_mod.CommandRunner, "run", fake_run)
+    monkeypatch.setattr(geometry, "get_geometry", fake_geometry)
     kt = kitty_mod.KittyTransport()
     kt.get_window_size_px()
     kt.get_window_size_px()
@@ -258,3 +607,20 @@ def test_get_window_size_px_cache_ttl(monkeypatch):
     monkeypatch.delenv("WSKR_CACHE_TTL_S", raising=False)
     importlib.reload(cfg)
     importlib.reload(kitty_mod)
+
+
+def test_get_window_size_px_cached_until_resize(monkeypatch, resize_watch):
+    calls = []
+
+    def fake_geometry():
+        calls.append(1)
+        return TerminalGeometry(cols=10, rows=40, width_px=80 * len(calls), height_px=120)
+
+    monkeypatch.setattr(geometry, "get_geometry", fake_geometry)
+    monkeypatch.setattr(kitty_mod.time, "time", pytest.fail)  # no clock reads while watching
+    kt = KittyTransport()
+    first = kt.get_window_size_px()
+    assert kt.get_window_size_px() == first
+    resize_watch()
+    assert kt.get_window_size_px() == (160, 111)
+    assert len(calls) == 2